@@ -29,11 +29,19 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from colorama import Fore, init
 from tqdm import tqdm
 from config import get_sellers
+from perfil_navegador import PerfilNavegador, mostrar_tiempos_arranque
+from extraccion_js import RecolectorEnlaces, paginar_ver_mas, recoger_datos_js
+from perfiles_timeout import TIMEOUTS_POR_DEFECTO, PerfilesTimeout
+from telemetria import TelemetriaScraper
+from perfilado import Perfilador, fase
+from duplicados import IndiceDuplicados
 
 init(autoreset=True)
 
-def setup_browser():
-    """Configuracion optimizada para GitHub Actions y local"""
+XPATH_BOTON_COOKIES = "//button[contains(text(), 'Aceptar')]"
+
+def setup_browser(perfil=None):
+    """Configuracion optimizada para GitHub Actions y local (perfil: PerfilNavegador persistente opcional)"""
     options = Options()
     
     # OPTIMIZACIONES CRITICAS PARA VELOCIDAD
@@ -95,16 +103,32 @@ def setup_browser():
     }
     options.add_experimental_option("prefs", prefs)
     
-    try:
-        browser = webdriver.Chrome(options=options)
-    except Exception as e:
-        print(f"Error iniciando Chrome: {e}")
-        # Fallback para diferentes entornos
-        from selenium.webdriver.chrome.service import Service
-        from webdriver_manager.chrome import ChromeDriverManager
-        
-        service = Service(ChromeDriverManager().install())
-        browser = webdriver.Chrome(service=service, options=options)
+    if perfil:
+        perfil.configurar(options)
+    
+    from selenium.webdriver.chrome.service import Service
+    
+    browser = None
+    if perfil and perfil.ruta_driver:
+        # Driver resuelto en una ejecucion anterior: sin Selenium Manager ni descargas
+        try:
+            browser = webdriver.Chrome(service=Service(perfil.ruta_driver), options=options)
+        except Exception as e:
+            print(f"AVISO: Driver cacheado no valido ({e}), resolviendo de nuevo")
+    
+    if browser is None:
+        try:
+            browser = webdriver.Chrome(options=options)
+        except Exception as e:
+            print(f"Error iniciando Chrome: {e}")
+            # Fallback para diferentes entornos
+            from webdriver_manager.chrome import ChromeDriverManager
+            
+            service = Service(ChromeDriverManager().install())
+            browser = webdriver.Chrome(service=service, options=options)
+    
+    if perfil:
+        perfil.guardar_ruta_driver(browser.service.path)
     
     # TIMEOUTS MAS AGRESIVOS PERO SEGUROS
     browser.implicitly_wait(0.3)
@@ -114,6 +138,31 @@ def setup_browser():
     browser.maximize_window()
     return browser
 
+def aceptar_cookies(driver, perfil=None):
+    """Acepta el banner de cookies; con un perfil que ya tiene el consentimiento solo comprueba que no aparece"""
+    if perfil and perfil.consentimiento_aceptado:
+        botones = driver.find_elements(By.XPATH, XPATH_BOTON_COOKIES)
+        if botones:
+            # Cookies caducadas: se acepta de nuevo y el perfil las vuelve a guardar
+            try:
+                botones[0].click()
+            except Exception:
+                pass
+        return
+    
+    # Aceptar cookies optimizado
+    try:
+        time.sleep(1.5)
+        cookie_button = WebDriverWait(driver, 3).until(
+            EC.element_to_be_clickable((By.XPATH, XPATH_BOTON_COOKIES))
+        )
+        cookie_button.click()
+        time.sleep(0.5)
+        if perfil:
+            perfil.guardar_consentimiento()
+    except:
+        pass
+
 def setup_google_sheets():
     """Configurar Google Sheets uploader desde variables de entorno"""
     try:
@@ -215,164 +264,231 @@ def detect_monthly_price(price_text, seller_name):
     except Exception as e:
         return price_text if price_text else "No especificado"
 
-def extract_car_data(driver, url, seller_name):
-    """Extrae datos del coche - VERSION FINAL SIN DEBUG"""
-    try:
-        driver.get(url)
-        time.sleep(1.5)
-        
-        # TITULO - MULTIPLES ESTRATEGIAS CON ESPERA OPTIMIZADA
-        title = ""
-        title_selectors = [
-            "h1.item-detail_ItemDetailTwoColumns__title__VtWrR",
-            "h1",
-            ".item-detail_ItemDetailTwoColumns__title__VtWrR",
-            "[class*='title']"
-        ]
-        
-        for selector in title_selectors:
-            try:
-                element = WebDriverWait(driver, 2).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                )
-                if element.text.strip():
-                    title = element.text.strip()
-                    break
-            except:
-                continue
-        
-        # Si no encuentra titulo, usar URL como backup
-        if not title:
-            title = url.split('/')[-1].replace('-', ' ').title()
-        
-        # LIMPIAR NUMERO ID DEL FINAL DEL TITULO
-        title = re.sub(r'\s*\d{10,}$', '', title)
-        
-        # PRECIOS - EXTRACCION CORREGIDA
-        precio_contado = "No especificado"
-        precio_financiado = "No especificado"
-        
-        # ESPERAR A QUE CARGUEN LOS PRECIOS
-        try:
-            WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.XPATH, "//*[contains(text(), '€')]"))
-            )
-        except:
-            pass
-        
-        # 1. BUSCAR PRECIO AL CONTADO POR ETIQUETA
-        try:
-            contado_elements = driver.find_elements(By.XPATH, 
-                "//span[text()='Precio al contado']/following::span[contains(@class, 'ItemDetailPrice') and contains(text(), '€')]"
-            )
-            
-            if contado_elements:
-                raw_price = contado_elements[0].text.strip()
-                precio_contado = detect_monthly_price(raw_price, seller_name)
-        except:
-            pass
-        
-        # 2. BUSCAR PRECIO FINANCIADO POR ETIQUETA
+# SELECTORES DE LA FICHA (compartidos por la extraccion con Selenium y la extraccion JS)
+SELECTORES_FICHA = {
+    "titulo": [
+        "h1.item-detail_ItemDetailTwoColumns__title__VtWrR",
+        "h1",
+        ".item-detail_ItemDetailTwoColumns__title__VtWrR",
+        "[class*='title']"
+    ],
+    "xpath_euros": "//*[contains(text(), '€')]",
+    "max_textos_euro": 10,
+    "xpath_contado": "//span[text()='Precio al contado']/following::span[contains(@class, 'ItemDetailPrice') and contains(text(), '€')]",
+    "xpath_financiado": "//span[text()='Precio financiado']/following::span[contains(@class, 'ItemDetailPrice') and contains(text(), '€')]",
+    "css_contado": [
+        "span.item-detail-price_ItemDetailPrice--standardFinanced__f9ceG",
+        ".item-detail-price_ItemDetailPrice--standardFinanced__f9ceG",
+        "span.item-detail-price_ItemDetailPrice--standard__fMa16",
+        "[class*='standardFinanced'] span"
+    ],
+    "css_financiado": [
+        "span.item-detail-price_ItemDetailPrice--financed__LgMRH",
+        ".item-detail-price_ItemDetailPrice--financed__LgMRH",
+        "[class*='financed'] span"
+    ],
+    "css_atributos": "span.item-detail-attributes-info_AttributesInfo__measure__O9xR3",
+    "xpath_km": "//span[text()='Kilómetros']/following-sibling::span",
+    "xpath_anio": "//span[text()='Año']/following-sibling::span",
+    "xpath_marca": "//span[text()='Marca']/following-sibling::*",
+}
+
+# Extraccion de la ficha con un solo execute_async_script (EXTRACCION_JS=false: comandos Selenium)
+EXTRACCION_JS = os.getenv('EXTRACCION_JS', 'true').lower() == 'true'
+
+def limpiar_titulo(title, url):
+    """Titulo de la ficha sin el ID final; si no hay titulo se usa el slug de la URL"""
+    if not title:
+        title = url.split('/')[-1].replace('-', ' ').title()
+    return re.sub(r'\s*\d{10,}$', '', title)
+
+def primer_precio(textos, seller_name):
+    """Primer texto con '€' de una lista (fallback por selectores CSS)"""
+    for text in textos:
+        text = text.strip()
+        if text and '€' in text:
+            return detect_monthly_price(text, seller_name)
+    return "No especificado"
+
+def precio_mas_alto(textos, seller_name):
+    """Ultimo fallback: el precio realista mas alto de los textos con '€'"""
+    valid_prices = []
+    for text in textos:
         try:
-            financiado_elements = driver.find_elements(By.XPATH, 
-                "//span[text()='Precio financiado']/following::span[contains(@class, 'ItemDetailPrice') and contains(text(), '€')]"
-            )
-            
-            if financiado_elements:
-                raw_price = financiado_elements[0].text.strip()
-                precio_financiado = detect_monthly_price(raw_price, seller_name)
-        except:
-            pass
-        
-        # 3. FALLBACK: USAR SELECTORES CSS ESPECÍFICOS
-        if precio_contado == "No especificado":
-            price_selectors_contado = [
-                "span.item-detail-price_ItemDetailPrice--standardFinanced__f9ceG",
-                ".item-detail-price_ItemDetailPrice--standardFinanced__f9ceG", 
-                "span.item-detail-price_ItemDetailPrice--standard__fMa16",
-                "[class*='standardFinanced'] span"
-            ]
+            text = text.strip().replace('&nbsp;', ' ').replace('\xa0', ' ')
+            if not text:
+                continue
             
-            for selector in price_selectors_contado:
-                try:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        text = element.text.strip()
-                        if text and '€' in text:
-                            precio_contado = detect_monthly_price(text, seller_name)
-                            break
-                    if precio_contado != "No especificado":
-                        break
-                except:
-                    continue
-        
-        if precio_financiado == "No especificado":
-            price_selectors_financiado = [
-                "span.item-detail-price_ItemDetailPrice--financed__LgMRH",
-                ".item-detail-price_ItemDetailPrice--financed__LgMRH",
-                "[class*='financed'] span"
+            # REGEX PARA CAPTURAR PRECIOS REALISTAS
+            price_patterns = [
+                r'(\d{1,3}(?:\.\d{3})+)\s*€',
+                r'(\d{1,6})\s*€'
             ]
             
-            for selector in price_selectors_financiado:
-                try:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        text = element.text.strip()
-                        if text and '€' in text:
-                            precio_financiado = detect_monthly_price(text, seller_name)
-                            break
-                    if precio_financiado != "No especificado":
-                        break
-                except:
-                    continue
-        
-        # 4. ÚLTIMO FALLBACK: BUSCAR CUALQUIER PRECIO
-        if precio_contado == "No especificado":
-            try:
-                price_elements = driver.find_elements(By.XPATH, "//*[contains(text(), '€')]")
-                
-                valid_prices = []
-                for i, elem in enumerate(price_elements[:10]):
+            for pattern in price_patterns:
+                price_matches = re.findall(pattern, text)
+                for price_match in price_matches:
                     try:
-                        text = elem.text.strip().replace('&nbsp;', ' ').replace('\xa0', ' ')
-                        if not text:
-                            continue
-                        
-                        # REGEX PARA CAPTURAR PRECIOS REALISTAS
-                        price_patterns = [
-                            r'(\d{1,3}(?:\.\d{3})+)\s*€',
-                            r'(\d{1,6})\s*€'
-                        ]
+                        price_clean = price_match.replace('.', '')
+                        price_value = int(price_clean)
                         
-                        for pattern in price_patterns:
-                            price_matches = re.findall(pattern, text)
-                            for price_match in price_matches:
-                                try:
-                                    price_clean = price_match.replace('.', '')
-                                    price_value = int(price_clean)
-                                    
-                                    if 50 <= price_value <= 300000:
-                                        formatted_price = f"{price_value:,}".replace(',', '.') + " €" if price_value >= 1000 else f"{price_value} €"
-                                        final_price = detect_monthly_price(formatted_price, seller_name)
-                                        valid_prices.append((price_value, final_price, text))
-                                except:
-                                    continue
+                        if 50 <= price_value <= 300000:
+                            formatted_price = f"{price_value:,}".replace(',', '.') + " €" if price_value >= 1000 else f"{price_value} €"
+                            final_price = detect_monthly_price(formatted_price, seller_name)
+                            valid_prices.append((price_value, final_price, text))
                     except:
                         continue
-                
-                # Tomar el precio más alto como precio al contado
-                if valid_prices:
-                    valid_prices = sorted(set(valid_prices), key=lambda x: x[0], reverse=True)
-                    precio_contado = valid_prices[0][1]
-                        
+        except:
+            continue
+    
+    # Tomar el precio más alto como precio al contado
+    if valid_prices:
+        valid_prices = sorted(set(valid_prices), key=lambda x: x[0], reverse=True)
+        return valid_prices[0][1]
+    return "No especificado"
+
+def procesar_datos_js(datos, url, seller_name):
+    """Post-procesado de los datos en bruto de la extraccion JS (mismas reglas que con Selenium)"""
+    title = limpiar_titulo(datos.get('titulo') or '', url)
+    
+    precio_contado = "No especificado"
+    if datos.get('contado'):
+        precio_contado = detect_monthly_price(datos['contado'].strip(), seller_name)
+    precio_financiado = "No especificado"
+    if datos.get('financiado'):
+        precio_financiado = detect_monthly_price(datos['financiado'].strip(), seller_name)
+    
+    if precio_contado == "No especificado":
+        precio_contado = primer_precio(datos.get('contado_css') or [], seller_name)
+    if precio_financiado == "No especificado":
+        precio_financiado = primer_precio(datos.get('financiado_css') or [], seller_name)
+    if precio_contado == "No especificado":
+        precio_contado = precio_mas_alto(datos.get('textos_euro') or [], seller_name)
+    
+    attributes = clasificar_atributos(datos.get('atributos') or [])
+    main_data = datos_principales(datos.get('km'), datos.get('anio'), datos.get('marca'),
+                                  lambda: datos.get('html') or "")
+    return title, precio_contado, precio_financiado, attributes, main_data
+
+def extraer_ficha_selenium(driver, url, seller_name, espera_precios=5):
+    """Extraccion de la ficha con comandos Selenium (un comando WebDriver por elemento)"""
+    # TITULO - MULTIPLES ESTRATEGIAS CON ESPERA OPTIMIZADA
+    title = ""
+    for selector in SELECTORES_FICHA["titulo"]:
+        try:
+            element = WebDriverWait(driver, 2).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+            )
+            if element.text.strip():
+                title = element.text.strip()
+                break
+        except:
+            continue
+    
+    title = limpiar_titulo(title, url)
+    
+    # PRECIOS - EXTRACCION CORREGIDA
+    precio_contado = "No especificado"
+    precio_financiado = "No especificado"
+    
+    # ESPERAR A QUE CARGUEN LOS PRECIOS
+    try:
+        WebDriverWait(driver, espera_precios).until(
+            EC.presence_of_element_located((By.XPATH, SELECTORES_FICHA["xpath_euros"]))
+        )
+    except:
+        pass
+    
+    # 1. BUSCAR PRECIO AL CONTADO POR ETIQUETA
+    try:
+        contado_elements = driver.find_elements(By.XPATH, SELECTORES_FICHA["xpath_contado"])
+        if contado_elements:
+            raw_price = contado_elements[0].text.strip()
+            precio_contado = detect_monthly_price(raw_price, seller_name)
+    except:
+        pass
+    
+    # 2. BUSCAR PRECIO FINANCIADO POR ETIQUETA
+    try:
+        financiado_elements = driver.find_elements(By.XPATH, SELECTORES_FICHA["xpath_financiado"])
+        if financiado_elements:
+            raw_price = financiado_elements[0].text.strip()
+            precio_financiado = detect_monthly_price(raw_price, seller_name)
+    except:
+        pass
+    
+    # 3. FALLBACK: USAR SELECTORES CSS ESPECÍFICOS
+    if precio_contado == "No especificado":
+        for selector in SELECTORES_FICHA["css_contado"]:
+            try:
+                textos = [element.text for element in driver.find_elements(By.CSS_SELECTOR, selector)]
+                precio_contado = primer_precio(textos, seller_name)
+                if precio_contado != "No especificado":
+                    break
             except:
-                pass
-        
-        # CARACTERISTICAS - SELECTOR VERIFICADO
-        attributes = extract_car_attributes(driver)
-        
-        # DATOS ADICIONALES DEL HTML
-        main_data = extract_main_car_info_from_html(driver)
+                continue
+    
+    if precio_financiado == "No especificado":
+        for selector in SELECTORES_FICHA["css_financiado"]:
+            try:
+                textos = [element.text for element in driver.find_elements(By.CSS_SELECTOR, selector)]
+                precio_financiado = primer_precio(textos, seller_name)
+                if precio_financiado != "No especificado":
+                    break
+            except:
+                continue
+    
+    # 4. ÚLTIMO FALLBACK: BUSCAR CUALQUIER PRECIO
+    if precio_contado == "No especificado":
+        try:
+            price_elements = driver.find_elements(By.XPATH, SELECTORES_FICHA["xpath_euros"])
+            textos = []
+            for elem in price_elements[:SELECTORES_FICHA["max_textos_euro"]]:
+                try:
+                    textos.append(elem.text)
+                except:
+                    continue
+            precio_contado = precio_mas_alto(textos, seller_name)
+        except:
+            pass
+    
+    # CARACTERISTICAS - SELECTOR VERIFICADO
+    attributes = extract_car_attributes(driver)
+    
+    # DATOS ADICIONALES DEL HTML
+    main_data = extract_main_car_info_from_html(driver)
+    return title, precio_contado, precio_financiado, attributes, main_data
+
+def cargar_pagina(driver, url, perfiles, seller_name, tipo):
+    """driver.get registrando la latencia en los perfiles (un timeout se registra marcado)"""
+    inicio = time.time()
+    try:
+        driver.get(url)
+    except TimeoutException:
+        if perfiles:
+            perfiles.registrar(seller_name, tipo, perfiles.timeout(seller_name, tipo), agotado=True)
+        raise
+    if perfiles:
+        perfiles.registrar(seller_name, tipo, time.time() - inicio)
+
+def extract_car_data(driver, url, seller_name, perfiles=None):
+    """Extrae datos del coche - VERSION FINAL SIN DEBUG"""
+    try:
+        cargar_pagina(driver, url, perfiles, seller_name, 'ficha')
+        
+        # El script JS espera en la pagina al titulo y los precios: sin pausa fija
+        espera_render = perfiles.timeout(seller_name, 'render') if perfiles else TIMEOUTS_POR_DEFECTO['render']
+        datos = recoger_datos_js(driver, SELECTORES_FICHA, int(espera_render * 1000)) if EXTRACCION_JS else None
+        if datos is not None:
+            if perfiles and datos.get('espera_ms') is not None:
+                perfiles.registrar(seller_name, 'render', datos['espera_ms'] / 1000, agotado=datos.get('agotado', False))
+            title, precio_contado, precio_financiado, attributes, main_data = procesar_datos_js(datos, url, seller_name)
+        else:
+            # Con Selenium (o si el script falla) se mantiene la pausa de render de siempre;
+            # la espera de precios es el doble de la de render (5 s por defecto)
+            time.sleep(1.5)
+            title, precio_contado, precio_financiado, attributes, main_data = extraer_ficha_selenium(
+                driver, url, seller_name, espera_precios=2 * espera_render)
         
         # EXTRAER MARCA Y MODELO COMPLETO DEL TITULO
         marca, modelo_completo = extract_brand_and_full_model_from_title(title)
@@ -401,114 +517,126 @@ def extract_car_data(driver, url, seller_name):
         print(f"ERROR en {url}: {str(e)}")
         return None
 
+def clasificar_atributos(textos):
+    """Clasifica los textos de los spans de atributos (plazas, puertas, combustible...)"""
+    attributes = {}
+    for text in textos:
+        text = text.strip()
+        text_lower = text.lower()
+        
+        # CLASIFICAR ATRIBUTOS
+        if "plazas" in text_lower:
+            attributes["plazas"] = text
+        elif "puertas" in text_lower:
+            attributes["puertas"] = text
+        elif any(word in text_lower for word in ["gasolina", "diésel", "diesel", "eléctrico", "electrico", "híbrido", "hibrido", "gas", "gnc", "glp", "etanol"]):
+            attributes["combustible"] = text
+        elif "caballos" in text_lower or "cv" in text_lower:
+            attributes["potencia"] = text
+        elif any(word in text_lower for word in ["manual", "automático", "automatico", "automática", "automatica"]):
+            attributes["conduccion"] = text
+        elif any(word in text_lower for word in ["pequeño", "grande", "mediano", "familiar", "monovolumen", "todoterreno", "furgoneta", "4x4", "suv", "berlina", "deportivo", "coupé", "coupe", "cabrio", "descapotable", "sedán", "sédan", "compacto", "utilitario"]):
+            attributes["tipo"] = text
+    return attributes
+
 def extract_car_attributes(driver):
     """Extrae atributos usando selector verificado"""
-    attributes = {}
-    
     try:
-        attribute_elements = driver.find_elements(By.CSS_SELECTOR, "span.item-detail-attributes-info_AttributesInfo__measure__O9xR3")
-        
-        for element in attribute_elements:
-            text = element.text.strip()
-            text_lower = text.lower()
-            
-            # CLASIFICAR ATRIBUTOS
-            if "plazas" in text_lower:
-                attributes["plazas"] = text
-            elif "puertas" in text_lower:
-                attributes["puertas"] = text
-            elif any(word in text_lower for word in ["gasolina", "diésel", "diesel", "eléctrico", "electrico", "híbrido", "hibrido", "gas", "gnc", "glp", "etanol"]):
-                attributes["combustible"] = text
-            elif "caballos" in text_lower or "cv" in text_lower:
-                attributes["potencia"] = text
-            elif any(word in text_lower for word in ["manual", "automático", "automatico", "automática", "automatica"]):
-                attributes["conduccion"] = text
-            elif any(word in text_lower for word in ["pequeño", "grande", "mediano", "familiar", "monovolumen", "todoterreno", "furgoneta", "4x4", "suv", "berlina", "deportivo", "coupé", "coupe", "cabrio", "descapotable", "sedán", "sédan", "compacto", "utilitario"]):
-                attributes["tipo"] = text
-                
-        return attributes
-        
+        attribute_elements = driver.find_elements(By.CSS_SELECTOR, SELECTORES_FICHA["css_atributos"])
+        return clasificar_atributos([element.text for element in attribute_elements])
     except:
         return {}
 
-def extract_main_car_info_from_html(driver):
-    """Extrae datos adicionales del HTML completo de la pagina - CORREGIDO CON ACENTOS"""
+def datos_principales(km_text, year_text, marca_text, obtener_html):
+    """
+    KM, año y marca a partir de los pares etiqueta/valor de la ficha
+    
+    Args:
+        km_text, year_text, marca_text: Texto del valor (None si no hay etiqueta)
+        obtener_html: Funcion que devuelve el HTML de la pagina (fallback por regex)
+    """
     main_data = {}
     
-    try:
-        # EXTRAER KILOMETROS CON SELECTOR ESPECIFICO - CORREGIDO CON ACENTO
+    # KILOMETROS - si no hay etiqueta, buscar en el HTML
+    if km_text is not None:
+        km_text = km_text.strip()
+        if km_text and km_text.replace('.', '').replace(',', '').replace(' ', '').isdigit():
+            km_clean = km_text.replace('.', '').replace(',', '').replace(' ', '')
+            km_value = int(km_clean)
+            main_data["km"] = format_kilometers(str(km_value))
+    else:
         try:
-            km_section = driver.find_element(By.XPATH, "//span[text()='Kilómetros']/following-sibling::span")
-            km_text = km_section.text.strip()
-            if km_text and km_text.replace('.', '').replace(',', '').replace(' ', '').isdigit():
-                km_clean = km_text.replace('.', '').replace(',', '').replace(' ', '')
-                km_value = int(km_clean)
-                main_data["km"] = format_kilometers(str(km_value))
+            html_content = obtener_html()
+            km_patterns = [
+                r'Kilómetros["\s:>]*</span><span[^>]*>(\d+(?:[\.\s]\d+)*)</span>',
+                r'kilómetros["\s:>]*</span><span[^>]*>(\d+(?:[\.\s]\d+)*)</span>',
+                r'>(\d{4,7})\s*km',
+                r'(\d{4,7})\s*kilómetros'
+            ]
+            
+            for pattern in km_patterns:
+                matches = re.findall(pattern, html_content, re.IGNORECASE)
+                for match in matches:
+                    try:
+                        km_clean = match.replace('.', '').replace(',', '').replace(' ', '')
+                        km_value = int(km_clean)
+                        if 100 <= km_value <= 999999:  # Rango ampliado
+                            main_data["km"] = format_kilometers(str(km_value))
+                            break
+                    except:
+                        continue
+                if "km" in main_data:
+                    break
         except:
-            # Fallback optimizado: buscar en HTML de forma mas eficiente
-            try:
-                html_content = driver.page_source
-                km_patterns = [
-                    r'Kilómetros["\s:>]*</span><span[^>]*>(\d+(?:[\.\s]\d+)*)</span>',
-                    r'kilómetros["\s:>]*</span><span[^>]*>(\d+(?:[\.\s]\d+)*)</span>',
-                    r'>(\d{4,7})\s*km',
-                    r'(\d{4,7})\s*kilómetros'
-                ]
-                
-                for pattern in km_patterns:
-                    matches = re.findall(pattern, html_content, re.IGNORECASE)
-                    for match in matches:
-                        try:
-                            km_clean = match.replace('.', '').replace(',', '').replace(' ', '')
-                            km_value = int(km_clean)
-                            if 100 <= km_value <= 999999:  # Rango ampliado
-                                main_data["km"] = format_kilometers(str(km_value))
-                                break
-                        except:
-                            continue
-                    if "km" in main_data:
-                        break
-            except:
-                pass
-        
-        # EXTRAER AÑO - CORREGIDO CON ACENTO
+            pass
+    
+    # AÑO - si no hay etiqueta, buscar en el HTML
+    if year_text is not None:
+        year_text = year_text.strip()
+        if year_text.isdigit() and 1990 <= int(year_text) <= 2025:
+            main_data["año"] = year_text
+    else:
         try:
-            year_section = driver.find_element(By.XPATH, "//span[text()='Año']/following-sibling::span")
-            year_text = year_section.text.strip()
-            if year_text.isdigit() and 1990 <= int(year_text) <= 2025:
-                main_data["año"] = year_text
-        except:
-            # Fallback mas rapido
-            try:
-                html_content = driver.page_source
-                year_patterns = [
-                    r'Año["\s:>]*</span><span[^>]*>(\d{4})</span>',
-                    r'año["\s:>]*</span><span[^>]*>(\d{4})</span>'
-                ]
-                
-                for pattern in year_patterns:
-                    matches = re.findall(pattern, html_content, re.IGNORECASE)
-                    for match in matches:
-                        year = int(match)
-                        if 1990 <= year <= 2025:
-                            main_data["año"] = str(year)
-                            break
-                    if "año" in main_data:
+            html_content = obtener_html()
+            year_patterns = [
+                r'Año["\s:>]*</span><span[^>]*>(\d{4})</span>',
+                r'año["\s:>]*</span><span[^>]*>(\d{4})</span>'
+            ]
+            
+            for pattern in year_patterns:
+                matches = re.findall(pattern, html_content, re.IGNORECASE)
+                for match in matches:
+                    year = int(match)
+                    if 1990 <= year <= 2025:
+                        main_data["año"] = str(year)
                         break
-            except:
-                pass
-        
-        # EXTRAER MARCA DEL HTML - OPTIMIZADO
-        try:
-            marca_section = driver.find_element(By.XPATH, "//span[text()='Marca']/following-sibling::*")
-            marca_text = marca_section.text.strip()
-            if marca_text and len(marca_text) > 1:
-                main_data["marca"] = marca_text.title()
+                if "año" in main_data:
+                    break
         except:
             pass
-        
-        return main_data
-        
+    
+    # MARCA
+    if marca_text is not None:
+        marca_text = marca_text.strip()
+        if marca_text and len(marca_text) > 1:
+            main_data["marca"] = marca_text.title()
+    
+    return main_data
+
+def _texto_xpath(driver, xpath):
+    """Texto del primer elemento del XPath (None si no existe)"""
+    try:
+        return driver.find_element(By.XPATH, xpath).text
+    except:
+        return None
+
+def extract_main_car_info_from_html(driver):
+    """Extrae datos adicionales del HTML completo de la pagina - CORREGIDO CON ACENTOS"""
+    try:
+        return datos_principales(_texto_xpath(driver, SELECTORES_FICHA["xpath_km"]),
+                                 _texto_xpath(driver, SELECTORES_FICHA["xpath_anio"]),
+                                 _texto_xpath(driver, SELECTORES_FICHA["xpath_marca"]),
+                                 lambda: driver.page_source)
     except:
         return {}
 
@@ -728,174 +856,88 @@ def format_power(power_text):
         pass
     return str(power_text)
 
-def find_and_click_load_more_button(driver):
-    """Busca y hace clic en el botón 'Ver más productos' - SELECTORES CORREGIDOS PARA WEB COMPONENTS"""
-    try:
-        # Scroll más eficiente con tiempo suficiente
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2.0)  # Tiempo aumentado
-        
-        # NUEVOS SELECTORES BASADOS EN HTML REAL DE WALLAPOP
-        button_selectors = [
-            # Web component selector - el más probable
-            'walla-button[text="Ver más productos"]',
-            # Button interno del web component
-            'button.walla-button__button--primary',
-            # Por clase CSS específica
-            '.walla-button__button--primary',
-            # XPath por span interno con texto
-            '//span[text()="Ver más productos"]/ancestor::button',
-            # XPath por walla-button con atributo text
-            '//walla-button[@text="Ver más productos"]',
-            # XPath por contenido de texto en cualquier parte
-            '//*[contains(text(), "Ver más productos")]',
-            # Fallback genérico por clase
-            '//button[contains(@class, "walla-button__button")]',
-            # Selector por div contenedor
-            '.d-flex.justify-content-center button',
-            # XPath más genérico
-            '//button[contains(text(), "Ver más")]'
-        ]
-        
-        for selector in button_selectors:
-            try:
-                if selector.startswith("//") or selector.startswith("//*"):
-                    buttons = driver.find_elements(By.XPATH, selector)
-                else:
-                    buttons = driver.find_elements(By.CSS_SELECTOR, selector)
-                
-                for button in buttons:
-                    try:
-                        # Verificar que el botón esté visible y habilitado
-                        if button.is_displayed() and button.is_enabled():
-                            # Obtener texto del botón de múltiples formas
-                            button_text = (
-                                button.get_attribute('text') or 
-                                button.text or 
-                                button.get_attribute('aria-label') or 
-                                ""
-                            ).lower()
-                            
-                            # Verificar que contiene el texto esperado
-                            if any(phrase in button_text for phrase in ['ver más productos', 'ver más', 'más productos']):
-                                # Scroll al botón primero
-                                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
-                                time.sleep(1.0)
-                                
-                                # Intentar click normal primero
-                                try:
-                                    button.click()
-                                    time.sleep(3.0)  # Tiempo aumentado para cargar contenido
-                                    return True
-                                except:
-                                    # Si falla, usar JavaScript click
-                                    try:
-                                        driver.execute_script("arguments[0].click();", button)
-                                        time.sleep(3.0)
-                                        return True
-                                    except:
-                                        # Si también falla, intentar click en elemento padre
-                                        try:
-                                            parent = button.find_element(By.XPATH, '..')
-                                            parent.click()
-                                            time.sleep(3.0)
-                                            return True
-                                        except:
-                                            continue
-                    except Exception as e:
-                        continue
-            except Exception as e:
-                continue
-        
-        return False
-    except Exception as e:
-        print(f"Error en find_and_click_load_more_button: {e}")
-        return False
-
-def get_seller_cars(driver, seller_url, seller_name):
-    """Extrae coches del vendedor - VERSION OPTIMIZADA"""
+def get_seller_cars(driver, seller_url, seller_name, perfiles=None, estadisticas=None, perfilador=None,
+                    duplicados=None):
+    """
+    Extrae coches del vendedor - VERSION OPTIMIZADA
+    
+    Args:
+        perfiles: PerfilesTimeout con los timeouts aprendidos (None = valores fijos)
+        estadisticas: dict que se rellena con anuncios, fallos, pulsaciones y reutilizados (telemetria)
+        perfilador: Perfilador de la ejecucion (fases 'vendedores' y 'extraccion'; None = sin perfilado)
+        duplicados: IndiceDuplicados; con DUPLICADOS_OMITIR se reutiliza el registro de los duplicados conocidos
+    """
     print(f"\n{'=' * 60}")
     print(f"PROCESANDO VENDEDOR: {seller_name}")
     print(f"{'=' * 60}")
     
     cars_data = []
+    if estadisticas is None:
+        estadisticas = {}
+    estadisticas.update(anuncios=0, fallos=0, pulsaciones=0, reutilizados=0)
     
     try:
-        driver.get(seller_url)
-        time.sleep(0.8)
-        
-        # SCROLL INICIAL OPTIMIZADO
-        print("Cargando pagina inicial...")
-        for i in range(2):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(0.1)
-        
-        initial_links = len(driver.find_elements(By.XPATH, "//a[contains(@href, '/item/')]"))
-        print(f"Anuncios iniciales encontrados: {initial_links}")
-        
-        # CARGAR MAS ANUNCIOS - TIMING CORREGIDO PARA CARGAR TODOS
-        total_buttons_clicked = 0
-        consecutive_no_increase = 0
-        print("Buscando mas anuncios...")
+        with fase(perfilador, 'vendedores'):
+            # TIMEOUTS DEL VENDEDOR (aprendidos de ejecuciones anteriores o valores por defecto)
+            if perfiles:
+                driver.set_page_load_timeout(perfiles.timeout(seller_name, 'vendedor'))
+                driver.set_script_timeout(perfiles.timeout(seller_name, 'render') + 1)
+        
+            cargar_pagina(driver, seller_url, perfiles, seller_name, 'vendedor')
+            time.sleep(0.8)
+        
+            # SCROLL INICIAL OPTIMIZADO
+            print("Cargando pagina inicial...")
+            for i in range(2):
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                time.sleep(0.1)
         
-        for attempt in range(50):
-            links_before = len(driver.find_elements(By.XPATH, "//a[contains(@href, '/item/')]"))
-            button_found = find_and_click_load_more_button(driver)
-            
-            if button_found:
-                total_buttons_clicked += 1
-                print(f"Boton 'Ver mas' #{total_buttons_clicked} clickeado")
-                time.sleep(1.2)
-                
-                # Scroll adicional para forzar carga
-                for i in range(3):
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(0.2)
-                
-                links_after = len(driver.find_elements(By.XPATH, "//a[contains(@href, '/item/')]"))
-                print(f"Anuncios despues del boton: {links_after}")
-                
-                if links_after <= links_before:
-                    consecutive_no_increase += 1
-                    print(f"Sin nuevos anuncios (intento {consecutive_no_increase}/3)")
-                    if consecutive_no_increase >= 3:
-                        print("No se encontraron mas anuncios despues de varios intentos")
-                        break
-                else:
-                    consecutive_no_increase = 0
-                    
+            # Enlaces unicos en orden de aparicion; cada llamada solo devuelve los nuevos
+            recolector = RecolectorEnlaces(driver)
+            recolector.nuevos()
+            print(f"Anuncios iniciales encontrados: {len(recolector)}")
+        
+            # CARGAR MAS ANUNCIOS - OBSERVER EN LA PAGINA, SIN ESPERAS FIJAS
+            print("Buscando mas anuncios...")
+            if perfiles:
+                pulsaciones = paginar_ver_mas(
+                    driver, recolector, espera_tarjetas_ms=int(perfiles.timeout(seller_name, 'tarjetas') * 1000),
+                    registrar_espera=lambda segundos, agotado: perfiles.registrar(seller_name, 'tarjetas',
+                                                                                  segundos, agotado))
             else:
-                print("No se encontro boton 'Ver mas'")
-                break
-        
-        # SCROLL FINAL OPTIMIZADO
-        print("Scroll final para cargar todos los anuncios...")
-        for i in range(3):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(0.05)
+                pulsaciones = paginar_ver_mas(driver, recolector)
+            estadisticas['pulsaciones'] = pulsaciones
         
-        # EXTRAER ENLACES
-        car_links = []
-        links = driver.find_elements(By.XPATH, "//a[contains(@href, '/item/')]")
-        for link in links:
-            href = link.get_attribute('href')
-            if href and '/item/' in href:
-                car_links.append(href)
-        
-        car_links = list(set(car_links))  # Eliminar duplicados
+            # EXTRAER ENLACES (URL canonica: sin query ni barra final, sin duplicados, en orden de la pagina)
+            recolector.nuevos()
+            car_links = list(recolector.enlaces)
+            estadisticas['anuncios'] = len(car_links)
         
         print(f"TOTAL ANUNCIOS UNICOS ENCONTRADOS: {len(car_links)}")
         print("Iniciando extraccion de datos...")
         
         # PROCESAR CADA ANUNCIO
+        if perfiles:
+            driver.set_page_load_timeout(perfiles.timeout(seller_name, 'ficha'))
         if car_links:
             progress_bar = tqdm(car_links, desc=f"Extrayendo {seller_name}", colour="green", leave=False)
-            for idx, car_url in enumerate(progress_bar):
-                progress_bar.set_description(f"Extrayendo {seller_name} ({idx+1}/{len(car_links)})")
-                car_data = extract_car_data(driver, car_url, seller_name)
-                if car_data:
-                    cars_data.append(car_data)
-                time.sleep(0.1)
+            with fase(perfilador, 'extraccion'):
+                for idx, car_url in enumerate(progress_bar):
+                    progress_bar.set_description(f"Extrayendo {seller_name} ({idx+1}/{len(car_links)})")
+                    # Mismo coche ya extraido de otro vendedor en una ejecucion reciente: sin abrir la ficha
+                    registro = duplicados.registro_conocido(car_url, seller_name) if duplicados else None
+                    if registro:
+                        cars_data.append(registro)
+                        estadisticas['reutilizados'] += 1
+                        continue
+                    car_data = extract_car_data(driver, car_url, seller_name, perfiles)
+                    if car_data:
+                        cars_data.append(car_data)
+                        if duplicados:
+                            duplicados.observar(car_data)
+                    else:
+                        estadisticas['fallos'] += 1
+                    time.sleep(0.1)
         
         print(f"\n{'=' * 60}")
         print(f"VENDEDOR COMPLETADO: {seller_name}")
@@ -908,8 +950,14 @@ def get_seller_cars(driver, seller_url, seller_name):
         print(f"ERROR en {seller_name}: {str(e)}")
         return cars_data
 
-def main():
-    """Funcion principal - OPTIMIZADA CON GOOGLE SHEETS"""
+def main(sellers=None):
+    """
+    Funcion principal - OPTIMIZADA CON GOOGLE SHEETS (sellers=None: vendedores de la configuracion)
+
+    Returns:
+        True si se extrajeron coches y se subieron (o Sheets no esta configurado), False si no
+    """
+    exito = False
     try:
         os.system('cls' if os.name == 'nt' else 'clear')
         print("=" * 70)
@@ -919,31 +967,51 @@ def main():
         
         # Obtener vendedores desde configuracion
         test_mode = os.getenv('TEST_MODE', 'false').lower() == 'true'
-        sellers = get_sellers(test_mode=test_mode)
+        if sellers is None:
+            sellers = get_sellers(test_mode=test_mode)
         
         print(f"MODO: {'Testing' if test_mode else 'Produccion'}")
         print(f"VENDEDORES: {len(sellers)} configurados")
         
-        driver = setup_browser()
-        
-        # Aceptar cookies optimizado
-        try:
-            driver.get("https://es.wallapop.com")
-            time.sleep(1.5)
-            cookie_button = WebDriverWait(driver, 3).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Aceptar')]"))
-            )
-            cookie_button.click()
-            time.sleep(0.5)
-        except:
-            pass
+        perfil = PerfilNavegador.desde_entorno()
+        perfiles = PerfilesTimeout.desde_entorno()
+        telemetria = TelemetriaScraper.desde_entorno()
+        perfilador = Perfilador.desde_entorno('scraper')
+        duplicados = IndiceDuplicados.desde_entorno()
+        if telemetria:
+            ejecucion = telemetria.iniciar_ejecucion(os.getenv('VENDOR_GROUP', 'todos'),
+                                                     'test' if test_mode else 'produccion',
+                                                     'js' if EXTRACCION_JS else 'selenium')
+        with fase(perfilador, 'navegador'):
+            inicio = time.time()
+            driver = setup_browser(perfil)
+            segundos_chrome = time.time() - inicio
+            
+            inicio = time.time()
+            try:
+                driver.get("https://es.wallapop.com")
+            except Exception:
+                pass
+            mostrar_tiempos_arranque(perfil, segundos_chrome, time.time() - inicio)
+            aceptar_cookies(driver, perfil)
         
         all_cars_data = []
         
         # PROCESAR VENDEDORES
         for seller_name, seller_url in sellers.items():
             try:
-                seller_cars = get_seller_cars(driver, seller_url, seller_name)
+                inicio_vendedor = time.time()
+                estadisticas = {}
+                seller_cars = get_seller_cars(driver, seller_url, seller_name, perfiles, estadisticas, perfilador,
+                                              duplicados)
+                if telemetria:
+                    # Los duplicados reutilizados no se han extraido: fuera de anuncios, coches y coches/min
+                    extraidos = ([coche for coche in seller_cars if coche['URL'] not in duplicados.reutilizados]
+                                 if estadisticas['reutilizados'] else seller_cars)
+                    telemetria.registrar_vendedor(ejecucion, seller_name,
+                                                  estadisticas['anuncios'] - estadisticas['reutilizados'], extraidos,
+                                                  estadisticas['fallos'], time.time() - inicio_vendedor,
+                                                  estadisticas['pulsaciones'])
                 all_cars_data.extend(seller_cars)
                 time.sleep(0.5)
             except Exception as e:
@@ -964,37 +1032,44 @@ def main():
             print(f"Precios al contado extraidos: {len(precios_contado_validos)}/{len(all_cars_data)} ({len(precios_contado_validos)/len(all_cars_data)*100:.1f}%)")
             print(f"Precios financiados extraidos: {len(precios_financiado_validos)}/{len(all_cars_data)} ({len(precios_financiado_validos)/len(all_cars_data)*100:.1f}%)")
             
+            if duplicados:
+                duplicados.mostrar_resumen(duplicados.actualizar(all_cars_data), len(all_cars_data))
+            
+            if perfiles:
+                perfiles.mostrar_resumen(list(sellers))
+            
             print("Generando archivo Excel...")
             
-            os.makedirs("../resultados", exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-            filename = f"../resultados/coches_vendedores_AUTO_{timestamp}.xlsx"
+            with fase(perfilador, 'exportacion'):
+                os.makedirs("../resultados", exist_ok=True)
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+                filename = f"../resultados/coches_vendedores_AUTO_{timestamp}.xlsx"
             
-            df = pd.DataFrame(all_cars_data)
-            df_sorted = df.sort_values(['Vendedor', 'Marca', 'Modelo'])
+                df = pd.DataFrame(all_cars_data)
+                df_sorted = df.sort_values(['Vendedor', 'Marca', 'Modelo'])
             
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                df_sorted.to_excel(writer, sheet_name="Todos_los_Coches", index=False)
+                with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+                    df_sorted.to_excel(writer, sheet_name="Todos_los_Coches", index=False)
                 
-                for seller in df_sorted['Vendedor'].unique():
-                    seller_df = df_sorted[df_sorted['Vendedor'] == seller]
-                    sheet_name = seller.replace('.', '').replace(' ', '_')[:31]
-                    seller_df.to_excel(writer, sheet_name=sheet_name, index=False)
+                    for seller in df_sorted['Vendedor'].unique():
+                        seller_df = df_sorted[df_sorted['Vendedor'] == seller]
+                        sheet_name = seller.replace('.', '').replace(' ', '_')[:31]
+                        seller_df.to_excel(writer, sheet_name=sheet_name, index=False)
                 
-                stats_data = []
-                for seller in df_sorted['Vendedor'].unique():
-                    seller_df = df_sorted[df_sorted['Vendedor'] == seller]
-                    precios_contado_seller = len([p for p in seller_df['Precio al Contado'] if p != 'No especificado'])
-                    stats_data.append({
-                        'Vendedor': seller,
-                        'Total_Coches': len(seller_df),
-                        'Marcas_Diferentes': seller_df['Marca'].nunique(),
-                        'Precios_Extraidos': precios_contado_seller,
-                        'Porcentaje_Precios': f"{precios_contado_seller/len(seller_df)*100:.1f}%"
-                    })
+                    stats_data = []
+                    for seller in df_sorted['Vendedor'].unique():
+                        seller_df = df_sorted[df_sorted['Vendedor'] == seller]
+                        precios_contado_seller = len([p for p in seller_df['Precio al Contado'] if p != 'No especificado'])
+                        stats_data.append({
+                            'Vendedor': seller,
+                            'Total_Coches': len(seller_df),
+                            'Marcas_Diferentes': seller_df['Marca'].nunique(),
+                            'Precios_Extraidos': precios_contado_seller,
+                            'Porcentaje_Precios': f"{precios_contado_seller/len(seller_df)*100:.1f}%"
+                        })
                 
-                stats_df = pd.DataFrame(stats_data)
-                stats_df.to_excel(writer, sheet_name="Estadisticas", index=False)
+                    stats_df = pd.DataFrame(stats_data)
+                    stats_df.to_excel(writer, sheet_name="Estadisticas", index=False)
             
             print(f"Excel generado exitosamente: {filename}")
             
@@ -1002,26 +1077,55 @@ def main():
             sheets_uploader = setup_google_sheets()
             if sheets_uploader:
                 print("\nSUBIENDO A GOOGLE SHEETS...")
-                success = sheets_uploader.upload_by_seller(df_sorted)
+                with fase(perfilador, 'subida'):
+                    success = sheets_uploader.upload_by_seller(df_sorted)
                 if success:
                     print("EXITO: Datos subidos automaticamente a Google Sheets")
                 else:
                     print("ERROR: Fallo al subir a Google Sheets")
+                exito = bool(success)
             else:
                 print("\nAVISO: Google Sheets no configurado - solo Excel local")
+                exito = True
             
             print(f"{'=' * 70}")
+        else:
+            print("\nERROR: No se extrajo ningun coche")
         
     except KeyboardInterrupt:
         print("\nInterrumpido por usuario")
     except Exception as e:
         print(f"\nERROR critico: {str(e)}")
     finally:
+        if locals().get('perfilador'):
+            try:
+                perfilador.guardar()
+            except Exception as e:
+                print(f"AVISO: No se pudieron guardar los perfiles: {e}")
+        if locals().get('telemetria'):
+            try:
+                telemetria.cerrar_ejecucion(ejecucion)
+                for nombre, por_minuto, mediana in telemetria.ralentizaciones(ejecucion):
+                    print(f"AVISO: {nombre} mas lento de lo habitual: {por_minuto:.1f} coches/min (mediana {mediana:.1f})")
+                telemetria.cerrar()
+            except Exception as e:
+                print(f"AVISO: No se pudo cerrar la telemetria: {e}")
+        if locals().get('duplicados'):
+            try:
+                duplicados.guardar()
+            except Exception as e:
+                print(f"AVISO: No se pudo guardar el indice de duplicados: {e}")
+        if locals().get('perfiles'):
+            try:
+                perfiles.guardar()
+            except Exception as e:
+                print(f"AVISO: No se pudieron guardar los perfiles de timeout: {e}")
         if 'driver' in locals():
             try:
                 driver.quit()
             except:
                 pass
+    return exito
 
 if __name__ == "__main__":
     main()
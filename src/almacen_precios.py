@@ -0,0 +1,293 @@
+"""
+===============================================================================
+             ALMACEN DE PRECIOS · EVENTOS EN FORMATO LARGO
+===============================================================================
+
+Descripción:
+    Almacén de precios en formato largo (ID_Unico_Coche, Fecha, Precio) que
+    acompaña a Data_Historico. Solo se guarda un evento cuando el precio de
+    un coche cambia (o cuando aparece/desaparece), en lugar de una columna
+    Precio_dd/mm/yyyy por día para todos los coches. La vista ancha se
+    reconstruye bajo demanda para cualquier ventana de fechas.
+
+Funcionalidades principales:
+    • Registro de un snapshot diario guardando solo los cambios.
+    • Migración inicial desde las columnas Precio_ de Data_Historico.
+    • Pivot a la vista ancha (Precio_dd/mm/yyyy) para una ventana de fechas.
+    • Persistencia append-only en la hoja Data_Precios_Eventos.
+
+Semántica:
+    El precio de un coche en una fecha es el del último evento anterior o
+    igual a esa fecha. Un evento con Precio vacío ('') significa que el
+    coche no estaba publicado (aún no detectado o vendido). Cada ejecución
+    deja además un evento marcador (ID_EJECUCION) para saber qué fechas
+    forman columnas en la vista ancha.
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+from datetime import datetime
+
+import gspread
+import numpy as np
+import pandas as pd
+
+HOJA_EVENTOS = "Data_Precios_Eventos"
+COLUMNAS_EVENTOS = ['ID_Unico_Coche', 'Fecha', 'Precio']
+ID_EJECUCION = '__EJECUCION__'
+FORMATO_FECHA = "%d/%m/%Y"
+
+def _normalizar_precio(valor):
+    """Texto canonico de un precio: NaN/None -> '', 12500.0 -> '12500'"""
+    if valor is None:
+        return ''
+    if isinstance(valor, float):
+        if valor != valor or valor in (float('inf'), float('-inf')):
+            return ''
+        if valor.is_integer():
+            return str(int(valor))
+    return str(valor)
+
+def _normalizar_precios(serie):
+    """Version vectorizada de _normalizar_precio: solo se convierten los valores distintos"""
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    textos = np.array([_normalizar_precio(valor) for valor in unicos] + [''], dtype=object)
+    return pd.Series(textos[codigos], index=serie.index, dtype=object)
+
+def _a_fecha(fecha):
+    """Acepta 'dd/mm/yyyy', datetime o Timestamp y devuelve un Timestamp sin hora"""
+    if isinstance(fecha, str):
+        fecha = datetime.strptime(fecha.split(' ')[0], FORMATO_FECHA)
+    return pd.Timestamp(fecha).normalize()
+
+class AlmacenEventosPrecio:
+    def __init__(self, eventos=None):
+        """
+        Args:
+            eventos: DataFrame con columnas ID_Unico_Coche, Fecha (datetime) y Precio (texto)
+        """
+        if eventos is None:
+            eventos = pd.DataFrame({
+                'ID_Unico_Coche': pd.Series(dtype=object),
+                'Fecha': pd.Series(dtype='datetime64[ns]'),
+                'Precio': pd.Series(dtype=object)
+            })
+        self.eventos = eventos[COLUMNAS_EVENTOS].reset_index(drop=True)
+        self.hoja_existe = False
+
+        # Eventos aun no persistidos en la hoja
+        self._pendientes = len(self.eventos)
+        # Tras renombrar IDs la hoja no admite append: se reescribe entera
+        self._reescribir = False
+
+    @property
+    def vacio(self):
+        return self.eventos.empty
+
+    def fechas_ejecucion(self, fecha_inicio=None, fecha_fin=None):
+        """Fechas con snapshot registrado (columnas de la vista ancha), ordenadas"""
+        fechas = self.eventos.loc[self.eventos['ID_Unico_Coche'] == ID_EJECUCION, 'Fecha']
+        if fecha_inicio is not None:
+            fechas = fechas[fechas >= _a_fecha(fecha_inicio)]
+        if fecha_fin is not None:
+            fechas = fechas[fechas <= _a_fecha(fecha_fin)]
+        return list(pd.DatetimeIndex(fechas.unique()).sort_values())
+
+    def ultimos_precios(self, hasta=None):
+        """Ultimo precio conocido de cada coche (opcionalmente hasta una fecha incluida)"""
+        eventos = self.eventos[self.eventos['ID_Unico_Coche'] != ID_EJECUCION]
+        if hasta is not None:
+            eventos = eventos[eventos['Fecha'] <= _a_fecha(hasta)]
+        eventos = eventos.sort_values('Fecha', kind='stable')
+        return eventos.drop_duplicates('ID_Unico_Coche', keep='last').set_index('ID_Unico_Coche')['Precio']
+
+    def registrar_snapshot(self, fecha, precios):
+        """
+        Registra los precios observados en una fecha guardando solo los cambios
+
+        Los snapshots deben registrarse en orden cronologico. Los coches que ya
+        estaban en el almacen y no aparecen en `precios` pasan a ''.
+
+        Args:
+            fecha: Fecha del snapshot ('dd/mm/yyyy' o datetime)
+            precios: Serie indexada por ID_Unico_Coche con el precio de ese dia
+
+        Returns:
+            DataFrame con los eventos anadidos
+        """
+        fecha = _a_fecha(fecha)
+        precios = _normalizar_precios(precios)
+        precios = precios[~precios.index.duplicated(keep='first')]
+
+        ultimos = self.ultimos_precios(hasta=fecha)
+        todos = precios.index.union(ultimos.index)
+        nuevos = precios.reindex(todos, fill_value='')
+        previos = ultimos.reindex(todos, fill_value='')
+        cambios = nuevos[nuevos != previos]
+
+        eventos_nuevos = pd.DataFrame({
+            'ID_Unico_Coche': cambios.index.astype(object),
+            'Fecha': fecha,
+            'Precio': cambios.values
+        })
+        if fecha not in self.fechas_ejecucion(fecha_inicio=fecha, fecha_fin=fecha):
+            marcador = pd.DataFrame({'ID_Unico_Coche': [ID_EJECUCION], 'Fecha': [fecha], 'Precio': ['']})
+            eventos_nuevos = pd.concat([marcador, eventos_nuevos], ignore_index=True)
+
+        self.eventos = pd.concat([self.eventos, eventos_nuevos], ignore_index=True)
+        self._pendientes += len(eventos_nuevos)
+        return eventos_nuevos
+
+    def renombrar_ids(self, mapeo):
+        """
+        Cambia ID_Unico_Coche de los eventos segun `mapeo` (antiguo -> nuevo)
+
+        Si dos IDs antiguos pasan a ser el mismo coche se conserva el primer
+        evento de cada fecha. El siguiente guardar() reescribe la hoja.
+
+        Returns:
+            Numero de eventos renombrados
+        """
+        ids = self.eventos['ID_Unico_Coche']
+        renombrar = ids.isin(list(mapeo))
+        if not renombrar.any():
+            return 0
+
+        self.eventos.loc[renombrar, 'ID_Unico_Coche'] = ids[renombrar].map(mapeo)
+        self.eventos = self.eventos.drop_duplicates(['ID_Unico_Coche', 'Fecha'], keep='first').reset_index(drop=True)
+        self._reescribir = True
+        return int(renombrar.sum())
+
+    @classmethod
+    def desde_historico_ancho(cls, df_historico):
+        """
+        Migra las columnas Precio_dd/mm/yyyy de Data_Historico a eventos
+
+        Se queda con el primer registro de cada ID_Unico_Coche y guarda un evento
+        solo cuando el precio difiere del dia anterior.
+        """
+        columnas_precios = []
+        fechas = {}
+        for col in df_historico.columns:
+            if not col.startswith('Precio_') or col.endswith('_Internal'):
+                continue
+            try:
+                fechas[col] = _a_fecha(col.replace('Precio_', ''))
+                columnas_precios.append(col)
+            except ValueError:
+                continue
+
+        df = df_historico.drop_duplicates('ID_Unico_Coche', keep='first')
+        largo = df[['ID_Unico_Coche'] + columnas_precios].melt(
+            id_vars='ID_Unico_Coche', var_name='Columna', value_name='Precio'
+        )
+        largo['Fecha'] = largo['Columna'].map(fechas)
+        largo['Precio'] = _normalizar_precios(largo['Precio'])
+        largo = largo.sort_values(['ID_Unico_Coche', 'Fecha'], kind='stable')
+
+        previo = largo.groupby('ID_Unico_Coche', sort=False)['Precio'].shift(fill_value='')
+        eventos = largo.loc[largo['Precio'] != previo, COLUMNAS_EVENTOS]
+
+        marcadores = pd.DataFrame({
+            'ID_Unico_Coche': ID_EJECUCION,
+            'Fecha': sorted(set(fechas.values())),
+            'Precio': ''
+        })
+        eventos = pd.concat([marcadores, eventos], ignore_index=True)
+        return cls(eventos.sort_values('Fecha', kind='stable'))
+
+    def pivotar(self, fecha_inicio=None, fecha_fin=None, ids=None):
+        """
+        Reconstruye la vista ancha (una columna Precio_dd/mm/yyyy por ejecucion)
+
+        Args:
+            fecha_inicio, fecha_fin: Ventana de fechas incluida (None = sin limite)
+            ids: IDs a devolver (None = todos los que tienen eventos)
+
+        Returns:
+            DataFrame indexado por ID_Unico_Coche con '' donde no habia precio
+        """
+        fechas = self.fechas_ejecucion(fecha_inicio, fecha_fin)
+        columnas = [f"Precio_{fecha.strftime(FORMATO_FECHA)}" for fecha in fechas]
+
+        eventos = self.eventos[self.eventos['ID_Unico_Coche'] != ID_EJECUCION]
+        if ids is not None:
+            eventos = eventos[eventos['ID_Unico_Coche'].isin(ids)]
+        if not fechas:
+            indice = pd.Index(ids if ids is not None else eventos['ID_Unico_Coche'].unique(), name='ID_Unico_Coche')
+            return pd.DataFrame(index=indice, columns=columnas, dtype=object)
+
+        inicio, fin = fechas[0], fechas[-1]
+        eventos = eventos[eventos['Fecha'] <= fin].sort_values('Fecha', kind='stable')
+
+        # Estado al inicio de la ventana: ultimo evento anterior o igual a la primera fecha
+        previos = eventos[eventos['Fecha'] <= inicio].drop_duplicates('ID_Unico_Coche', keep='last')
+        previos = previos.assign(Fecha=inicio)
+        dentro = eventos[eventos['Fecha'] > inicio]
+
+        combinados = pd.concat([previos, dentro], ignore_index=True)
+        combinados = combinados.drop_duplicates(['ID_Unico_Coche', 'Fecha'], keep='last')
+
+        ancho = combinados.pivot(index='ID_Unico_Coche', columns='Fecha', values='Precio')
+        ancho = ancho.reindex(columns=fechas).ffill(axis=1).fillna('')
+        ancho.columns = columnas
+        if ids is not None:
+            ancho = ancho.reindex(pd.Index(ids, name='ID_Unico_Coche'), fill_value='')
+        return ancho
+
+    @classmethod
+    def cargar(cls, gs_handler, hoja=HOJA_EVENTOS):
+        """Lee el almacen desde su hoja; si no existe devuelve un almacen vacio"""
+        try:
+            valores = gs_handler.get_worksheet(hoja).get_all_values()
+        except gspread.WorksheetNotFound:
+            return cls()
+
+        if len(valores) > 1:
+            df = pd.DataFrame([fila[:3] for fila in valores[1:]], columns=COLUMNAS_EVENTOS)
+            df['Fecha'] = pd.to_datetime(df['Fecha'], format=FORMATO_FECHA)
+            almacen = cls(df)
+        else:
+            almacen = cls()
+        almacen.hoja_existe = True
+        almacen._pendientes = 0
+        return almacen
+
+    def guardar(self, gs_handler, hoja=HOJA_EVENTOS):
+        """Anade a la hoja solo los eventos pendientes (la crea si no existe)"""
+        if self._reescribir and self.hoja_existe:
+            worksheet = gs_handler.get_worksheet(hoja)
+            worksheet.clear()
+            gs_handler.ajustar_hoja(worksheet, len(self.eventos) + 1, len(COLUMNAS_EVENTOS))
+            worksheet.update([COLUMNAS_EVENTOS] + self._filas(self.eventos))
+            self._reescribir = False
+            self._pendientes = 0
+            return len(self.eventos)
+
+        if not self._pendientes:
+            return 0
+
+        filas = self._filas(self.eventos.tail(self._pendientes))
+        if self.hoja_existe:
+            gs_handler.get_worksheet(hoja).append_rows(filas)
+        else:
+            worksheet = gs_handler.add_worksheet(title=hoja, rows=len(filas) + 1, cols=len(COLUMNAS_EVENTOS))
+            worksheet.update([COLUMNAS_EVENTOS] + filas)
+            self.hoja_existe = True
+
+        escritos = self._pendientes
+        self._pendientes = 0
+        self._reescribir = False
+        return escritos
+
+    @staticmethod
+    def _filas(eventos):
+        """Eventos como filas de texto para la hoja"""
+        return pd.DataFrame({
+            'ID_Unico_Coche': eventos['ID_Unico_Coche'].astype(str),
+            'Fecha': eventos['Fecha'].dt.strftime(FORMATO_FECHA),
+            'Precio': eventos['Precio'].astype(str)
+        }).values.tolist()
@@ -8,19 +8,39 @@ Lee datos del scraper desde Google Sheets y actualiza el historico evolutivo de
 import sys
 import os
 import time
+import tracemalloc
 import pandas as pd
-import re
-import hashlib
 from datetime import datetime, timedelta
 import numpy as np
+import gspread
 
 # Importar modulos locales
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from config import get_sellers
-from google_sheets_uploader import GoogleSheetsUploader
+from gspread.utils import ValueRenderOption
+from google_sheets_uploader import GoogleSheetsUploader, normalizar_celda
+from almacen_precios import AlmacenEventosPrecio
+from historico_sqlite import HistoricoSQLite
+from identificador_coches import canonicalizar_urls, crear_id_unico, crear_ids_unicos
+from snapshots_scraper import descubrir_snapshots, leer_archivos_excel
+from cambios_precio import (detectar_cambios, guardar_registro_cambios, HOJA_CAMBIOS,
+                            PRECIO_CAMBIO_MINIMO, CAMBIO_PORCENTAJE_SIGNIFICATIVO)
+from analitica_precios import MatrizPrecios, resumen_por_grupos, publicar_resumenes
+from perfilado import Perfilador, fase
+from esquema_datos import (NOMBRES_SCRAPER, aplicar_esquema, dataframe_desde_valores, mostrar_informe,
+                           limpiar_valores_vacios, parsear_km, parsear_ano, km_texto, ano_texto)
+
+# Columnas del snapshot del scraper que no se guardan en Data_Historico
+COLUMNAS_SOLO_SNAPSHOT = ['Precio_Contado', 'Precio Financiado', 'Fecha_Extraccion']
+# Cambios de precio mostrados en el resumen final (el registro completo va a Data_Cambios_Precio)
+TOP_CAMBIOS_RESUMEN = 5
 
 class AnalizadorHistoricoCoches:
-    def __init__(self):
+    def __init__(self, gs_handler=None):
+        """
+        Args:
+            gs_handler: GoogleSheetsUploader ya construido (opcional, p.ej. con FakeSheetsClient)
+        """
         self.tiempo_inicio = datetime.now()
         
         # Variables de fecha
@@ -36,6 +56,9 @@ class AnalizadorHistoricoCoches:
             'coches_actualizados': 0,
             'coches_vendidos': 0,
             'errores': 0,
+            'eventos_precio': 0,
+            'lectura_scr_segundos': 0,
+            'lectura_scr_pico_mb': 0,
             'tiempo_ejecucion': 0
         }
         
@@ -45,17 +68,68 @@ class AnalizadorHistoricoCoches:
         self.cambios_precio = []
         
         # Google Sheets handler
-        self.gs_handler = None
+        self.gs_handler = gs_handler
+        
+        # Perfiles cProfile por fase (PERFILADO=true; None = sin perfilado)
+        self.perfilador = Perfilador.desde_entorno('analisis')
         
         # ID del sheet para historico (usar el mismo que el scraper)
         self.sheet_id = os.getenv('GOOGLE_SHEET_ID')
         
+        # Almacen de precios en formato largo (hoja Data_Precios_Eventos)
+        self.usar_almacen_eventos = os.getenv('ALMACEN_PRECIOS_EVENTOS', 'false').lower() == 'true'
+        # Fechas Precio_ que se conservan en Data_Historico (0 = todas); solo con el almacen activo
+        self.ventana_precios = int(os.getenv('HISTORICO_VENTANA_FECHAS', '0') or 0)
+        
+        # Fuente de verdad del historico: 'sheets' (Data_Historico) o 'sqlite' (base de datos local)
+        self.fuente_historico = os.getenv('FUENTE_HISTORICO', 'sheets').lower()
+        self.ruta_sqlite = os.getenv('HISTORICO_SQLITE_RUTA', '../data/historico_coches.db')
+        # Con sqlite, Data_Historico pasa a ser una vista exportada (desactivable)
+        self.exportar_sqlite = os.getenv('HISTORICO_SQLITE_EXPORTAR', 'true').lower() == 'true'
+        
+        # Escritura de Data_Historico: 'incremental' (solo celdas cambiadas, columna nueva y
+        # filas nuevas al final) o 'completa' (limpiar y reescribir ordenado)
+        self.modo_escritura = os.getenv('ESCRITURA_HISTORICO', 'incremental').lower()
+        # Fuerza una reescritura completa para recuperar el orden Vendedor -> Marca
+        self.reordenar_historico = os.getenv('HISTORICO_REORDENAR', 'false').lower() == 'true'
+        if self.modo_escritura == 'incremental' and self.usar_almacen_eventos and self.ventana_precios > 0:
+            # La ventana quita la columna Precio_ mas antigua: la cabecera ya no es prefijo de la
+            # hoja y el diff acabaria siempre en reescritura completa tras leer y comparar todo
+            print("ADVERTENCIA: HISTORICO_VENTANA_FECHAS no es compatible con la escritura incremental "
+                  "- Data_Historico se reescribe completa")
+            self.modo_escritura = 'completa'
+        # Contenido de Data_Historico tal y como se leyo (base del modo incremental)
+        self.grid_historico = None
+        # IDs del historico regenerados desde la URL canonica en esta ejecucion (antiguo -> nuevo)
+        self.ids_migrados = {}
+        # Informe de limpieza por columna de cada ingesta ('SCRAPER', 'HISTORICO')
+        self.informe_ingesta = {}
+        
+        # Backfill: aplica en orden todos los snapshots SCR (o Excel archivados) aun no
+        # procesados dentro del rango y guarda el historico una sola vez al final
+        self.modo_backfill = os.getenv('BACKFILL_HISTORICO', 'false').lower() == 'true'
+        self.backfill_desde = os.getenv('BACKFILL_DESDE', '')  # dd/mm/yyyy ('' = sin limite)
+        self.backfill_hasta = os.getenv('BACKFILL_HASTA', '')  # dd/mm/yyyy ('' = hoy)
+        self.carpeta_archivos = os.getenv('BACKFILL_CARPETA_ARCHIVOS', '../resultados')
+        
+        # Registro de cambios de precio significativos (hoja Data_Cambios_Precio)
+        self.registro_cambios = os.getenv('REGISTRO_CAMBIOS_PRECIO', 'true').lower() == 'true'
+        self.df_cambios_precio = None
+        self.fechas_cambios = []
+        
+        # Resumen por vendedor y marca (dias en mercado, bajadas, descuentos) en hojas Analitica_*
+        self.analitica_precios = os.getenv('ANALITICA_PRECIOS', 'true').lower() == 'true'
+        self.resumenes_analitica = None
+        
     def inicializar_google_sheets(self):
         """Inicializa la conexion a Google Sheets"""
         try:
             credentials_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
             
-            if not credentials_json:
+            if self.gs_handler is not None:
+                # Handler inyectado (benchmarks / backend en memoria)
+                pass
+            elif not credentials_json:
                 # Para testing local
                 credentials_file = "../credentials/service-account.json"
                 if os.path.exists(credentials_file):
@@ -85,26 +159,10 @@ class AnalizadorHistoricoCoches:
     
     def crear_id_unico_coche(self, fila):
         """
-        Crea ID unico basado en: URL (principalmente)
-        URL es unica para cada coche en Wallapop
+        Crea el ID unico de una sola fila (numero de anuncio de la URL)
+        Para columnas enteras usar crear_ids_unicos, que esta vectorizado
         """
-        try:
-            url = str(fila.get('URL', '')).strip()
-            if url and url != 'No especificado':
-                return hashlib.md5(url.encode()).hexdigest()[:12]
-            
-            # Fallback con otros datos si URL no disponible
-            vendedor = str(fila.get('Vendedor', '')).strip()
-            marca = str(fila.get('Marca', '')).strip()
-            modelo = str(fila.get('Modelo', '')).strip()
-            km = str(fila.get('KM', '')).strip()
-            
-            clave_fallback = f"{vendedor}_{marca}_{modelo}_{km}"
-            return hashlib.md5(clave_fallback.encode()).hexdigest()[:12]
-            
-        except Exception as e:
-            # Ultimo recurso
-            return hashlib.md5(f"{time.time()}".encode()).hexdigest()[:12]
+        return crear_id_unico(fila)
     
     def extraer_fecha_de_datos(self, df_nuevo):
         """Extrae la fecha de los datos del scraper"""
@@ -133,7 +191,7 @@ class AnalizadorHistoricoCoches:
         print("ANALIZADOR HISTORICO COCHES V1.4 - ORDEN MARCA ALFABÉTICO")
         print("="*80)
         print(f"Fecha procesamiento: {self.fecha_display}")
-        print("Logica: URL como identificador unico principal")
+        print("Logica: numero de anuncio (URL canonica) como identificador unico principal")
         print("Fuente: Google Sheets (Une SCR-J1 y SCR-J2)")
         print("Destino: Hoja Data_Historico")
         print("Precio: SOLO precio al contado (columnas Precio_FECHA)")
@@ -156,64 +214,16 @@ class AnalizadorHistoricoCoches:
             
             print(f"Buscando hojas: {sheet_j1} y {sheet_j2}")
             
-            # Abrir spreadsheet
-            spreadsheet = self.gs_handler.client.open_by_key(self.sheet_id)
-            
-            # Listar todas las hojas para debug
-            todas_las_hojas = [ws.title for ws in spreadsheet.worksheets()]
+            # Listar todas las hojas para debug (metadatos cacheados en el uploader)
+            todas_las_hojas = self.gs_handler.list_worksheet_titles()
             hojas_scr = [h for h in todas_las_hojas if h.startswith('SCR')]
             print(f"Hojas SCR disponibles: {hojas_scr}")
             
-            # Intentar leer ambas hojas
-            df_j1 = None
-            df_j2 = None
-            
-            try:
-                worksheet_j1 = spreadsheet.worksheet(sheet_j1)
-                data_j1 = worksheet_j1.get_all_records()
-                if data_j1:
-                    df_j1 = pd.DataFrame(data_j1)
-                    print(f"Hoja {sheet_j1}: {len(df_j1)} coches")
-            except Exception as e:
-                print(f"No se pudo leer {sheet_j1}: {e}")
-            
-            try:
-                worksheet_j2 = spreadsheet.worksheet(sheet_j2)
-                data_j2 = worksheet_j2.get_all_records()
-                if data_j2:
-                    df_j2 = pd.DataFrame(data_j2)
-                    print(f"Hoja {sheet_j2}: {len(df_j2)} coches")
-            except Exception as e:
-                print(f"No se pudo leer {sheet_j2}: {e}")
-            
-            # Unificar dataframes
-            dfs_a_unir = []
-            if df_j1 is not None and not df_j1.empty:
-                dfs_a_unir.append(df_j1)
-            if df_j2 is not None and not df_j2.empty:
-                dfs_a_unir.append(df_j2)
-            
-            if not dfs_a_unir:
+            df_unificado = self.leer_hojas_scraper([sheet_j1, sheet_j2])
+            if df_unificado is None:
                 raise Exception("No se encontraron datos en ninguna hoja del scraper")
             
-            # Unir todos los dataframes
-            df_unificado = pd.concat(dfs_a_unir, ignore_index=True)
-            print(f"DATOS UNIFICADOS: {len(df_unificado)} coches totales")
-            
-            # Debug: mostrar columnas encontradas
-            print(f"Columnas encontradas: {list(df_unificado.columns)}")
-            
-            # Validar estructura
-            df_unificado = self.validar_estructura_archivo(df_unificado)
-            
-            # Crear ID unico para cada coche
-            df_unificado['ID_Unico_Coche'] = df_unificado.apply(self.crear_id_unico_coche, axis=1)
-            
-            # Limpiar precios y kilometraje (SOLO INTERNAMENTE)
-            df_unificado = self.limpiar_datos_numericos(df_unificado)
-            
-            self.stats['total_archivo_nuevo'] = len(df_unificado)
-            print(f"Coches procesados: {self.stats['total_archivo_nuevo']:,}")
+            df_unificado = self.preparar_snapshot(df_unificado)
             
             # Extraer fecha
             self.fecha_actual, self.fecha_display = self.extraer_fecha_de_datos(df_unificado)
@@ -225,20 +235,77 @@ class AnalizadorHistoricoCoches:
             print(f"ERROR leyendo datos del scraper: {str(e)}")
             raise
     
+    def leer_hojas_scraper(self, titulos):
+        """Lee las hojas SCR indicadas en una sola peticion y las une (None si no hay datos)"""
+        inicio_lectura = time.perf_counter()
+        medir_memoria = not tracemalloc.is_tracing()
+        if medir_memoria:
+            tracemalloc.start()
+        
+        dfs_a_unir = []
+        try:
+            valores_hojas = self.gs_handler.read_worksheets_values(titulos)
+            
+            for nombre_hoja in titulos:
+                if nombre_hoja not in valores_hojas:
+                    print(f"No se pudo leer {nombre_hoja}: la hoja no existe")
+                    continue
+                df_hoja = self.construir_dataframe_scr(valores_hojas.pop(nombre_hoja))
+                if df_hoja is not None and not df_hoja.empty:
+                    print(f"Hoja {nombre_hoja}: {len(df_hoja)} coches")
+                    dfs_a_unir.append(df_hoja)
+        finally:
+            self.stats['lectura_scr_segundos'] = time.perf_counter() - inicio_lectura
+            if medir_memoria:
+                self.stats['lectura_scr_pico_mb'] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                tracemalloc.stop()
+        print(f"LECTURA SCR: {self.stats['lectura_scr_segundos']:.2f} s, "
+              f"pico de memoria {self.stats['lectura_scr_pico_mb']:.1f} MB")
+        
+        if not dfs_a_unir:
+            return None
+        return pd.concat(dfs_a_unir, ignore_index=True)
+    
+    def preparar_snapshot(self, df_unificado):
+        """Valida estructura, genera URL canonica / ID y limpia segun esquema un snapshot del scraper"""
+        print(f"DATOS UNIFICADOS: {len(df_unificado)} coches totales")
+        
+        # Debug: mostrar columnas encontradas
+        print(f"Columnas encontradas: {list(df_unificado.columns)}")
+        
+        # Validar estructura
+        df_unificado = self.validar_estructura_archivo(df_unificado)
+        
+        # URL canonica e ID unico (numero de anuncio) para todos los coches de una vez
+        df_unificado['URL'] = canonicalizar_urls(df_unificado['URL'])
+        df_unificado['ID_Unico_Coche'] = crear_ids_unicos(df_unificado)
+        
+        # Limpieza tipada de una sola vez: textos, KM/Ano internos y validacion de precios
+        df_unificado = self.limpiar_datos_numericos(df_unificado)
+        
+        self.stats['total_archivo_nuevo'] = len(df_unificado)
+        print(f"Coches procesados: {self.stats['total_archivo_nuevo']:,}")
+        return df_unificado
+    
+    def construir_dataframe_scr(self, valores):
+        """
+        Construye el DataFrame de una hoja SCR a partir de su matriz de valores
+        
+        La primera fila es la cabecera; las filas que la API devuelve recortadas
+        se rellenan con ''. Las columnas conocidas del esquema se tipan como str.
+        """
+        df = dataframe_desde_valores(valores)
+        if df is None:
+            return None
+        tipos = {columna: str for columna in NOMBRES_SCRAPER if columna in df.columns}
+        return df.astype(tipos)
+    
     def validar_estructura_archivo(self, df):
         """Valida y transforma columnas del scraper al formato del histórico"""
         print(f"Validando y transformando columnas del scraper...")
         
-        # TRANSFORMACIÓN COMPLETA: Scraper → Histórico
-        mapeo_columnas = {
-            # Transformaciones necesarias
-            'Precio al Contado': 'Precio_Contado',      # Para procesamiento interno
-            'Año': 'Ano',                               # Año → Ano
-            'Nº Plazas': 'Plazas',                      # Nº Plazas → Plazas  
-            'Nº Puertas': 'Puertas',                    # Nº Puertas → Puertas
-            'Conducción': 'Conduccion',                 # Conducción → Conduccion (sin acento)
-            'Fecha Extracción': 'Fecha_Extraccion'      # Para eliminar después
-        }
+        # TRANSFORMACIÓN COMPLETA: Scraper → Histórico (nombres del esquema, p.ej. Año → Ano)
+        mapeo_columnas = {scraper: columna for scraper, columna in NOMBRES_SCRAPER.items() if scraper != columna}
         
         print(f"Columnas originales: {list(df.columns)}")
         df = df.rename(columns=mapeo_columnas)
@@ -274,43 +341,13 @@ class AnalizadorHistoricoCoches:
         
         return df
     
-    def limpiar_datos_numericos(self, df):
-        """Limpia y convierte datos numericos (SOLO PARA USO INTERNO)"""
-        try:
-            print("Limpiando datos numericos (uso interno)...")
-            
-            # Limpiar kilometraje
-            if 'KM' in df.columns:
-                def limpiar_km(km_text):
-                    if pd.isna(km_text) or km_text == 'No especificado':
-                        return 0
-                    # Extraer numeros del texto
-                    numeros = re.findall(r'\d+', str(km_text).replace('.', '').replace(',', ''))
-                    if numeros:
-                        return int(''.join(numeros))
-                    return 0
-                
-                df['KM_Numerico_Internal'] = df['KM'].apply(limpiar_km)
-            
-            # Limpiar año
-            if 'Ano' in df.columns:
-                def limpiar_ano(ano_text):
-                    if pd.isna(ano_text) or ano_text == 'No especificado':
-                        return 0
-                    numeros = re.findall(r'\d{4}', str(ano_text))
-                    if numeros:
-                        ano = int(numeros[0])
-                        if 1990 <= ano <= datetime.now().year + 1:
-                            return ano
-                    return 0
-                
-                df['Ano_Numerico_Internal'] = df['Ano'].apply(limpiar_ano)
-            
-            return df
-            
-        except Exception as e:
-            print(f"ADVERTENCIA: Error limpiando datos: {str(e)}")
-            return df
+    def limpiar_datos_numericos(self, df, origen="SCRAPER"):
+        """Limpia y valida segun esquema_datos al ingerir (columnas internas SOLO PARA USO INTERNO)"""
+        print(f"Limpiando datos segun esquema ({origen.lower()})...")
+        df, informe = aplicar_esquema(df)
+        self.informe_ingesta[origen] = informe
+        mostrar_informe(informe, titulo=f"ESQUEMA {origen}")
+        return df
     
     def obtener_columnas_precios_fechas(self, df):
         """Obtiene las columnas de precios por fecha del historico"""
@@ -342,80 +379,80 @@ class AnalizadorHistoricoCoches:
         try:
             print("Intentando leer historico existente...")
             
-            # Abrir spreadsheet
-            spreadsheet = self.gs_handler.client.open_by_key(self.sheet_id)
-            
             try:
-                worksheet_historico = spreadsheet.worksheet("Data_Historico")
-                data_historico = worksheet_historico.get_all_records()
+                worksheet_historico = self.gs_handler.get_worksheet("Data_Historico")
+                df_historico = self.leer_dataframe_historico(worksheet_historico)
                 
-                if not data_historico:
+                if df_historico is None:
                     print("Hoja Data_Historico existe pero esta vacia")
                     return None
                 
-                df_historico = pd.DataFrame(data_historico)
                 print(f"Historico leido: {len(df_historico)} coches")
                 
                 # Verificar columnas necesarias
                 if 'URL' not in df_historico.columns:
                     raise Exception("Columna URL faltante en historico")
                 
-                # CORRECCION V1.4: REGENERAR columnas internas para ordenamiento
-                print("V1.4: Regenerando columnas numericas internas...")
+                df_historico = self.migrar_ids_historico(df_historico)
                 
-                # Regenerar KM_Numerico_Internal (aunque no se use para ordenar)
-                if 'KM' in df_historico.columns:
-                    df_historico['KM_Numerico_Internal'] = df_historico['KM'].apply(self.limpiar_km_interno_seguro)
-                else:
-                    df_historico['KM_Numerico_Internal'] = 0
-                
-                # Regenerar Ano_Numerico_Internal 
-                if 'Ano' in df_historico.columns:
-                    df_historico['Ano_Numerico_Internal'] = df_historico['Ano'].apply(self.limpiar_ano_interno_seguro)
-                else:
-                    df_historico['Ano_Numerico_Internal'] = 0
-                
-                # LIMPIEZA PROACTIVA DE VALORES PROBLEMÁTICOS
-                df_historico = self.limpiar_valores_problematicos_lectura(df_historico)
+                # Columnas internas y limpieza de valores problematicos en una pasada por columna
+                df_historico = self.limpiar_datos_numericos(df_historico, origen="HISTORICO")
                 
                 self.stats['total_historico'] = len(df_historico)
                 print(f"V1.4: Historico regenerado con columnas internas")
                 return df_historico
                 
-            except Exception as e:
-                if "not found" in str(e).lower() or "worksheet not found" in str(e).lower():
-                    print("Hoja Data_Historico no existe - sera creada")
-                    return None
-                else:
-                    raise e
+            except gspread.WorksheetNotFound:
+                print("Hoja Data_Historico no existe - sera creada")
+                return None
                     
         except Exception as e:
             print(f"ERROR leyendo historico: {str(e)}")
             raise
     
+    def migrar_ids_historico(self, df_historico):
+        """
+        Regenera URL canonica e ID_Unico_Coche del historico con el mismo criterio que el scraper
+        
+        Los IDs antiguos (MD5 de la URL) pasan a ser el numero de anuncio. La
+        correspondencia antiguo -> nuevo queda en self.ids_migrados para
+        renombrar tambien el almacen de eventos de precio.
+        """
+        if 'ID_Unico_Coche' in df_historico.columns:
+            ids_previos = df_historico['ID_Unico_Coche'].astype(str)
+        else:
+            ids_previos = pd.Series('', index=df_historico.index, dtype=object)
+        df_historico['URL'] = canonicalizar_urls(df_historico['URL'])
+        df_historico['ID_Unico_Coche'] = crear_ids_unicos(df_historico)
+        
+        cambiados = ids_previos != df_historico['ID_Unico_Coche']
+        if cambiados.any():
+            self.ids_migrados = dict(zip(ids_previos[cambiados], df_historico.loc[cambiados, 'ID_Unico_Coche']))
+            print(f"MIGRACION IDS: {cambiados.sum():,} IDs regenerados desde la URL canonica")
+        return df_historico
+    
+    def leer_dataframe_historico(self, worksheet_historico):
+        """
+        Lee Data_Historico como texto; los tipos los pone despues el esquema (esquema_datos)
+        
+        Sin numericise por celda: un ID como '004512' no se convierte en 4512 y
+        las columnas numericas internas se derivan una sola vez al ingerir.
+        En modo incremental se lee sin formato, igual que upload_dataframe_diff,
+        y esa rejilla es la base del diff; el DataFrame recibe las celdas como texto.
+        """
+        if self.modo_escritura != 'incremental':
+            return dataframe_desde_valores(worksheet_historico.get_all_values())
+        valores = worksheet_historico.get_all_values(value_render_option=ValueRenderOption.unformatted)
+        self.grid_historico = valores
+        return dataframe_desde_valores([
+            fila if all(isinstance(v, str) for v in fila) else [normalizar_celda(v) for v in fila]
+            for fila in valores
+        ])
+    
     def limpiar_valores_problematicos_lectura(self, df):
-        """V1.4: Limpia valores problemáticos al leer el histórico"""
+        """V1.4: Limpia valores problemáticos (NaN/inf en numéricas, 'nan'/'None' en textos)"""
         try:
-            print("V1.4: Limpiando valores problemáticos del histórico...")
-            
-            # Reemplazar strings problemáticos
-            df = df.replace(['nan', 'NaN', 'None', 'null', ''], np.nan)
-            
-            # Limpiar infinitos y valores extremos
-            for column in df.columns:
-                if df[column].dtype in ['float64', 'int64', 'float32', 'int32']:
-                    # Reemplazar infinitos
-                    df[column] = df[column].replace([np.inf, -np.inf], np.nan)
-                    # Rellenar NaN con 0
-                    df[column] = df[column].fillna(0)
-                    # Limitar valores extremos
-                    df[column] = df[column].clip(-1e10, 1e10)
-                elif df[column].dtype == 'object':
-                    # Para strings, reemplazar NaN con string vacío
-                    df[column] = df[column].fillna('')
-                    # Asegurar que son strings
-                    df[column] = df[column].astype(str)
-            
+            df = limpiar_valores_vacios(df)
             print("V1.4: Valores problemáticos limpiados")
             return df
             
@@ -424,36 +461,12 @@ class AnalizadorHistoricoCoches:
             return df
     
     def limpiar_km_interno_seguro(self, km_text):
-        """V1.4: Función auxiliar SEGURA para limpiar KM"""
-        try:
-            if pd.isna(km_text) or km_text == 'No especificado' or km_text == '' or km_text == 'nan':
-                return 0
-            
-            km_str = str(km_text).replace('.', '').replace(',', '').replace(' ', '')
-            numeros = re.findall(r'\d+', km_str)
-            if numeros:
-                km_val = int(''.join(numeros))
-                # Limitar a rango razonable
-                return max(0, min(km_val, 999999))
-            return 0
-        except:
-            return 0
+        """V1.4: KM de un solo valor (para columnas usar esquema_datos.parsear_km)"""
+        return km_texto(km_text)
     
     def limpiar_ano_interno_seguro(self, ano_text):
-        """V1.4: Función auxiliar SEGURA para limpiar año"""
-        try:
-            if pd.isna(ano_text) or ano_text == 'No especificado' or ano_text == '' or ano_text == 'nan':
-                return 0
-            
-            ano_str = str(ano_text)
-            numeros = re.findall(r'\d{4}', ano_str)
-            if numeros:
-                ano = int(numeros[0])
-                if 1990 <= ano <= datetime.now().year + 1:
-                    return ano
-            return 0
-        except:
-            return 0
+        """V1.4: Año de un solo valor (para columnas usar esquema_datos.parsear_ano)"""
+        return ano_texto(ano_text)
     
     def limpiar_km_interno(self, km_text):
         """Funcion auxiliar para limpiar KM"""
@@ -480,9 +493,9 @@ class AnalizadorHistoricoCoches:
         
         # Asegurar que existen columnas internas ANTES del ordenamiento
         if 'KM_Numerico_Internal' not in df_historico.columns:
-            df_historico['KM_Numerico_Internal'] = df_historico['KM'].apply(self.limpiar_km_interno_seguro)
+            df_historico['KM_Numerico_Internal'] = parsear_km(df_historico['KM'])[0]
         if 'Ano_Numerico_Internal' not in df_historico.columns:
-            df_historico['Ano_Numerico_Internal'] = df_historico['Ano'].apply(self.limpiar_ano_interno_seguro)
+            df_historico['Ano_Numerico_Internal'] = parsear_ano(df_historico['Ano'])[0]
         
         # V1.4: Limpiar valores problemáticos ANTES de ordenar
         df_historico = self.limpiar_valores_problematicos_lectura(df_historico)
@@ -511,133 +524,40 @@ class AnalizadorHistoricoCoches:
             if fecha_anterior:
                 print(f"Comparando con fecha anterior: {fecha_anterior}")
             
-            # URLs como identificador principal
-            urls_historico = set(df_historico['URL'].values)
-            urls_nuevos = set(df_nuevo['URL'].values)
+            # ID_Unico_Coche (numero de anuncio) como identificador principal
+            ids_historico = set(df_historico['ID_Unico_Coche'].values)
+            ids_nuevos = set(df_nuevo['ID_Unico_Coche'].values)
             
-            coches_nuevos_urls = urls_nuevos - urls_historico
-            coches_existentes_urls = urls_nuevos & urls_historico
-            coches_vendidos_urls = urls_historico - urls_nuevos
+            coches_nuevos_ids = ids_nuevos - ids_historico
+            coches_existentes_ids = ids_nuevos & ids_historico
+            coches_vendidos_ids = ids_historico - ids_nuevos
             
             print(f"Analisis de cambios:")
-            print(f"    - Nuevos: {len(coches_nuevos_urls)}")
-            print(f"    - Existentes: {len(coches_existentes_urls)}")
-            print(f"    - Posibles ventas: {len(coches_vendidos_urls)}")
+            print(f"    - Nuevos: {len(coches_nuevos_ids)}")
+            print(f"    - Existentes: {len(coches_existentes_ids)}")
+            print(f"    - Posibles ventas: {len(coches_vendidos_ids)}")
             
             # Preparar dataframe actualizado
             df_actualizado = df_historico.copy()
             df_actualizado[col_precio_hoy] = ''  # V1.4: String vacío en lugar de pd.NA
             
-            # PROCESAR COCHES EXISTENTES
-            for url_coche in coches_existentes_urls:
-                try:
-                    fila_nueva = df_nuevo[df_nuevo['URL'] == url_coche].iloc[0]
-                    precio_nuevo = str(fila_nueva['Precio_Contado'])  # V1.4: Convertir a string
-                    
-                    mask = df_actualizado['URL'] == url_coche
-                    df_actualizado.loc[mask, col_precio_hoy] = precio_nuevo
-                    df_actualizado.loc[mask, 'Estado'] = 'activo'
-                    
-                    # Detectar cambios de precio
-                    if fecha_anterior:
-                        col_precio_anterior = f"Precio_{fecha_anterior}"
-                        if col_precio_anterior in df_actualizado.columns:
-                            precio_anterior = df_actualizado.loc[mask, col_precio_anterior].iloc[0]
-                            if precio_anterior and str(precio_anterior) != precio_nuevo:
-                                self.cambios_precio.append({
-                                    'Marca': fila_nueva['Marca'],
-                                    'Modelo': fila_nueva['Modelo'],
-                                    'Vendedor': fila_nueva['Vendedor'],
-                                    'Precio_Anterior': precio_anterior,
-                                    'Precio_Nuevo': precio_nuevo
-                                })
-                    
-                    self.stats['coches_actualizados'] += 1
-                    
-                except Exception as e:
-                    self.stats['errores'] += 1
-                    print(f"Error procesando coche existente: {str(e)}")
-                    continue
+            # Primera aparicion de cada ID en los datos nuevos (equivale a .iloc[0])
+            df_nuevo_por_id = df_nuevo.drop_duplicates('ID_Unico_Coche', keep='first').set_index('ID_Unico_Coche')
             
-            # PROCESAR COCHES VENDIDOS
-            for url_coche in coches_vendidos_urls:
-                try:
-                    mask = df_actualizado['URL'] == url_coche
-                    if mask.any():
-                        estado_actual = df_actualizado.loc[mask, 'Estado'].iloc[0]
-                        
-                        if estado_actual == 'activo':
-                            df_actualizado.loc[mask, 'Estado'] = 'vendido'
-                            df_actualizado.loc[mask, 'Fecha_Venta'] = self.fecha_display
-                            
-                            fila_vendida = df_actualizado.loc[mask].iloc[0]
-                            self.coches_vendidos_lista.append({
-                                'Marca': fila_vendida['Marca'],
-                                'Modelo': fila_vendida['Modelo'], 
-                                'Vendedor': fila_vendida['Vendedor']
-                            })
-                            
-                            self.stats['coches_vendidos'] += 1
-                            
-                except Exception as e:
-                    print(f"Error procesando coche vendido: {str(e)}")
-                    continue
+            # PROCESAR COCHES EXISTENTES (join indexado por ID_Unico_Coche)
+            self.actualizar_coches_existentes(df_actualizado, df_nuevo_por_id, coches_existentes_ids, col_precio_hoy)
             
-            # PROCESAR COCHES NUEVOS
-            for url_nueva in coches_nuevos_urls:
-                try:
-                    fila_nueva = df_nuevo[df_nuevo['URL'] == url_nueva].iloc[0]
-                    
-                    nueva_fila = {
-                        'ID_Unico_Coche': fila_nueva['ID_Unico_Coche'],
-                        'Marca': str(fila_nueva['Marca']) if pd.notna(fila_nueva['Marca']) else 'No especificado',
-                        'Modelo': str(fila_nueva['Modelo']) if pd.notna(fila_nueva['Modelo']) else 'No especificado',
-                        'Vendedor': str(fila_nueva['Vendedor']) if pd.notna(fila_nueva['Vendedor']) else 'No especificado',
-                        'Ano': str(fila_nueva['Ano']) if pd.notna(fila_nueva['Ano']) else 'No especificado',
-                        'KM': str(fila_nueva['KM']) if pd.notna(fila_nueva['KM']) else 'No especificado',
-                        'URL': str(fila_nueva['URL']),
-                        'Primera_Deteccion': self.fecha_display,
-                        'Estado': 'activo',
-                        'Fecha_Venta': ''  # V1.4: String vacío
-                    }
-                    
-                    # Anadir caracteristicas del coche con nombres transformados
-                    caracteristicas_coche = ['Tipo', 'Plazas', 'Puertas', 'Combustible', 'Potencia', 'Conduccion']
-                    for caracteristica in caracteristicas_coche:
-                        if caracteristica in fila_nueva:
-                            nueva_fila[caracteristica] = str(fila_nueva[caracteristica]) if pd.notna(fila_nueva[caracteristica]) else 'No especificado'
-                    
-                    # Inicializar todas las columnas de precios anteriores con string vacío
-                    for col_precio in columnas_precios:
-                        nueva_fila[col_precio] = ''
-                    
-                    # Anadir precio para la fecha actual
-                    nueva_fila[col_precio_hoy] = str(fila_nueva['Precio_Contado'])
-                    
-                    # Crear columnas internas para ordenamiento (NO se guardaran en sheets)
-                    nueva_fila['KM_Numerico_Internal'] = fila_nueva.get('KM_Numerico_Internal', 0)
-                    nueva_fila['Ano_Numerico_Internal'] = fila_nueva.get('Ano_Numerico_Internal', 0)
-                    
-                    df_actualizado = pd.concat([df_actualizado, pd.DataFrame([nueva_fila])], ignore_index=True)
-                    
-                    self.stats['coches_nuevos'] += 1
-                    self.coches_nuevos_lista.append({
-                        'Marca': nueva_fila['Marca'],
-                        'Modelo': nueva_fila['Modelo'],
-                        'Vendedor': nueva_fila['Vendedor']
-                    })
-                    
-                except Exception as e:
-                    self.stats['errores'] += 1
-                    print(f"Error procesando coche nuevo: {str(e)}")
-                    continue
+            # PROCESAR COCHES VENDIDOS
+            self.marcar_coches_vendidos(df_actualizado, coches_vendidos_ids)
             
-            # V1.4: Regenerar columnas internas para TODOS los coches
-            print("V1.4: Regenerando columnas internas para todos los coches...")
-            df_actualizado['KM_Numerico_Internal'] = df_actualizado['KM'].apply(self.limpiar_km_interno_seguro)
-            df_actualizado['Ano_Numerico_Internal'] = df_actualizado['Ano'].apply(self.limpiar_ano_interno_seguro)
+            # PROCESAR COCHES NUEVOS (todas las filas en un unico DataFrame, un solo concat)
+            df_coches_nuevos = self.construir_filas_coches_nuevos(df_nuevo_por_id, coches_nuevos_ids,
+                                                                  columnas_precios, col_precio_hoy)
+            if not df_coches_nuevos.empty:
+                df_actualizado = pd.concat([df_actualizado, df_coches_nuevos], ignore_index=True)
             
-            # V1.4: Limpiar valores problemáticos
+            # Las columnas internas ya vienen de la ingesta (historico y scraper): solo se
+            # rellenan los huecos de columnas que existian en una sola de las dos partes
             df_actualizado = self.limpiar_valores_problematicos_lectura(df_actualizado)
             
             # Ordenar resultado final con función segura
@@ -649,6 +569,242 @@ class AnalizadorHistoricoCoches:
             print(f"ERROR critico en procesamiento: {str(e)}")
             raise
     
+    def actualizar_coches_existentes(self, df_actualizado, df_nuevo_por_id, ids_existentes, col_precio_hoy):
+        """Rellena el precio de hoy y reactiva los coches existentes (in-place)"""
+        mask = df_actualizado['ID_Unico_Coche'].isin(ids_existentes)
+        if not mask.any():
+            return
+        
+        ids = df_actualizado.loc[mask, 'ID_Unico_Coche']
+        df_actualizado.loc[mask, col_precio_hoy] = ids.map(df_nuevo_por_id['Precio_Contado']).astype(str)
+        df_actualizado.loc[mask, 'Estado'] = 'activo'
+        # La URL vigente es la del scraper (el slug cambia si se edita el titulo)
+        df_actualizado.loc[mask, 'URL'] = ids.map(df_nuevo_por_id['URL']).astype(str)
+        
+        # Los cambios de precio se detectan despues sobre todo el historico (detectar_cambios_precio)
+        self.stats['coches_actualizados'] += len(ids_existentes)
+    
+    def marcar_coches_vendidos(self, df_actualizado, ids_vendidos):
+        """Marca como vendidos los coches activos que ya no aparecen en el scraper (in-place)"""
+        mask = df_actualizado['ID_Unico_Coche'].isin(ids_vendidos)
+        if not mask.any():
+            return
+        
+        # El estado que decide es el de la primera fila de cada ID
+        primer_estado = df_actualizado.drop_duplicates('ID_Unico_Coche', keep='first').set_index('ID_Unico_Coche')['Estado']
+        a_vender = mask & (df_actualizado['ID_Unico_Coche'].map(primer_estado) == 'activo')
+        if not a_vender.any():
+            return
+        
+        df_actualizado.loc[a_vender, 'Estado'] = 'vendido'
+        df_actualizado.loc[a_vender, 'Fecha_Venta'] = self.fecha_display
+        
+        vendidos = df_actualizado.loc[a_vender & ~df_actualizado['ID_Unico_Coche'].duplicated(keep='first'),
+                                      ['Marca', 'Modelo', 'Vendedor']]
+        self.coches_vendidos_lista.extend(vendidos.to_dict('records'))
+        self.stats['coches_vendidos'] += len(vendidos)
+    
+    def construir_filas_coches_nuevos(self, df_nuevo_por_id, ids_nuevos, columnas_precios, col_precio_hoy):
+        """Construye de una vez las filas del historico para los coches nuevos (columna a columna)"""
+        ids_orden = [id_coche for id_coche in df_nuevo_por_id.index if id_coche in ids_nuevos]
+        fuente = df_nuevo_por_id.loc[ids_orden].reset_index()
+        
+        def texto_o_defecto(columna):
+            serie = fuente[columna]
+            return serie.astype(str).where(serie.notna(), 'No especificado')
+        
+        columnas = {
+            'ID_Unico_Coche': fuente['ID_Unico_Coche'],
+            'Marca': texto_o_defecto('Marca'),
+            'Modelo': texto_o_defecto('Modelo'),
+            'Vendedor': texto_o_defecto('Vendedor'),
+            'Ano': texto_o_defecto('Ano'),
+            'KM': texto_o_defecto('KM'),
+            'URL': fuente['URL'].astype(str),
+            'Primera_Deteccion': self.fecha_display,
+            'Estado': 'activo',
+            'Fecha_Venta': ''  # V1.4: String vacío
+        }
+        
+        # Anadir caracteristicas del coche con nombres transformados
+        caracteristicas_coche = ['Tipo', 'Plazas', 'Puertas', 'Combustible', 'Potencia', 'Conduccion']
+        for caracteristica in caracteristicas_coche:
+            if caracteristica in fuente.columns:
+                columnas[caracteristica] = texto_o_defecto(caracteristica)
+        
+        # Columnas de precios anteriores vacias y precio de hoy
+        for col_precio in columnas_precios:
+            columnas[col_precio] = ''
+        columnas[col_precio_hoy] = fuente['Precio_Contado'].astype(str)
+        
+        # Columnas internas para ordenamiento (NO se guardaran en sheets)
+        for col_interna in ['KM_Numerico_Internal', 'Ano_Numerico_Internal']:
+            columnas[col_interna] = fuente[col_interna] if col_interna in fuente.columns else 0
+        
+        df_coches_nuevos = pd.DataFrame(columnas, index=fuente.index)
+        
+        self.stats['coches_nuevos'] += len(df_coches_nuevos)
+        self.coches_nuevos_lista.extend(df_coches_nuevos[['Marca', 'Modelo', 'Vendedor']].to_dict('records'))
+        
+        return df_coches_nuevos
+    
+    def actualizar_almacen_precios(self, df_historico_final, fechas_nuevas=None):
+        """
+        Registra el precio de hoy en el almacen de eventos y aplica la ventana de fechas
+        
+        La primera vez migra todas las columnas Precio_ del historico. Con
+        HISTORICO_VENTANA_FECHAS > 0 Data_Historico solo conserva las ultimas N fechas;
+        las que falten dentro de la ventana se reconstruyen desde el almacen.
+        En backfill fechas_nuevas lista todas las fechas aplicadas (dd/mm/yyyy).
+        """
+        if fechas_nuevas is None:
+            fechas_nuevas = [self.fecha_display]
+        
+        almacen = AlmacenEventosPrecio.cargar(self.gs_handler)
+        if almacen.vacio:
+            # Primera vez: todas las columnas Precio_ (incluida la de hoy) pasan a eventos
+            print("ALMACEN PRECIOS: Migrando columnas Precio_ de Data_Historico a eventos...")
+            hoja_existe = almacen.hoja_existe
+            almacen = AlmacenEventosPrecio.desde_historico_ancho(df_historico_final)
+            almacen.hoja_existe = hoja_existe
+        else:
+            if self.ids_migrados:
+                renombrados = almacen.renombrar_ids(self.ids_migrados)
+                print(f"ALMACEN PRECIOS: {renombrados:,} eventos con ID migrado (la hoja se reescribe)")
+            precios_por_id = df_historico_final.set_index('ID_Unico_Coche')
+            for fecha_display in fechas_nuevas:
+                almacen.registrar_snapshot(fecha_display, precios_por_id[f"Precio_{fecha_display}"])
+        
+        escritos = almacen.guardar(self.gs_handler)
+        self.stats['eventos_precio'] = escritos
+        print(f"ALMACEN PRECIOS: {escritos:,} eventos escritos ({len(almacen.eventos):,} en total)")
+        
+        if self.ventana_precios <= 0:
+            return df_historico_final
+        
+        fechas = almacen.fechas_ejecucion()[-self.ventana_precios:]
+        columnas_ventana = [f"Precio_{fecha.strftime('%d/%m/%Y')}" for fecha in fechas]
+        columnas_fuera = [col for col in self.obtener_columnas_precios_fechas(df_historico_final)
+                          if col not in columnas_ventana]
+        columnas_faltantes = [col for col in columnas_ventana if col not in df_historico_final.columns]
+        
+        df_ventana = df_historico_final.drop(columns=columnas_fuera)
+        if columnas_faltantes:
+            ancho = almacen.pivotar(fecha_inicio=fechas[0], ids=df_ventana['ID_Unico_Coche'].unique())
+            for col in columnas_faltantes:
+                df_ventana[col] = df_ventana['ID_Unico_Coche'].map(ancho[col]).fillna('')
+        
+        print(f"ALMACEN PRECIOS: Data_Historico limitado a {len(columnas_ventana)} fechas "
+              f"({len(columnas_fuera)} columnas fuera de la ventana, {len(columnas_faltantes)} reconstruidas)")
+        return df_ventana
+    
+    def procesar_historico_sqlite(self, df_nuevo):
+        """
+        Aplica el snapshot sobre la base de datos SQLite local y devuelve la vista a exportar
+        
+        Si la base de datos esta vacia se importa antes Data_Historico desde Sheets.
+        Devuelve None si la exportacion a Sheets esta desactivada.
+        """
+        print(f"SQLITE: Historico local en {self.ruta_sqlite}")
+        historico = HistoricoSQLite(self.ruta_sqlite)
+        try:
+            if historico.vacio():
+                df_historico_sheets = self.leer_historico_existente()
+                if df_historico_sheets is not None:
+                    importados = historico.importar_historico_ancho(df_historico_sheets)
+                    print(f"SQLITE: Importados {importados:,} coches desde Data_Historico")
+            else:
+                migrados = historico.migrar_ids()
+                if migrados:
+                    print(f"SQLITE: {migrados:,} coches migrados a URL canonica / numero de anuncio")
+            
+            self.aplicar_snapshot_sqlite(historico, df_nuevo)
+            self.analizar_historico_sqlite(historico, [self.fecha_display])
+            return self.exportar_vista_sqlite(historico)
+        finally:
+            historico.cerrar()
+    
+    def aplicar_snapshot_sqlite(self, historico, df_nuevo):
+        """Aplica el snapshot de self.fecha_display sobre la base de datos y acumula estadisticas"""
+        resultado = historico.aplicar_snapshot(df_nuevo, self.fecha_display)
+        
+        self.coches_nuevos_lista.extend(resultado['coches_nuevos'])
+        self.coches_vendidos_lista.extend(resultado['coches_vendidos'])
+        self.stats['coches_nuevos'] += len(resultado['coches_nuevos'])
+        self.stats['coches_vendidos'] += len(resultado['coches_vendidos'])
+        self.stats['coches_actualizados'] += resultado['coches_actualizados']
+        self.stats['total_historico'] = historico.contar_coches()
+        
+        print(f"SQLITE: Snapshot aplicado - Nuevos: {len(resultado['coches_nuevos'])}, "
+              f"Existentes: {resultado['coches_actualizados']}, Vendidos: {len(resultado['coches_vendidos'])}")
+    
+    def analizar_historico_sqlite(self, historico, fechas):
+        """Cambios de precio de las fechas aplicadas y analitica sobre la vista de la base de datos"""
+        if not historico.fechas_ejecucion():
+            return
+        if self.analitica_precios:
+            df_vista = historico.exportar_vista()
+            self.analizar_historico(df_vista, fechas)
+        else:
+            # Ultimas fechas + la anterior (la vista arrastra el ultimo precio conocido)
+            self.detectar_cambios_precio(historico.exportar_vista(ultimas_fechas=len(fechas) + 1), fechas)
+    
+    def analizar_historico(self, df_historico, fechas):
+        """Cambios de precio de las fechas aplicadas y, si esta activa, analitica del historico completo"""
+        self.detectar_cambios_precio(df_historico, fechas)
+        if self.analitica_precios:
+            self.calcular_analitica(df_historico)
+    
+    def calcular_analitica(self, df_historico):
+        """Matriz int32 de precios y resumen por vendedor y marca (se publica tras guardar)"""
+        inicio = time.perf_counter()
+        matriz = MatrizPrecios.desde_historico(df_historico)
+        self.resumenes_analitica = resumen_por_grupos(matriz)
+        print(f"ANALITICA: Matriz {matriz.precios.shape[0]:,} coches x {matriz.precios.shape[1]} fechas "
+              f"({matriz.memoria_mb:.1f} MB), {len(self.resumenes_analitica['Vendedor'])} vendedores, "
+              f"{len(self.resumenes_analitica['Marca'])} marcas ({time.perf_counter() - inicio:.2f} s)")
+    
+    def publicar_analitica(self):
+        """Sube las hojas Analitica_Vendedores / Analitica_Marcas"""
+        if not self.resumenes_analitica:
+            return
+        try:
+            publicar_resumenes(self.gs_handler, self.resumenes_analitica)
+        except Exception as e:
+            print(f"ADVERTENCIA: No se pudo publicar la analitica de precios: {e}")
+    
+    def detectar_cambios_precio(self, df_historico, fechas):
+        """
+        Detecta los cambios de precio significativos de las fechas indicadas (dd/mm/yyyy)
+        
+        Compara por columnas contra el ultimo precio conocido de cada coche con
+        los umbrales PRECIO_CAMBIO_MINIMO / CAMBIO_PORCENTAJE_SIGNIFICATIVO.
+        """
+        inicio = time.perf_counter()
+        self.df_cambios_precio = detectar_cambios(df_historico, fechas=fechas)
+        self.fechas_cambios = list(fechas)
+        self.cambios_precio = self.df_cambios_precio.to_dict('records')
+        print(f"CAMBIOS PRECIO: {len(self.df_cambios_precio):,} cambios significativos "
+              f"({time.perf_counter() - inicio:.2f} s)")
+    
+    def guardar_cambios_precio(self):
+        """Escribe el registro de cambios de esta ejecucion en Data_Cambios_Precio"""
+        if not self.registro_cambios or self.df_cambios_precio is None:
+            return
+        try:
+            escritos = guardar_registro_cambios(self.gs_handler, self.df_cambios_precio, self.fechas_cambios)
+            print(f"CAMBIOS PRECIO: {escritos:,} filas escritas en {HOJA_CAMBIOS}")
+        except Exception as e:
+            print(f"ADVERTENCIA: No se pudo escribir {HOJA_CAMBIOS}: {e}")
+    
+    def exportar_vista_sqlite(self, historico):
+        """Vista ancha ordenada para Data_Historico (None si la exportacion esta desactivada)"""
+        if not self.exportar_sqlite:
+            return None
+        
+        df_vista = historico.exportar_vista(ultimas_fechas=self.ventana_precios or None)
+        return self.ordenar_dataframe_seguro(df_vista)
+    
     def ordenar_dataframe_seguro(self, df):
         """V1.4: Ordena por Vendedor (A-Z) -> Marca alfabética (A-Z)"""
         try:
@@ -706,13 +862,7 @@ class AnalizadorHistoricoCoches:
         df_sheets = df_historico.copy()
         
         # PASO 1: ELIMINAR COLUMNAS NO DESEADAS
-        columnas_a_eliminar = [
-            'KM_Numerico_Internal',
-            'Ano_Numerico_Internal',
-            'Precio_Contado',
-            'Precio Financiado',
-            'Fecha_Extraccion'
-        ]
+        columnas_a_eliminar = ['KM_Numerico_Internal', 'Ano_Numerico_Internal'] + COLUMNAS_SOLO_SNAPSHOT
         
         columnas_eliminadas = [col for col in columnas_a_eliminar if col in df_sheets.columns]
         if columnas_eliminadas:
@@ -791,71 +941,112 @@ class AnalizadorHistoricoCoches:
             print(f"ERROR V1.4 aplicando orden: {e}")
             return df_sheets
     
+    def serializar_para_sheets(self, df_sheets, limpieza_emergencia=False):
+        """
+        Convierte el DataFrame preparado en filas (list-of-lists) seguras para Google Sheets
+        
+        NaN -> '', inf -> 0, texto -> str. Trabaja sobre un array NumPy de objetos
+        aplicando las mascaras columna a columna; solo las columnas de tipo mixto se
+        recorren celda a celda. Con limpieza_emergencia=True reproduce el efecto de la
+        antigua limpieza final (fillna('') + inf -> 0.0 en columnas float64 sin NaN).
+        """
+        valores = df_sheets.values
+        if valores.dtype != object:
+            # Con NaN, la limpieza de emergencia dejaba el frame como object (cada columna con su tipo)
+            if limpieza_emergencia and df_sheets.isna().values.any():
+                valores = df_sheets.astype(object).values
+            else:
+                valores = valores.astype(object)
+        else:
+            valores = valores.copy()
+        
+        for j, columna in enumerate(df_sheets.columns):
+            serie = df_sheets.iloc[:, j]
+            tipo = serie.dtype
+            
+            if tipo.kind == 'f':
+                datos = serie.to_numpy()
+                mask_nan = np.isnan(datos)
+                mask_inf = np.isinf(datos)
+                if mask_nan.any():
+                    valores[mask_nan, j] = ''
+                if mask_inf.any():
+                    inf_como_float = limpieza_emergencia and tipo == 'float64' and not mask_nan.any()
+                    valores[mask_inf, j] = 0.0 if inf_como_float else 0
+            elif tipo.kind in 'iub':
+                continue
+            elif tipo == object and pd.api.types.infer_dtype(serie, skipna=False) == 'string':
+                continue
+            else:
+                # Columna mixta (o de otro tipo): conversion celda a celda solo aqui
+                valores[:, j] = [self._valor_seguro_sheets(valor) for valor in valores[:, j]]
+        
+        return valores.tolist()
+    
+    def _valor_seguro_sheets(self, valor):
+        """Conversion de una celda suelta para columnas de tipo mixto"""
+        if pd.isna(valor):
+            return ''
+        if isinstance(valor, (int, float)):
+            if np.isinf(valor) or np.isnan(valor):
+                return 0
+            return valor
+        return str(valor)
+    
     def guardar_historico_actualizado(self, df_historico):
         """V1.4: Guarda el historico con verificaciones adicionales"""
         try:
             print("V1.4: Guardando historico con verificaciones...")
             
-            # Preparar datos con limpieza exhaustiva
-            df_sheets = self.preparar_dataframe_para_sheets(df_historico)
-            
-            # Verificación adicional antes de guardar
-            print("V1.4: Verificación final antes de guardar...")
-            total_nan = df_sheets.isna().sum().sum()
-            total_inf = 0
+            with fase(self.perfilador, 'serializacion'):
+                # Preparar datos con limpieza exhaustiva
+                df_sheets = self.preparar_dataframe_para_sheets(df_historico)
             
-            for col in df_sheets.columns:
-                if df_sheets[col].dtype in ['float64', 'int64']:
-                    total_inf += np.isinf(df_sheets[col]).sum()
+                # Verificación adicional antes de guardar
+                print("V1.4: Verificación final antes de guardar...")
+                total_nan = df_sheets.isna().sum().sum()
+                total_inf = 0
             
-            print(f"V1.4: Verificación - NaN: {total_nan}, Infinitos: {total_inf}")
-            
-            if total_nan > 0 or total_inf > 0:
-                print("V1.4: Aplicando limpieza final de emergencia...")
-                df_sheets = df_sheets.fillna('')
                 for col in df_sheets.columns:
                     if df_sheets[col].dtype in ['float64', 'int64']:
-                        df_sheets[col] = df_sheets[col].replace([np.inf, -np.inf], 0)
+                        total_inf += np.isinf(df_sheets[col]).sum()
+            
+                print(f"V1.4: Verificación - NaN: {total_nan}, Infinitos: {total_inf}")
+            
+                # Preparar datos para subir - CONVERSIÓN SEGURA (vectorizada, NaN/inf resueltos por columna)
+                headers = df_sheets.columns.values.tolist()
+                data_rows = self.serializar_para_sheets(df_sheets, limpieza_emergencia=(total_nan > 0 or total_inf > 0))
+            
+            with fase(self.perfilador, 'subida'):
+                if self.modo_escritura == 'incremental' and not self.reordenar_historico:
+                    # Solo celdas cambiadas + columna de hoy + filas nuevas, en un unico batch_update.
+                    # Si el esquema cambia, upload_dataframe_diff hace la reescritura completa
+                    df_filas = pd.DataFrame(data_rows, columns=headers, dtype=object)
+                    if self.gs_handler.upload_dataframe_diff(df_filas, "Data_Historico", key_column='ID_Unico_Coche',
+                                                             grid_actual=self.grid_historico):
+                        self.mostrar_volumen_subida()
+                        print(f"V1.4: EXITO - Historico guardado con {len(df_sheets)} coches (incremental)")
+                        return True
+                    print("ADVERTENCIA: Escritura incremental fallida - reescritura completa")
+            
+                # Crear o actualizar hoja Data_Historico
+                try:
+                    worksheet_historico = self.gs_handler.get_worksheet("Data_Historico")
+                    worksheet_historico.clear()
+                    print("V1.4: Hoja Data_Historico limpiada")
+                except gspread.WorksheetNotFound:
+                    worksheet_historico = self.gs_handler.add_worksheet(
+                        title="Data_Historico",
+                        rows=len(df_sheets) + 10,
+                        cols=len(df_sheets.columns) + 5
+                    )
+                    print("V1.4: Hoja Data_Historico creada")
             
-            # Abrir spreadsheet
-            spreadsheet = self.gs_handler.client.open_by_key(self.sheet_id)
+                all_data = [headers] + data_rows
             
-            # Crear o actualizar hoja Data_Historico
-            try:
-                worksheet_historico = spreadsheet.worksheet("Data_Historico")
-                worksheet_historico.clear()
-                print("V1.4: Hoja Data_Historico limpiada")
-            except:
-                worksheet_historico = spreadsheet.add_worksheet(
-                    title="Data_Historico",
-                    rows=len(df_sheets) + 10,
-                    cols=len(df_sheets.columns) + 5
-                )
-                print("V1.4: Hoja Data_Historico creada")
-            
-            # Preparar datos para subir - CONVERSIÓN SEGURA
-            headers = df_sheets.columns.values.tolist()
-            
-            # Convertir datos a formato seguro para Google Sheets
-            data_rows = []
-            for _, row in df_sheets.iterrows():
-                safe_row = []
-                for value in row:
-                    if pd.isna(value):
-                        safe_row.append('')
-                    elif isinstance(value, (int, float)):
-                        if np.isinf(value) or np.isnan(value):
-                            safe_row.append(0)
-                        else:
-                            safe_row.append(value)
-                    else:
-                        safe_row.append(str(value))
-                data_rows.append(safe_row)
-            
-            all_data = [headers] + data_rows
-            
-            # Subir datos
-            worksheet_historico.update(all_data)
+                # Subir datos
+                self.gs_handler.ajustar_hoja(worksheet_historico, len(all_data), len(headers))
+                worksheet_historico.update(all_data)
             
             print(f"V1.4: EXITO - Historico guardado con {len(df_sheets)} coches")
             columnas_precio = len([col for col in headers if col.startswith('Precio_')])
@@ -868,6 +1059,16 @@ class AnalizadorHistoricoCoches:
             print(f"ERROR V1.4 guardando historico: {str(e)}")
             return False
     
+    def mostrar_volumen_subida(self):
+        """Muestra las celdas enviadas en la ultima subida frente a reescribir la hoja entera"""
+        stats = self.gs_handler.last_upload_stats
+        if not stats or not stats.get('celdas_totales'):
+            return
+        porcentaje = stats['celdas_enviadas'] / stats['celdas_totales'] * 100
+        print(f"V1.4: Subida {stats['modo']}: {stats['celdas_enviadas']:,} de {stats['celdas_totales']:,} "
+              f"celdas ({porcentaje:.1f}%), {stats['filas_modificadas']} filas modificadas, "
+              f"{stats['filas_nuevas']} nuevas")
+    
     def mostrar_resumen_final(self):
         """Muestra el resumen final"""
         tiempo_total = (datetime.now() - self.tiempo_inicio).total_seconds()
@@ -883,13 +1084,24 @@ class AnalizadorHistoricoCoches:
         print(f"Coches actualizados: {self.stats['coches_actualizados']:,}")
         print(f"Coches vendidos: {self.stats['coches_vendidos']:,}")
         print(f"Errores procesamiento: {self.stats['errores']:,}")
+        if self.usar_almacen_eventos:
+            print(f"Eventos de precio escritos: {self.stats['eventos_precio']:,}")
         print(f"Tiempo ejecucion: {tiempo_total:.2f} segundos")
+        print(f"Lectura SCR-J1/J2: {self.stats['lectura_scr_segundos']:.2f} segundos "
+              f"(pico {self.stats['lectura_scr_pico_mb']:.1f} MB)")
+        if self.gs_handler:
+            self.gs_handler.print_cache_report()
         
-        if self.cambios_precio:
-            print(f"\nCAMBIOS DE PRECIO DETECTADOS: {len(self.cambios_precio)}")
-            for cambio in self.cambios_precio[:3]:
-                print(f"  {cambio['Marca']} {cambio['Modelo']} - {cambio['Vendedor']}")
-                print(f"    {cambio['Precio_Anterior']} -> {cambio['Precio_Nuevo']}")
+        if self.df_cambios_precio is not None and not self.df_cambios_precio.empty:
+            df_cambios = self.df_cambios_precio
+            bajadas = int((df_cambios['Diferencia'] < 0).sum())
+            print(f"\nCAMBIOS DE PRECIO SIGNIFICATIVOS: {len(df_cambios)} "
+                  f"({bajadas} bajadas, {len(df_cambios) - bajadas} subidas; "
+                  f"umbral {PRECIO_CAMBIO_MINIMO} EUR o {CAMBIO_PORCENTAJE_SIGNIFICATIVO}%)")
+            mayores = df_cambios.loc[df_cambios['Variacion_Pct'].abs().sort_values(ascending=False).index]
+            for cambio in mayores.head(TOP_CAMBIOS_RESUMEN).itertuples(index=False):
+                print(f"  {cambio.Marca} {cambio.Modelo} - {cambio.Vendedor} ({cambio.Fecha})")
+                print(f"    {cambio.Precio_Anterior} -> {cambio.Precio_Nuevo} EUR ({cambio.Variacion_Pct:+.1f}%)")
         
         print(f"\nNueva columna: Precio_{self.fecha_display}")
         print("CORRECCION V1.4 - ORDEN MARCA ALFABÉTICO:")
@@ -907,31 +1119,26 @@ class AnalizadorHistoricoCoches:
             if not self.inicializar_google_sheets():
                 return False
             
-            # 2. Leer datos unificados del scraper
-            df_nuevo = self.leer_datos_scraper_unificados()
-            
-            # 3. Mostrar header
-            self.mostrar_header()
-            
-            # 4. Procesar segun si es primera vez o no
-            df_historico_existente = self.leer_historico_existente()
-            
-            if df_historico_existente is None:
-                # Primera ejecucion
-                df_historico_final = self.primera_ejecucion(df_nuevo)
+            # 2-4. Backfill: todos los snapshots pendientes en orden, una sola escritura
+            if self.modo_backfill:
+                df_historico_final = self.ejecutar_backfill()
+                if df_historico_final is False:
+                    print("BACKFILL: Historico sin cambios")
+                    return True
             else:
-                # Actualizar historico existente
-                df_historico_final = self.procesar_coches_nuevos_y_existentes(df_nuevo, df_historico_existente)
-            
-            self.stats['total_historico'] = len(df_historico_final)
+                df_historico_final = self.ejecutar_dia()
             
             # 5. Guardar historico actualizado
-            success = self.guardar_historico_actualizado(df_historico_final)
-            
-            if not success:
+            if df_historico_final is None:
+                print("SQLITE: Exportacion a Data_Historico desactivada")
+            elif not self.guardar_historico_actualizado(df_historico_final):
                 print("ERROR: No se pudo guardar el historico")
                 return False
             
+            # 5b. Registro de cambios de precio y analitica de esta ejecucion
+            self.guardar_cambios_precio()
+            self.publicar_analitica()
+            
             # 6. Mostrar resumen final
             self.mostrar_resumen_final()
             return True
@@ -944,6 +1151,194 @@ class AnalizadorHistoricoCoches:
             traceback.print_exc()
             
             return False
+        
+        finally:
+            if self.perfilador:
+                try:
+                    self.perfilador.guardar()
+                except Exception as e:
+                    print(f"AVISO: No se pudieron guardar los perfiles: {e}")
+    
+    def ejecutar_dia(self):
+        """Ejecucion diaria: snapshot SCR de hoy sobre el historico (devuelve el historico a guardar)"""
+        # 2. Leer datos unificados del scraper
+        with fase(self.perfilador, 'lectura_scr'):
+            df_nuevo = self.leer_datos_scraper_unificados()
+        
+        # 3. Mostrar header
+        self.mostrar_header()
+        
+        # 4. Procesar segun si es primera vez o no
+        if self.fuente_historico == 'sqlite':
+            # Base de datos local como fuente de verdad; Data_Historico es solo una vista
+            with fase(self.perfilador, 'diff_historico'):
+                return self.procesar_historico_sqlite(df_nuevo)
+        
+        with fase(self.perfilador, 'lectura_historico'):
+            df_historico_existente = self.leer_historico_existente()
+        
+        with fase(self.perfilador, 'diff_historico'):
+            if df_historico_existente is None:
+                # Primera ejecucion
+                df_historico_final = self.primera_ejecucion(df_nuevo)
+            else:
+                # Actualizar historico existente
+                df_historico_final = self.procesar_coches_nuevos_y_existentes(df_nuevo, df_historico_existente)
+        
+        self.stats['total_historico'] = len(df_historico_final)
+        self.analizar_historico(df_historico_final, [self.fecha_display])
+        
+        # 4b. Almacen de precios en formato largo (opcional)
+        if self.usar_almacen_eventos:
+            df_historico_final = self.actualizar_almacen_precios(df_historico_final)
+        return df_historico_final
+    
+    def fijar_fecha(self, fecha):
+        """Fecha del snapshot que se esta aplicando (columna Precio_dd/mm/yyyy)"""
+        self.fecha_actual = fecha
+        self.fecha_display = fecha.strftime("%d/%m/%Y")
+        self.fecha_str = fecha.strftime("%Y%m%d")
+    
+    def rango_backfill(self, fechas_procesadas):
+        """
+        Rango (desde, hasta) de fechas a aplicar
+        
+        Solo se aplican fechas posteriores a la ultima ya procesada: un
+        snapshot antiguo aplicado despues marcaria como vendidos coches que
+        siguen activos.
+        """
+        fecha_desde = datetime.strptime(self.backfill_desde, "%d/%m/%Y") if self.backfill_desde else None
+        fecha_hasta = datetime.strptime(self.backfill_hasta, "%d/%m/%Y") if self.backfill_hasta else datetime.now()
+        if fechas_procesadas:
+            siguiente = max(fechas_procesadas) + timedelta(days=1)
+            if fecha_desde is not None and fecha_desde < siguiente:
+                print(f"ADVERTENCIA BACKFILL: Fechas anteriores a {siguiente.strftime('%d/%m/%Y')} "
+                      f"ya estan cubiertas por el historico y se omiten")
+            fecha_desde = siguiente if fecha_desde is None else max(fecha_desde, siguiente)
+        return fecha_desde, fecha_hasta
+    
+    def leer_snapshot(self, snapshot):
+        """Lee un dia de backfill desde sus hojas SCR o, si ya no existen, desde los Excel archivados"""
+        if snapshot['hojas']:
+            print(f"Leyendo hojas: {snapshot['hojas']}")
+            df_dia = self.leer_hojas_scraper(snapshot['hojas'])
+        else:
+            print(f"Leyendo Excel archivados: {[os.path.basename(ruta) for ruta in snapshot['archivos']]}")
+            df_dia = leer_archivos_excel(snapshot['archivos'])
+        if df_dia is None:
+            return None
+        return self.preparar_snapshot(df_dia)
+    
+    def ejecutar_backfill(self):
+        """
+        Aplica en orden cronologico todos los snapshots pendientes del rango BACKFILL_DESDE-BACKFILL_HASTA
+        
+        Solo hay un dia del scraper en memoria cada vez. El historico se
+        escribe una sola vez al final (devuelve el historico a guardar, None
+        si no hay que exportarlo o False si no habia nada pendiente).
+        """
+        print("BACKFILL: Buscando snapshots del scraper pendientes...")
+        
+        if self.fuente_historico == 'sqlite':
+            print(f"SQLITE: Historico local en {self.ruta_sqlite}")
+            historico = HistoricoSQLite(self.ruta_sqlite)
+            try:
+                if historico.vacio():
+                    df_historico_sheets = self.leer_historico_existente()
+                    if df_historico_sheets is not None:
+                        importados = historico.importar_historico_ancho(df_historico_sheets)
+                        print(f"SQLITE: Importados {importados:,} coches desde Data_Historico")
+                else:
+                    migrados = historico.migrar_ids()
+                    if migrados:
+                        print(f"SQLITE: {migrados:,} coches migrados a URL canonica / numero de anuncio")
+                fechas_procesadas = [datetime.strptime(fecha, "%Y-%m-%d") for fecha in historico.fechas_ejecucion()]
+                snapshots = self.descubrir_pendientes(fechas_procesadas)
+                if not snapshots:
+                    return False
+                
+                fechas_aplicadas = []
+                for snapshot in snapshots:
+                    with fase(self.perfilador, 'lectura_scr'):
+                        df_dia = self.iniciar_dia_backfill(snapshot)
+                    if df_dia is not None:
+                        with fase(self.perfilador, 'diff_historico'):
+                            self.aplicar_snapshot_sqlite(historico, df_dia)
+                        fechas_aplicadas.append(self.fecha_display)
+                    del df_dia
+                
+                if fechas_aplicadas:
+                    self.analizar_historico_sqlite(historico, fechas_aplicadas)
+                return self.exportar_vista_sqlite(historico)
+            finally:
+                historico.cerrar()
+        
+        with fase(self.perfilador, 'lectura_historico'):
+            df_historico = self.leer_historico_existente()
+        fechas_procesadas = []
+        if df_historico is not None:
+            for col in self.obtener_columnas_precios_fechas(df_historico):
+                try:
+                    fechas_procesadas.append(datetime.strptime(col.replace('Precio_', ''), "%d/%m/%Y"))
+                except ValueError:
+                    continue
+        if self.usar_almacen_eventos:
+            # Con ventana de fechas las columnas antiguas solo estan en el almacen
+            fechas_procesadas.extend(AlmacenEventosPrecio.cargar(self.gs_handler).fechas_ejecucion())
+        
+        snapshots = self.descubrir_pendientes(fechas_procesadas)
+        if not snapshots:
+            return False
+        
+        fechas_aplicadas = []
+        for snapshot in snapshots:
+            with fase(self.perfilador, 'lectura_scr'):
+                df_dia = self.iniciar_dia_backfill(snapshot)
+            if df_dia is None:
+                continue
+            with fase(self.perfilador, 'diff_historico'):
+                if df_historico is None:
+                    df_historico = self.primera_ejecucion(df_dia)
+                else:
+                    df_historico = self.procesar_coches_nuevos_y_existentes(df_dia, df_historico)
+            # Mismo estado que tendria el historico releido de Sheets al dia siguiente
+            df_historico = df_historico.drop(columns=[col for col in COLUMNAS_SOLO_SNAPSHOT
+                                                      if col in df_historico.columns])
+            fechas_aplicadas.append(self.fecha_display)
+            del df_dia
+        
+        if df_historico is None:
+            print("BACKFILL: Ningun snapshot con datos - no hay nada que guardar")
+            return False
+        
+        self.stats['total_historico'] = len(df_historico)
+        self.analizar_historico(df_historico, fechas_aplicadas)
+        if self.usar_almacen_eventos and fechas_aplicadas:
+            df_historico = self.actualizar_almacen_precios(df_historico, fechas_nuevas=fechas_aplicadas)
+        print(f"BACKFILL: {len(fechas_aplicadas)} dias aplicados ({', '.join(fechas_aplicadas)})")
+        return df_historico
+    
+    def descubrir_pendientes(self, fechas_procesadas):
+        """Snapshots (hojas SCR / Excel archivados) pendientes dentro del rango de backfill"""
+        fecha_desde, fecha_hasta = self.rango_backfill(fechas_procesadas)
+        snapshots = descubrir_snapshots(self.gs_handler.list_worksheet_titles(), self.carpeta_archivos,
+                                        fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+                                        fechas_procesadas=fechas_procesadas)
+        if not snapshots:
+            print("BACKFILL: No hay snapshots pendientes en el rango indicado")
+        else:
+            print(f"BACKFILL: {len(snapshots)} dias pendientes: "
+                  f"{', '.join(s['fecha'].strftime('%d/%m/%Y') for s in snapshots)}")
+        return snapshots
+    
+    def iniciar_dia_backfill(self, snapshot):
+        """Fija la fecha del snapshot y lo lee preparado (None si el dia no tiene datos)"""
+        self.fijar_fecha(snapshot['fecha'])
+        print(f"\n{'-'*80}\nBACKFILL: Aplicando {self.fecha_display}")
+        df_dia = self.leer_snapshot(snapshot)
+        if df_dia is None:
+            print(f"ADVERTENCIA BACKFILL: {self.fecha_display} sin datos - se omite")
+        return df_dia
 
 def main():
     """Funcion principal del analizador"""
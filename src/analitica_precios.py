@@ -0,0 +1,193 @@
+"""
+===============================================================================
+             ANALITICA PRECIOS · MATRIZ INT32 COCHES x FECHAS
+===============================================================================
+
+Descripción:
+    Carga las columnas Precio_dd/mm/yyyy de Data_Historico en una matriz
+    densa int32 (coches x fechas, SIN_PRECIO donde no había anuncio) con
+    arrays de índices por vendedor y marca. Sobre ella calcula con NumPy
+    los días en mercado, las bajadas de precio antes de la venta y el
+    descuento acumulado, y los resume por vendedor y por marca en hojas
+    pequeñas (Analitica_Vendedores y Analitica_Marcas).
+
+Funcionalidades principales:
+    • Matriz int32 construida columna a columna: cada texto de precio
+      distinto se parsea una sola vez para todo el histórico.
+    • Métricas por coche sin bucles por fila (una pasada por fecha sobre
+      vectores de todos los coches).
+    • Agregados por grupo con bincount y medianas por ordenación.
+    • Pensado para 100k coches x 365 fechas (~140 MB de matriz).
+
+Uso:
+    matriz = MatrizPrecios.desde_historico(df_historico)
+    resumenes = resumen_por_grupos(matriz)
+    publicar_resumenes(gs_handler, resumenes)
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from cambios_precio import columnas_precio_ordenadas
+from esquema_datos import parsear_precio
+
+SIN_PRECIO = 0  # Celda sin anuncio o con precio no valido
+HOJAS_ANALITICA = {'Vendedor': "Analitica_Vendedores", 'Marca': "Analitica_Marcas"}
+FORMATO_FECHA = "%d/%m/%Y"
+
+class MatrizPrecios:
+    """Precios del historico como matriz int32 con indices de coche, fecha, vendedor y marca"""
+
+    def __init__(self, precios, fechas, ids, grupos, vendido):
+        self.precios = precios      # int32 (coches x fechas), SIN_PRECIO = sin anuncio
+        self.fechas = fechas        # datetime64[D] por columna, orden cronologico
+        self.ids = ids              # ID_Unico_Coche por fila
+        self.grupos = grupos        # {'Vendedor': (codigos int32, nombres), 'Marca': ...}
+        self.vendido = vendido      # bool por fila (Estado == 'vendido')
+
+    @classmethod
+    def desde_historico(cls, df_historico):
+        """Construye la matriz a partir de un DataFrame con el formato de Data_Historico"""
+        columnas = columnas_precio_ordenadas(df_historico)
+        precios = np.full((len(df_historico), len(columnas)), SIN_PRECIO, dtype=np.int32)
+
+        # Cache texto -> precio compartida por todas las columnas (los precios se repiten mucho)
+        parseados = {}
+        for j, col in enumerate(columnas):
+            codigos, unicos = pd.factorize(df_historico[col], use_na_sentinel=True)
+            nuevos = [texto for texto in unicos if texto not in parseados]
+            if nuevos:
+                valores, en_rango, _ = parsear_precio(pd.Series(nuevos, dtype=object))
+                validos = valores.where(en_rango).fillna(SIN_PRECIO).astype('int64')
+                parseados.update(zip(nuevos, validos.tolist()))
+            tabla = np.array([parseados[texto] for texto in unicos] + [SIN_PRECIO], dtype=np.int32)
+            precios[:, j] = tabla[codigos]
+
+        fechas = np.array([datetime.strptime(col[len('Precio_'):], FORMATO_FECHA) for col in columnas],
+                          dtype='datetime64[D]')
+        grupos = {}
+        for columna in HOJAS_ANALITICA:
+            if columna in df_historico.columns:
+                codigos, nombres = pd.factorize(df_historico[columna].astype(str), use_na_sentinel=False)
+            else:
+                codigos, nombres = np.zeros(len(df_historico), dtype=np.int64), pd.Index(['No especificado'])
+            grupos[columna] = (codigos.astype(np.int32), np.asarray(nombres, dtype=object))
+        if 'Estado' in df_historico.columns:
+            vendido = (df_historico['Estado'].astype(str) == 'vendido').to_numpy()
+        else:
+            vendido = np.zeros(len(df_historico), dtype=bool)
+        return cls(precios, fechas, df_historico['ID_Unico_Coche'].to_numpy(dtype=object), grupos, vendido)
+
+    @property
+    def memoria_mb(self):
+        return self.precios.nbytes / 1024 / 1024
+
+    def metricas_por_coche(self):
+        """
+        Metricas de cada coche a partir de la matriz
+
+        Returns:
+            dict de arrays alineados con las filas: con_precio, dias_mercado,
+            bajadas, precio_inicial, precio_final, descuento_pct
+        """
+        n_coches, n_fechas = self.precios.shape
+        if n_fechas == 0:
+            ceros = np.zeros(n_coches, dtype=np.int32)
+            return {'con_precio': np.zeros(n_coches, dtype=bool), 'dias_mercado': ceros, 'bajadas': ceros,
+                    'precio_inicial': ceros, 'precio_final': ceros, 'descuento_pct': np.zeros(n_coches)}
+
+        presente = self.precios != SIN_PRECIO
+        con_precio = presente.any(axis=1)
+        primera = presente.argmax(axis=1)
+        ultima = n_fechas - 1 - presente[:, ::-1].argmax(axis=1)
+        del presente
+        dias = self.fechas.astype('int64')
+        dias_mercado = np.where(con_precio, dias[ultima] - dias[primera] + 1, 0)
+
+        # Bajadas contra el ultimo precio conocido: una pasada por fecha sobre todos los coches
+        bajadas = np.zeros(n_coches, dtype=np.int32)
+        ultimo_precio = np.full(n_coches, SIN_PRECIO, dtype=np.int32)
+        for j in range(n_fechas):
+            columna = self.precios[:, j]
+            vista = columna != SIN_PRECIO
+            bajadas += vista & (ultimo_precio != SIN_PRECIO) & (columna < ultimo_precio)
+            np.copyto(ultimo_precio, columna, where=vista)
+
+        precio_inicial = self.precios[np.arange(n_coches), primera]
+        precio_final = ultimo_precio
+        with np.errstate(divide='ignore', invalid='ignore'):
+            descuento = np.where(con_precio, (precio_inicial - precio_final) / precio_inicial * 100, 0.0)
+        return {'con_precio': con_precio, 'dias_mercado': dias_mercado, 'bajadas': bajadas,
+                'precio_inicial': precio_inicial, 'precio_final': precio_final, 'descuento_pct': descuento}
+
+def _media_por_grupo(codigos, valores, mascara, n_grupos):
+    """Media de valores[mascara] por grupo (0 si el grupo no tiene valores)"""
+    cuenta = np.bincount(codigos[mascara], minlength=n_grupos)
+    suma = np.bincount(codigos[mascara], weights=valores[mascara], minlength=n_grupos)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(cuenta > 0, suma / np.maximum(cuenta, 1), 0.0)
+
+def _mediana_por_grupo(codigos, valores, mascara, n_grupos):
+    """Mediana de valores[mascara] por grupo ordenando una sola vez (0 si el grupo no tiene valores)"""
+    codigos, valores = codigos[mascara], valores[mascara].astype('float64')
+    orden = np.lexsort((valores, codigos))
+    codigos, valores = codigos[orden], valores[orden]
+    cuenta = np.bincount(codigos, minlength=n_grupos)
+    inicio = np.concatenate(([0], np.cumsum(cuenta)[:-1]))
+    medianas = np.zeros(n_grupos)
+    hay = cuenta > 0
+    bajo = inicio[hay] + (cuenta[hay] - 1) // 2
+    alto = inicio[hay] + cuenta[hay] // 2
+    medianas[hay] = (valores[bajo] + valores[alto]) / 2
+    return medianas
+
+def resumen_por_grupos(matriz, metricas=None):
+    """
+    Resumen por vendedor y por marca
+
+    Returns:
+        {'Vendedor': DataFrame, 'Marca': DataFrame} con coches, vendidos, dias
+        en mercado de los vendidos, bajadas antes de la venta y descuentos
+    """
+    if metricas is None:
+        metricas = matriz.metricas_por_coche()
+    con_precio = metricas['con_precio']
+    vendidos = matriz.vendido & con_precio
+    con_bajada = metricas['bajadas'] > 0
+
+    resumenes = {}
+    for nombre_grupo, (codigos, nombres) in matriz.grupos.items():
+        n = len(nombres)
+        coches = np.bincount(codigos[con_precio], minlength=n)
+        n_vendidos = np.bincount(codigos[vendidos], minlength=n)
+        n_con_bajada = np.bincount(codigos[con_precio & con_bajada], minlength=n)
+        df = pd.DataFrame({
+            nombre_grupo: nombres,
+            'Coches': coches,
+            'Vendidos': n_vendidos,
+            'Activos': coches - n_vendidos,
+            'Dias_Mercado_Medio_Vendidos': _media_por_grupo(codigos, metricas['dias_mercado'], vendidos, n).round(1),
+            'Dias_Mercado_Mediana_Vendidos': _mediana_por_grupo(codigos, metricas['dias_mercado'], vendidos, n),
+            'Bajadas_Medias_Antes_Venta': _media_por_grupo(codigos, metricas['bajadas'], vendidos, n).round(2),
+            'Coches_Con_Bajada_Pct': np.round(n_con_bajada / np.maximum(coches, 1) * 100, 1),
+            'Descuento_Mediano_Pct': _mediana_por_grupo(codigos, metricas['descuento_pct'],
+                                                        con_precio & con_bajada, n).round(1),
+            'Precio_Mediano_Actual': _mediana_por_grupo(codigos, metricas['precio_final'].astype('float64'),
+                                                        con_precio & ~matriz.vendido, n).round(0),
+        })
+        resumenes[nombre_grupo] = (df[df['Coches'] > 0]
+                                   .sort_values(['Coches', nombre_grupo], ascending=[False, True])
+                                   .reset_index(drop=True))
+    return resumenes
+
+def publicar_resumenes(gs_handler, resumenes):
+    """Reescribe las hojas Analitica_Vendedores / Analitica_Marcas (una subida por hoja)"""
+    for nombre_grupo, df in resumenes.items():
+        gs_handler.upload_dataframe(df, HOJAS_ANALITICA[nombre_grupo], mode="full")
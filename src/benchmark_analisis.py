@@ -0,0 +1,804 @@
+"""
+===============================================================================
+                 BENCHMARK ANALISIS · WALLAPOP SCRAPER
+===============================================================================
+
+Descripción:
+    Mide la ejecución completa de AnalizadorHistoricoCoches contra el
+    backend en memoria (fake_sheets) con datos sintéticos, sin credenciales
+    ni acceso a Google Sheets.
+
+Uso:
+    python benchmark_analisis.py                 # 5k, 50k y 200k filas
+    python benchmark_analisis.py 5000 --latencia 0.05
+    python benchmark_analisis.py --join 100000   # join existentes/vendidos vs bucle por URL
+    python benchmark_analisis.py --nuevos 50000  # alta de 1.000 coches nuevos vs concat por fila
+    python benchmark_analisis.py --eventos 100000 --dias 60  # almacen de eventos vs columnas Precio_
+    python benchmark_analisis.py --sqlite 100000  # snapshot aplicado sobre el historico SQLite local
+    python benchmark_analisis.py --lectura 20000 --latencia 0.3  # lectura SCR-J1/J2 agrupada vs get_all_records
+    python benchmark_analisis.py --ids 100000    # ID_Unico_Coche vectorizado vs MD5 por fila
+    python benchmark_analisis.py --cambios 50000 # registro de cambios de precio vs comparacion por fila
+    python benchmark_analisis.py --analitica 100000 --dias 365  # matriz int32 y resumen por vendedor/marca
+    python benchmark_analisis.py --duplicados 50000  # indice de duplicados entre vendedores vs todos los pares
+    python benchmark_analisis.py --suite --salida base.json      # rutas criticas a 5k/50k/500k filas
+    python benchmark_analisis.py --suite 5000 50000 --base base.json --tolerancia 0.3  # avisa regresiones
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from fake_sheets import FakeSheetsClient
+from google_sheets_uploader import GoogleSheetsUploader
+from analisis_coches import AnalizadorHistoricoCoches
+from almacen_precios import AlmacenEventosPrecio
+from historico_sqlite import HistoricoSQLite
+from identificador_coches import crear_ids_unicos
+from cambios_precio import detectar_cambios
+from analitica_precios import MatrizPrecios, resumen_por_grupos
+from esquema_datos import cambio_significativo, parsear_precio, precio_en_rango, precio_texto
+from datos_sinteticos import (PRIMER_ITEM_ID, formatear_euros, formatear_km, generar_escenario,
+                              generar_textos_precio, generar_titulos)
+from duplicados import COLUMNA_GRUPO, anuncio_comparable, marcar_duplicados, normalizar_texto, son_duplicados
+
+SHEET_ID_BENCHMARK = "benchmark"
+TAMANOS_HISTORICO = [5000, 50000, 200000]
+TAMANOS_SUITE = [5000, 50000, 500000]
+DIAS_SUITE = 60
+MAX_FILAS_POR_FILA = 20000    # Las rutas fila a fila se miden sobre como mucho estas filas
+TOLERANCIA_REGRESION = 0.25   # us/fila por encima de 1.25x la base = regresion
+MIN_SEGUNDOS_REGRESION = 0.01 # Casos mas rapidos que esto son ruido y no se comparan
+
+def _escribir_hoja(spreadsheet, titulo, df):
+    worksheet = spreadsheet.add_worksheet(title=titulo, rows=len(df) + 10, cols=len(df.columns) + 2)
+    worksheet._escribir(0, 0, [df.columns.tolist()] + df.values.tolist())
+
+def preparar_backend(df_historico, df_snapshot, fecha, latencia=0.0, prob_error_cuota=0.0):
+    """Crea un FakeSheetsClient con Data_Historico y las hojas SCR-J1/J2 del dia"""
+    client = FakeSheetsClient(latencia=latencia, prob_error_cuota=prob_error_cuota, semilla=1)
+    spreadsheet = client.open_by_key(SHEET_ID_BENCHMARK)
+    mitad = len(df_snapshot) // 2
+    fecha_corta = fecha.strftime("%d/%m/%y")
+    _escribir_hoja(spreadsheet, f"SCR-J1 {fecha_corta}", df_snapshot.iloc[:mitad])
+    _escribir_hoja(spreadsheet, f"SCR-J2 {fecha_corta}", df_snapshot.iloc[mitad:])
+    if df_historico is not None:
+        _escribir_hoja(spreadsheet, "Data_Historico", df_historico)
+    client.llamadas.clear()
+    return client
+
+def benchmark_analizador(n_historico, n_dias=30, latencia=0.0):
+    """Ejecuta el analizador completo sobre el backend en memoria y devuelve las metricas"""
+    df_historico, df_snapshot, fecha = generar_escenario(n_historico, n_dias=n_dias)
+    client = preparar_backend(df_historico, df_snapshot, fecha, latencia=latencia)
+    uploader = GoogleSheetsUploader(sheet_id=SHEET_ID_BENCHMARK, client=client)
+    analizador = AnalizadorHistoricoCoches(gs_handler=uploader)
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        exito = analizador.ejecutar()
+    duracion = time.perf_counter() - inicio
+
+    return {
+        'filas_historico': n_historico,
+        'filas_snapshot': len(df_snapshot),
+        'exito': exito,
+        'segundos': duracion,
+        'llamadas_api': client.total_llamadas(),
+    }
+
+def _procesar_existentes_y_vendidos_por_url(analizador, df_actualizado, df_nuevo, urls_existentes,
+                                            urls_vendidos, col_precio_hoy):
+    """Implementacion anterior (una mascara por URL), solo como referencia del benchmark"""
+    for url_coche in urls_existentes:
+        fila_nueva = df_nuevo[df_nuevo['URL'] == url_coche].iloc[0]
+        precio_nuevo = str(fila_nueva['Precio_Contado'])
+        mask = df_actualizado['URL'] == url_coche
+        df_actualizado.loc[mask, col_precio_hoy] = precio_nuevo
+        df_actualizado.loc[mask, 'Estado'] = 'activo'
+        analizador.stats['coches_actualizados'] += 1
+
+    for url_coche in urls_vendidos:
+        mask = df_actualizado['URL'] == url_coche
+        if mask.any() and df_actualizado.loc[mask, 'Estado'].iloc[0] == 'activo':
+            df_actualizado.loc[mask, 'Estado'] = 'vendido'
+            df_actualizado.loc[mask, 'Fecha_Venta'] = analizador.fecha_display
+            fila_vendida = df_actualizado.loc[mask].iloc[0]
+            analizador.coches_vendidos_lista.append({
+                'Marca': fila_vendida['Marca'], 'Modelo': fila_vendida['Modelo'],
+                'Vendedor': fila_vendida['Vendedor']
+            })
+            analizador.stats['coches_vendidos'] += 1
+
+def _entradas_join(n_historico, n_dias):
+    """Prepara historico, snapshot y conjuntos de URLs tal y como los ve procesar_coches_nuevos_y_existentes"""
+    df_historico, df_snapshot, fecha = generar_escenario(n_historico, n_dias=n_dias)
+    with contextlib.redirect_stdout(io.StringIO()):
+        analizador = AnalizadorHistoricoCoches()
+        df_nuevo = analizador.validar_estructura_archivo(df_snapshot.copy())
+        analizador.fecha_display = fecha.strftime("%d/%m/%Y")
+        df_nuevo['ID_Unico_Coche'] = crear_ids_unicos(df_nuevo)
+    ids_historico = set(df_historico['ID_Unico_Coche'])
+    ids_nuevos = set(df_nuevo['ID_Unico_Coche'])
+    return df_historico, df_nuevo, ids_nuevos & ids_historico, ids_historico - ids_nuevos, analizador.fecha_display
+
+def _urls_de(df_historico, ids):
+    """URLs de un conjunto de IDs (el bucle de referencia trabaja por URL)"""
+    url_por_id = df_historico.drop_duplicates('ID_Unico_Coche').set_index('ID_Unico_Coche')['URL']
+    return [url_por_id[id_coche] for id_coche in ids]
+
+def _nuevo_analizador(fecha_display):
+    analizador = AnalizadorHistoricoCoches()
+    analizador.fecha_display = fecha_display
+    return analizador
+
+def benchmark_join(n_historico, n_dias=30, muestra_por_url=2000):
+    """
+    Compara el join indexado con el bucle por URL en los coches existentes y vendidos
+
+    El bucle por URL tiene coste constante por URL, asi que se mide sobre una muestra
+    de URLs y se extrapola al total. La equivalencia de resultados se comprueba
+    completa sobre un historico pequeño (ver verificar_join).
+    """
+    df_historico, df_nuevo, existentes, vendidos, fecha_display = _entradas_join(n_historico, n_dias)
+    col_hoy = f"Precio_{fecha_display}"
+
+    analizador = _nuevo_analizador(fecha_display)
+    df = df_historico.copy()
+    df[col_hoy] = ''
+    inicio = time.perf_counter()
+    df_nuevo_por_id = df_nuevo.drop_duplicates('ID_Unico_Coche', keep='first').set_index('ID_Unico_Coche')
+    analizador.actualizar_coches_existentes(df, df_nuevo_por_id, existentes, col_hoy)
+    analizador.marcar_coches_vendidos(df, vendidos)
+    t_join = time.perf_counter() - inicio
+
+    rng = random.Random(7)
+    total = len(existentes) + len(vendidos)
+    n_muestra = min(muestra_por_url, total)
+    muestra_existentes = rng.sample(sorted(existentes), min(len(existentes), n_muestra * len(existentes) // total))
+    muestra_vendidos = rng.sample(sorted(vendidos), n_muestra - len(muestra_existentes))
+    df = df_historico.copy()
+    df[col_hoy] = ''
+    inicio = time.perf_counter()
+    _procesar_existentes_y_vendidos_por_url(_nuevo_analizador(fecha_display), df, df_nuevo,
+                                            _urls_de(df_historico, muestra_existentes),
+                                            _urls_de(df_historico, muestra_vendidos), col_hoy)
+    t_bucle = (time.perf_counter() - inicio) * total / max(n_muestra, 1)
+
+    return {'filas_historico': n_historico, 'urls': total, 'segundos_join': t_join,
+            'segundos_bucle_estimado': t_bucle, 'aceleracion': t_bucle / t_join if t_join else float('inf')}
+
+def verificar_join(n_historico=3000, n_dias=10):
+    """Comprueba que el join indexado produce exactamente el mismo resultado que el bucle por URL"""
+    df_historico, df_nuevo, existentes, vendidos, fecha_display = _entradas_join(n_historico, n_dias)
+    col_hoy = f"Precio_{fecha_display}"
+
+    referencia = _nuevo_analizador(fecha_display)
+    df_ref = df_historico.copy()
+    df_ref[col_hoy] = ''
+    _procesar_existentes_y_vendidos_por_url(referencia, df_ref, df_nuevo, _urls_de(df_historico, existentes),
+                                            _urls_de(df_historico, vendidos), col_hoy)
+
+    vectorizado = _nuevo_analizador(fecha_display)
+    df_vec = df_historico.copy()
+    df_vec[col_hoy] = ''
+    df_nuevo_por_id = df_nuevo.drop_duplicates('ID_Unico_Coche', keep='first').set_index('ID_Unico_Coche')
+    vectorizado.actualizar_coches_existentes(df_vec, df_nuevo_por_id, existentes, col_hoy)
+    vectorizado.marcar_coches_vendidos(df_vec, vendidos)
+
+    pd.testing.assert_frame_equal(df_ref, df_vec)
+    clave = lambda d: tuple(sorted((k, str(v)) for k, v in d.items()))
+    assert sorted(map(clave, referencia.coches_vendidos_lista)) == sorted(map(clave, vectorizado.coches_vendidos_lista))
+    assert referencia.stats == vectorizado.stats
+    return True
+
+def _anadir_coches_nuevos_por_fila(analizador, df_actualizado, df_nuevo, urls_nuevas, columnas_precios, col_precio_hoy):
+    """Implementacion anterior (un pd.concat por coche nuevo), solo como referencia del benchmark"""
+    for url_nueva in urls_nuevas:
+        fila_nueva = df_nuevo[df_nuevo['URL'] == url_nueva].iloc[0]
+        nueva_fila = {
+            'ID_Unico_Coche': fila_nueva['ID_Unico_Coche'],
+            'Marca': str(fila_nueva['Marca']) if pd.notna(fila_nueva['Marca']) else 'No especificado',
+            'Modelo': str(fila_nueva['Modelo']) if pd.notna(fila_nueva['Modelo']) else 'No especificado',
+            'Vendedor': str(fila_nueva['Vendedor']) if pd.notna(fila_nueva['Vendedor']) else 'No especificado',
+            'Ano': str(fila_nueva['Ano']) if pd.notna(fila_nueva['Ano']) else 'No especificado',
+            'KM': str(fila_nueva['KM']) if pd.notna(fila_nueva['KM']) else 'No especificado',
+            'URL': str(fila_nueva['URL']),
+            'Primera_Deteccion': analizador.fecha_display,
+            'Estado': 'activo',
+            'Fecha_Venta': ''
+        }
+        for caracteristica in ['Tipo', 'Plazas', 'Puertas', 'Combustible', 'Potencia', 'Conduccion']:
+            if caracteristica in fila_nueva:
+                nueva_fila[caracteristica] = str(fila_nueva[caracteristica]) if pd.notna(fila_nueva[caracteristica]) else 'No especificado'
+        for col_precio in columnas_precios:
+            nueva_fila[col_precio] = ''
+        nueva_fila[col_precio_hoy] = str(fila_nueva['Precio_Contado'])
+        nueva_fila['KM_Numerico_Internal'] = fila_nueva.get('KM_Numerico_Internal', 0)
+        nueva_fila['Ano_Numerico_Internal'] = fila_nueva.get('Ano_Numerico_Internal', 0)
+        df_actualizado = pd.concat([df_actualizado, pd.DataFrame([nueva_fila])], ignore_index=True)
+        analizador.stats['coches_nuevos'] += 1
+    return df_actualizado
+
+def _entradas_nuevos(n_historico, n_nuevos, n_dias):
+    """Historico de n_historico filas y un snapshot con n_nuevos coches que no estan en el"""
+    df_historico, _, fecha = generar_escenario(n_historico, n_dias=n_dias)
+    # Otros numeros de anuncio para que no coincidan con el historico (a 2 dias siguen activos ~60 %)
+    _, df_snapshot, _ = generar_escenario(n_nuevos * 2, n_dias=2, semilla=99,
+                                          primer_id=PRIMER_ITEM_ID + 2 * n_historico)
+    df_snapshot = df_snapshot.head(n_nuevos).copy()
+    with contextlib.redirect_stdout(io.StringIO()):
+        analizador = AnalizadorHistoricoCoches()
+        df_nuevo = analizador.validar_estructura_archivo(df_snapshot)
+        df_nuevo['ID_Unico_Coche'] = crear_ids_unicos(df_nuevo)
+        df_nuevo = analizador.limpiar_datos_numericos(df_nuevo)
+    fecha_display = fecha.strftime("%d/%m/%Y")
+    col_hoy = f"Precio_{fecha_display}"
+    columnas_precios = analizador.obtener_columnas_precios_fechas(df_historico)
+    df_historico[col_hoy] = ''
+    return df_historico, df_nuevo, set(df_nuevo['ID_Unico_Coche']), columnas_precios, col_hoy, fecha_display
+
+def benchmark_nuevos(n_historico, n_nuevos=1000, n_dias=30):
+    """Compara el alta en bloque de coches nuevos con un pd.concat por coche (dia de gran entrada)"""
+    df_historico, df_nuevo, ids_nuevos, columnas_precios, col_hoy, fecha_display = _entradas_nuevos(n_historico, n_nuevos, n_dias)
+    urls_nuevas = set(df_nuevo['URL'])
+
+    analizador = _nuevo_analizador(fecha_display)
+    inicio = time.perf_counter()
+    df_nuevo_por_id = df_nuevo.drop_duplicates('ID_Unico_Coche', keep='first').set_index('ID_Unico_Coche')
+    df_bloque = analizador.construir_filas_coches_nuevos(df_nuevo_por_id, ids_nuevos, columnas_precios, col_hoy)
+    df_bloque = pd.concat([df_historico, df_bloque], ignore_index=True)
+    t_bloque = time.perf_counter() - inicio
+
+    referencia = _nuevo_analizador(fecha_display)
+    inicio = time.perf_counter()
+    df_ref = _anadir_coches_nuevos_por_fila(referencia, df_historico, df_nuevo, urls_nuevas, columnas_precios, col_hoy)
+    t_fila = time.perf_counter() - inicio
+
+    # Mismo contenido (el orden de alta del bucle dependia del orden de iteracion del set)
+    clave = lambda df: df.sort_values('URL').reset_index(drop=True)
+    pd.testing.assert_frame_equal(clave(df_ref)[df_bloque.columns], clave(df_bloque), check_dtype=False)
+    assert referencia.stats == analizador.stats
+
+    return {'filas_historico': n_historico, 'coches_nuevos': len(urls_nuevas), 'segundos_bloque': t_bloque,
+            'segundos_por_fila': t_fila, 'aceleracion': t_fila / t_bloque if t_bloque else float('inf')}
+
+def benchmark_eventos(n_historico, n_dias=30, ventana=7):
+    """Compara el tamaño del almacen de eventos con Data_Historico en formato ancho y mide el pivot"""
+    df_historico, _, _ = generar_escenario(n_historico, n_dias=n_dias)
+    columnas_precios = [col for col in df_historico.columns if col.startswith('Precio_')]
+
+    inicio = time.perf_counter()
+    almacen = AlmacenEventosPrecio.desde_historico_ancho(df_historico)
+    t_migracion = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    ancho = almacen.pivotar()
+    t_pivot = time.perf_counter() - inicio
+
+    fecha_ventana = columnas_precios[-ventana].replace('Precio_', '')
+    inicio = time.perf_counter()
+    almacen.pivotar(fecha_inicio=fecha_ventana)
+    t_ventana = time.perf_counter() - inicio
+
+    # La vista completa reconstruida debe coincidir celda a celda con el historico
+    ancho = ancho.reindex(df_historico['ID_Unico_Coche'])
+    assert (ancho[columnas_precios].values == df_historico[columnas_precios].values).all()
+
+    return {'filas_historico': n_historico, 'celdas_precio': len(df_historico) * len(columnas_precios),
+            'eventos': len(almacen.eventos), 'segundos_migracion': t_migracion,
+            'segundos_pivot': t_pivot, 'segundos_pivot_ventana': t_ventana, 'ventana': ventana}
+
+def benchmark_sqlite(n_historico, n_dias=30):
+    """Mide importacion, aplicacion del snapshot y exportacion de la vista con el historico SQLite"""
+    df_historico, df_snapshot, fecha = generar_escenario(n_historico, n_dias=n_dias)
+    with contextlib.redirect_stdout(io.StringIO()):
+        analizador = AnalizadorHistoricoCoches()
+        df_nuevo = analizador.validar_estructura_archivo(df_snapshot.copy())
+        df_nuevo['ID_Unico_Coche'] = crear_ids_unicos(df_nuevo)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        historico = HistoricoSQLite(os.path.join(carpeta, "historico.db"))
+        tiempos = {}
+
+        inicio = time.perf_counter()
+        historico.importar_historico_ancho(df_historico)
+        tiempos['importacion'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        resultado = historico.aplicar_snapshot(df_nuevo, fecha.strftime("%d/%m/%Y"))
+        tiempos['snapshot'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        df_vista = historico.exportar_vista()
+        tiempos['exportacion'] = time.perf_counter() - inicio
+        historico.cerrar()
+
+    return {'filas_historico': n_historico, 'filas_snapshot': len(df_nuevo), 'columnas_vista': len(df_vista.columns),
+            'nuevos': len(resultado['coches_nuevos']), 'vendidos': len(resultado['coches_vendidos']), **tiempos}
+
+def _leer_scr_por_registros(uploader, titulos):
+    """Lectura anterior (get_all_records hoja a hoja), solo como referencia del benchmark"""
+    dfs = []
+    for titulo in titulos:
+        registros = uploader.get_worksheet(titulo).get_all_records()
+        if registros:
+            dfs.append(pd.DataFrame(registros))
+    return pd.concat(dfs, ignore_index=True)
+
+def _leer_scr_agrupado(uploader, titulos):
+    analizador = AnalizadorHistoricoCoches(gs_handler=uploader)
+    valores = uploader.read_worksheets_values(titulos)
+    return pd.concat([analizador.construir_dataframe_scr(valores[titulo]) for titulo in titulos], ignore_index=True)
+
+def benchmark_lectura(n_snapshot, latencia=0.0):
+    """Compara tiempo, llamadas y pico de memoria al leer SCR-J1/J2 (get_all_records vs batchGet tipado)"""
+    # Se repite un snapshot de como mucho ~8k filas hasta n_snapshot filas
+    _, df_snapshot, fecha = generar_escenario(min(n_snapshot * 2, 20000), n_dias=2)
+    repeticiones = n_snapshot // len(df_snapshot) + 1
+    df_snapshot = pd.concat([df_snapshot] * repeticiones, ignore_index=True).head(n_snapshot)
+    fecha_corta = fecha.strftime("%d/%m/%y")
+    titulos = [f"SCR-J1 {fecha_corta}", f"SCR-J2 {fecha_corta}"]
+
+    resultados = {}
+    for nombre, lector in (('registros', _leer_scr_por_registros), ('agrupada', _leer_scr_agrupado)):
+        client = preparar_backend(None, df_snapshot, fecha, latencia=latencia)
+        with contextlib.redirect_stdout(io.StringIO()):
+            uploader = GoogleSheetsUploader(sheet_id=SHEET_ID_BENCHMARK, client=client)
+            uploader.list_worksheet_titles()
+        client.llamadas.clear()
+
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        df = lector(uploader, titulos)
+        duracion = time.perf_counter() - inicio
+        pico = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+        resultados[nombre] = {'segundos': duracion, 'pico_mb': pico, 'llamadas': client.total_llamadas(), 'filas': len(df)}
+
+    return resultados
+
+def _crear_id_por_fila(fila):
+    """Implementacion anterior (MD5 de la URL con df.apply por fila), solo como referencia del benchmark"""
+    url = str(fila.get('URL', '')).strip()
+    if url and url != 'No especificado':
+        return hashlib.md5(url.encode()).hexdigest()[:12]
+    clave = f"{fila.get('Vendedor', '')}_{fila.get('Marca', '')}_{fila.get('Modelo', '')}_{fila.get('KM', '')}"
+    return hashlib.md5(clave.encode()).hexdigest()[:12]
+
+def benchmark_ids(n_filas):
+    """Compara crear_ids_unicos (vectorizado) con el MD5 por fila sobre un snapshot de n_filas"""
+    _, df_snapshot, _ = generar_escenario(min(n_filas * 2, 20000), n_dias=2)
+    repeticiones = n_filas // len(df_snapshot) + 1
+    df = pd.concat([df_snapshot] * repeticiones, ignore_index=True).head(n_filas)
+    # Variantes de la misma URL que deben dar el mismo ID
+    variantes = pd.Series(['', '?ref=share', '/', '#fotos'])
+    df['URL'] = df['URL'] + variantes[(df.index // len(df_snapshot)) % len(variantes)].values
+
+    inicio = time.perf_counter()
+    ids_fila = df.apply(_crear_id_por_fila, axis=1)
+    t_fila = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    ids = crear_ids_unicos(df)
+    t_vectorizado = time.perf_counter() - inicio
+
+    assert ids.equals(crear_ids_unicos(df.copy()))
+    return {'filas': n_filas, 'segundos_por_fila': t_fila, 'segundos_vectorizado': t_vectorizado,
+            'ids_por_fila': ids_fila.nunique(), 'ids_vectorizado': ids.nunique(),
+            'aceleracion': t_fila / t_vectorizado if t_vectorizado else float('inf')}
+
+def _cambios_por_fila(df_historico, columnas_precios):
+    """Referencia celda a celda en Python puro (precio_texto + cambio_significativo, mismos umbrales)"""
+    cambios = set()
+    for fila in df_historico[['ID_Unico_Coche'] + columnas_precios].itertuples(index=False, name=None):
+        anterior = 0
+        for col, texto in zip(columnas_precios, fila[1:]):
+            precio = precio_texto(texto)
+            if precio is None or not precio_en_rango(precio):
+                continue
+            if cambio_significativo(anterior, precio):
+                cambios.add((fila[0], col.replace('Precio_', '')))
+            anterior = precio
+    return cambios
+
+def benchmark_cambios(n_historico, n_dias=30, muestra_por_fila=300):
+    """
+    Mide el registro de cambios de precio sobre todo el historico frente a la comparacion por fila
+
+    La comparacion por fila se mide sobre una muestra de coches (mismo resultado
+    que el registro vectorizado en esos coches) y se extrapola al total.
+    """
+    df_historico, _, _ = generar_escenario(n_historico, n_dias=n_dias)
+    columnas_precios = [col for col in df_historico.columns if col.startswith('Precio_')]
+
+    inicio = time.perf_counter()
+    df_cambios = detectar_cambios(df_historico)
+    t_vectorizado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    detectar_cambios(df_historico, fechas=[columnas_precios[-1].replace('Precio_', '')])
+    t_ultima_fecha = time.perf_counter() - inicio
+
+    muestra = df_historico.sample(min(muestra_por_fila, len(df_historico)), random_state=7)
+    inicio = time.perf_counter()
+    cambios_fila = _cambios_por_fila(muestra, columnas_precios)
+    t_fila = (time.perf_counter() - inicio) * len(df_historico) / len(muestra)
+
+    en_muestra = df_cambios[df_cambios['ID_Unico_Coche'].isin(muestra['ID_Unico_Coche'])]
+    assert cambios_fila == set(zip(en_muestra['ID_Unico_Coche'], en_muestra['Fecha']))
+    return {'filas_historico': n_historico, 'celdas_precio': len(df_historico) * len(columnas_precios),
+            'cambios': len(df_cambios), 'segundos_vectorizado': t_vectorizado,
+            'segundos_ultima_fecha': t_ultima_fecha, 'segundos_por_fila_estimado': t_fila,
+            'aceleracion': t_fila / t_vectorizado if t_vectorizado else float('inf')}
+
+def benchmark_analitica(n_historico, n_dias=365):
+    """Mide la carga de la matriz int32 y el resumen por vendedor/marca"""
+    df_historico = generar_escenario(n_historico, n_dias=n_dias)[0]
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    matriz = MatrizPrecios.desde_historico(df_historico)
+    t_matriz = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    metricas = matriz.metricas_por_coche()
+    resumenes = resumen_por_grupos(matriz, metricas)
+    t_resumen = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+
+    return {'filas_historico': n_historico, 'fechas': n_dias, 'matriz_mb': matriz.memoria_mb, 'pico_mb': pico,
+            'segundos_matriz': t_matriz, 'segundos_resumen': t_resumen,
+            'vendedores': len(resumenes['Vendedor']), 'marcas': len(resumenes['Marca'])}
+
+def _anuncios_con_duplicados(n_anuncios, proporcion=0.05, semilla=42):
+    """
+    Snapshot sintetico con una proporcion de coches re-anunciados por otro vendedor
+
+    La copia lleva otro numero de anuncio, precio +-2 %, algunos KM de mas y la
+    version con las palabras en otro orden y un acabado. Devuelve (registros, pares plantados).
+    """
+    n_originales = int(n_anuncios / (1 + proporcion))
+    # El snapshot tiene ~40 % de los coches del historico generado
+    _, df_snapshot, _ = generar_escenario(int(n_originales * 2.6), n_dias=2, semilla=semilla)
+    coches = df_snapshot.head(n_originales).to_dict('records')
+    rng = np.random.default_rng(semilla)
+    vendedores = sorted({coche['Vendedor'] for coche in coches})
+    copias = []
+    pares = []
+    for i in rng.choice(len(coches), size=n_anuncios - len(coches), replace=False):
+        original = coches[int(i)]
+        precio = int(original['Precio al Contado'].replace('.', '').replace(' €', ''))
+        km = int(original['KM'].replace('.', '').replace(' km', ''))
+        copia = dict(original,
+                     Vendedor=rng.choice([v for v in vendedores if v != original['Vendedor']]),
+                     Modelo=_otra_redaccion(original['Modelo']),
+                     URL=f"{original['URL'].rsplit('-', 1)[0]}-{4000000000 + len(copias)}")
+        copia['Precio al Contado'] = formatear_euros(int(round(precio * rng.uniform(0.98, 1.02), -1)))
+        copia['KM'] = formatear_km(km + int(rng.integers(0, 800)))
+        pares.append((int(i), len(coches) + len(copias)))
+        copias.append(copia)
+    return coches + copias, pares
+
+def _otra_redaccion(modelo):
+    """'Ibiza 1.0 TSI' -> 'Ibiza TSI 1.0 Style' (mismo modelo, otro vendedor)"""
+    palabras = modelo.split()
+    return ' '.join(palabras[:1] + palabras[:0:-1] + ['Style'])
+
+def _pares_todos_contra_todos(coches):
+    """Referencia cuadratica: compara cada par de anuncios de la misma marca y año (mismos criterios, sin bandas)"""
+    anuncios, claves = [], []
+    for coche in coches:
+        anuncios.append(anuncio_comparable(coche, int(coche['KM'].replace('.', '').replace(' km', '')),
+                                           int(coche['Precio al Contado'].replace('.', '').replace(' €', ''))))
+        claves.append((normalizar_texto(coche['Marca']).partition(' ')[0], coche['Año']))
+    return sum(1 for i in range(len(anuncios)) for j in range(i)
+               if claves[i] == claves[j] and son_duplicados(anuncios[i], anuncios[j]))
+
+def benchmark_duplicados(n_anuncios, muestra_pares=3000):
+    """
+    Mide el indice de duplicados por bloques frente a comparar todos los pares
+
+    Los pares plantados dan la exhaustividad; los grupos sin par plantado son
+    coincidencias del generador (mismo modelo, año, KM y precio). La referencia
+    cuadratica se mide sobre muestra_pares anuncios y se extrapola (coste n^2).
+    """
+    coches, pares = _anuncios_con_duplicados(n_anuncios)
+    inicio = time.perf_counter()
+    resumen = marcar_duplicados(coches)
+    t_indice = time.perf_counter() - inicio
+
+    encontrados = sum(1 for a, b in pares if coches[a][COLUMNA_GRUPO] and coches[a][COLUMNA_GRUPO] == coches[b][COLUMNA_GRUPO])
+    grupos_plantados = {coches[a][COLUMNA_GRUPO] for a, _ in pares if coches[a][COLUMNA_GRUPO]}
+    muestra = coches[:min(muestra_pares, len(coches))]
+    inicio = time.perf_counter()
+    _pares_todos_contra_todos(muestra)
+    t_pares = (time.perf_counter() - inicio) * (len(coches) / len(muestra)) ** 2
+
+    return {'anuncios': len(coches), 'plantados': len(pares), 'encontrados': encontrados,
+            'grupos': resumen['grupos'], 'grupos_extra': resumen['grupos'] - len(grupos_plantados),
+            'unicos': resumen['unicos'], 'segundos_indice': t_indice, 'segundos_pares_estimado': t_pares,
+            'aceleracion': t_pares / t_indice if t_indice else float('inf')}
+
+def _medir(funcion, max_repeticiones=3, presupuesto=1.0):
+    """Mejor tiempo de funcion(); se repite (hasta max_repeticiones) mientras la medida sea barata"""
+    mejor = float('inf')
+    total = 0.0
+    for _ in range(max_repeticiones):
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = min(mejor, duracion)
+        total += duracion
+        if total >= presupuesto:
+            break
+    return mejor, resultado
+
+def benchmark_suite(n_historico, n_dias=DIAS_SUITE, semilla=42):
+    """
+    Rutas criticas del scraper y del analizador sobre un escenario sintetico de n_historico coches
+
+    Cada caso devuelve filas, filas_medidas, segundos y us_por_fila. Las rutas fila a
+    fila (parseo de titulos/precios del scraper, ID por fila) se miden sobre como mucho
+    MAX_FILAS_POR_FILA filas: su coste por fila es constante y us_por_fila es comparable.
+    """
+    from COCHES_SCR import detect_monthly_price, extract_brand_and_full_model_from_title
+
+    df_historico, df_snapshot, fecha = generar_escenario(n_historico, n_dias=n_dias, semilla=semilla)
+    fecha_display = fecha.strftime("%d/%m/%Y")
+    n_fila = min(n_historico, MAX_FILAS_POR_FILA)
+    casos = {}
+
+    def anotar(caso, filas, filas_medidas, funcion):
+        segundos, resultado = _medir(funcion)
+        casos[caso] = {'filas': filas, 'filas_medidas': filas_medidas, 'segundos': round(segundos, 4),
+                       'us_por_fila': round(segundos / max(filas_medidas, 1) * 1e6, 3)}
+        return resultado
+
+    # Scraper: parseo de titulos y precios tal y como llegan de las fichas
+    titulos = generar_titulos(n_fila, semilla=semilla)
+    anotar('parseo_titulos', n_historico, n_fila,
+           lambda: [extract_brand_and_full_model_from_title(titulo) for titulo in titulos])
+    textos = generar_textos_precio(n_historico, semilla=semilla)
+    vendedores = df_snapshot['Vendedor'].tolist()
+    anotar('parseo_precio_ficha', n_historico, n_fila,
+           lambda: [detect_monthly_price(texto, vendedores[i % len(vendedores)])
+                    for i, texto in enumerate(textos[:n_fila])])
+    serie_textos = pd.Series(textos, dtype=object)
+    anotar('parseo_precios', n_historico, n_historico, lambda: parsear_precio(serie_textos))
+
+    # Analizador: IDs, snapshot, ingesta del historico, procesado del dia y salida a Sheets
+    analizador = _nuevo_analizador(fecha_display)
+    registros = df_snapshot.head(n_fila).to_dict('records')
+    anotar('crear_id_unico_coche', len(df_snapshot), len(registros),
+           lambda: [analizador.crear_id_unico_coche(fila) for fila in registros])
+    anotar('crear_ids_unicos', len(df_snapshot), len(df_snapshot), lambda: crear_ids_unicos(df_snapshot))
+    df_nuevo = anotar('preparar_snapshot', len(df_snapshot), len(df_snapshot),
+                      lambda: _nuevo_analizador(fecha_display).preparar_snapshot(df_snapshot.copy()))
+
+    def ingerir():
+        ingesta = _nuevo_analizador(fecha_display)
+        return ingesta.limpiar_datos_numericos(ingesta.migrar_ids_historico(df_historico.copy()), origen="HISTORICO")
+    df_prev = anotar('ingesta_historico', n_historico, n_historico, ingerir)
+
+    df_final = anotar('procesar_coches_nuevos_y_existentes', n_historico, n_historico,
+                      lambda: _nuevo_analizador(fecha_display).procesar_coches_nuevos_y_existentes(df_nuevo, df_prev))
+    df_sheets = anotar('preparar_dataframe_para_sheets', len(df_final), len(df_final),
+                       lambda: analizador.preparar_dataframe_para_sheets(df_final))
+    valores = anotar('serializacion_completa', len(df_sheets), len(df_sheets),
+                     lambda: [df_sheets.columns.tolist()] + analizador.serializar_para_sheets(df_sheets))
+
+    # Diff contra la hoja de ayer (la subida completa de hoy sin la columna nueva)
+    col_hoy = df_sheets.columns.get_loc(f"Precio_{fecha_display}")
+    grid_ayer = [fila[:col_hoy] + fila[col_hoy + 1:] for fila in valores]
+    with contextlib.redirect_stdout(io.StringIO()):
+        uploader = GoogleSheetsUploader(sheet_id=SHEET_ID_BENCHMARK, client=FakeSheetsClient())
+    anotar('serializacion_diff', len(df_sheets), len(df_sheets),
+           lambda: uploader._calcular_diff(grid_ayer, df_sheets, 'ID_Unico_Coche'))
+
+    return {'filas_historico': n_historico, 'filas_snapshot': len(df_snapshot), 'fechas': n_dias, 'casos': casos}
+
+def comparar_con_base(resultados, base, tolerancia=TOLERANCIA_REGRESION):
+    """
+    Compara us_por_fila de cada caso y tamaño con un JSON de base
+
+    Returns:
+        Lista de (tamaño, caso, us_base, us_actual, ratio, es_regresion) de los casos presentes en ambos
+    """
+    comparaciones = []
+    for tamano, actual in resultados['tamanos'].items():
+        casos_base = base.get('tamanos', {}).get(tamano, {}).get('casos', {})
+        for caso, medida in actual['casos'].items():
+            if caso not in casos_base or not casos_base[caso]['us_por_fila']:
+                continue
+            anterior = casos_base[caso]['us_por_fila']
+            ratio = medida['us_por_fila'] / anterior
+            regresion = ratio > 1 + tolerancia and medida['segundos'] >= MIN_SEGUNDOS_REGRESION
+            comparaciones.append((tamano, caso, anterior, medida['us_por_fila'], ratio, regresion))
+    return comparaciones
+
+def ejecutar_suite(tamanos, n_dias, salida=None, ruta_base=None, tolerancia=TOLERANCIA_REGRESION):
+    """Ejecuta la suite por tamaño, la guarda en JSON y la compara con la base (devuelve el nº de regresiones)"""
+    resultados = {'fecha': datetime.now().isoformat(timespec='seconds'), 'fechas': n_dias,
+                  'max_filas_por_fila': MAX_FILAS_POR_FILA, 'tamanos': {}}
+    print("=" * 70)
+    print(f"SUITE DE RENDIMIENTO ({n_dias} fechas de historico, datos sinteticos)")
+    print("=" * 70)
+    for n in tamanos:
+        r = benchmark_suite(n, n_dias=n_dias)
+        resultados['tamanos'][str(n)] = r
+        print(f"\nHistorico {n:,} coches - snapshot {r['filas_snapshot']:,} coches")
+        print(f"{'Caso':<38} {'Filas':>9} {'Medidas':>9} {'Tiempo (s)':>11} {'us/fila':>10}")
+        for caso, m in r['casos'].items():
+            print(f"{caso:<38} {m['filas']:>9,} {m['filas_medidas']:>9,} {m['segundos']:>11.3f} {m['us_por_fila']:>10.2f}")
+
+    if salida:
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {salida}")
+
+    if not ruta_base:
+        return 0
+    with open(ruta_base, encoding='utf-8') as f:
+        base = json.load(f)
+    comparaciones = comparar_con_base(resultados, base, tolerancia)
+    regresiones = [c for c in comparaciones if c[5]]
+    print(f"\n{'=' * 70}")
+    print(f"COMPARACION CON {ruta_base} (tolerancia +{tolerancia:.0%})")
+    print(f"{'=' * 70}")
+    for tamano, caso, anterior, actual, ratio, regresion in comparaciones:
+        marca = "REGRESION" if regresion else ""
+        print(f"{int(tamano):>9,} {caso:<38} {anterior:>10.2f} -> {actual:>10.2f} us/fila  x{ratio:.2f} {marca}")
+    if not comparaciones:
+        print("Sin casos comunes con la base")
+    print(f"{len(regresiones)} regresiones de {len(comparaciones)} casos comparados")
+    return len(regresiones)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del analizador historico con backend en memoria")
+    parser.add_argument('tamanos', nargs='*', type=int, default=TAMANOS_HISTORICO,
+                        help="Filas de historico a simular")
+    parser.add_argument('--dias', type=int, help=f"Columnas de precio en el historico (30; {DIAS_SUITE} con --suite)")
+    parser.add_argument('--latencia', type=float, default=0.0, help="Latencia simulada por llamada (s)")
+    parser.add_argument('--join', type=int, metavar='FILAS',
+                        help="Solo medir el join de existentes/vendidos con FILAS de historico (p.ej. 100000)")
+    parser.add_argument('--nuevos', type=int, metavar='FILAS',
+                        help="Solo medir el alta de coches nuevos sobre FILAS de historico (p.ej. 50000)")
+    parser.add_argument('--n-nuevos', type=int, default=1000, help="Coches nuevos del dia para --nuevos")
+    parser.add_argument('--eventos', type=int, metavar='FILAS',
+                        help="Solo comparar el almacen de eventos de precio con el historico ancho de FILAS")
+    parser.add_argument('--sqlite', type=int, metavar='FILAS',
+                        help="Solo medir el historico SQLite local con FILAS de historico")
+    parser.add_argument('--lectura', type=int, metavar='FILAS',
+                        help="Solo medir la lectura de SCR-J1/J2 con FILAS coches en total")
+    parser.add_argument('--ids', type=int, metavar='FILAS',
+                        help="Solo medir la generacion de ID_Unico_Coche para FILAS coches")
+    parser.add_argument('--cambios', type=int, metavar='FILAS',
+                        help="Solo medir el registro de cambios de precio sobre FILAS de historico")
+    parser.add_argument('--analitica', type=int, metavar='FILAS',
+                        help="Solo medir la analitica de precios (matriz int32) con FILAS coches x --dias fechas")
+    parser.add_argument('--duplicados', type=int, metavar='ANUNCIOS',
+                        help="Solo medir la deteccion de duplicados entre vendedores con ANUNCIOS anuncios")
+    parser.add_argument('--suite', type=int, nargs='*', metavar='FILAS',
+                        help=f"Suite de rutas criticas con datos sinteticos (por defecto {TAMANOS_SUITE})")
+    parser.add_argument('--salida', metavar='JSON', help="Guardar los resultados de --suite en JSON")
+    parser.add_argument('--base', metavar='JSON', help="Comparar --suite con unos resultados anteriores")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_REGRESION,
+                        help="Aumento relativo de us/fila que se considera regresion (0.25 = +25%%)")
+    args = parser.parse_args()
+    if args.dias is None:
+        args.dias = DIAS_SUITE if args.suite is not None else 30
+
+    if args.suite is not None:
+        regresiones = ejecutar_suite(args.suite or TAMANOS_SUITE, args.dias, salida=args.salida,
+                                     ruta_base=args.base, tolerancia=args.tolerancia)
+        if regresiones:
+            raise SystemExit(1)
+        return
+
+    if args.duplicados:
+        r = benchmark_duplicados(args.duplicados)
+        print(f"Anuncios: {r['anuncios']:,} ({r['plantados']:,} duplicados plantados entre vendedores)")
+        print(f"Indice por bloques: {r['segundos_indice']:.2f} s - {r['encontrados']:,}/{r['plantados']:,} "
+              f"plantados detectados, {r['grupos']:,} grupos ({r['grupos_extra']} coincidencias del generador)")
+        print(f"Coches unicos: {r['unicos']:,}")
+        print(f"Todos los pares (estimado): {r['segundos_pares_estimado']:.1f} s")
+        print(f"Aceleracion: x{r['aceleracion']:.0f}")
+        return
+
+    if args.analitica:
+        r = benchmark_analitica(args.analitica, n_dias=args.dias)
+        print(f"Historico: {r['filas_historico']:,} coches x {r['fechas']} fechas")
+        print(f"Matriz int32: {r['segundos_matriz']:.2f} s, {r['matriz_mb']:.0f} MB (pico {r['pico_mb']:.0f} MB)")
+        print(f"Metricas y resumen: {r['segundos_resumen']:.2f} s - {r['vendedores']} vendedores, {r['marcas']} marcas")
+        return
+
+    if args.cambios:
+        r = benchmark_cambios(args.cambios, n_dias=args.dias)
+        print(f"Historico: {r['filas_historico']:,} filas, {r['celdas_precio']:,} celdas Precio_")
+        print(f"Registro completo: {r['segundos_vectorizado']:.2f} s, {r['cambios']:,} cambios significativos")
+        print(f"Solo ultima fecha: {r['segundos_ultima_fecha']:.2f} s")
+        print(f"Comparacion por fila (estimado): {r['segundos_por_fila_estimado']:.1f} s")
+        print(f"Aceleracion: x{r['aceleracion']:.0f}")
+        return
+
+    if args.ids:
+        r = benchmark_ids(args.ids)
+        print(f"Snapshot: {r['filas']:,} filas (URLs con query/barra/fragmento)")
+        print(f"MD5 por fila: {r['segundos_por_fila']:.2f} s, {r['ids_por_fila']:,} IDs distintos")
+        print(f"Vectorizado: {r['segundos_vectorizado']:.2f} s, {r['ids_vectorizado']:,} IDs distintos")
+        print(f"Aceleracion: x{r['aceleracion']:.0f}")
+        return
+
+    if args.lectura:
+        r = benchmark_lectura(args.lectura, latencia=args.latencia)
+        print(f"Lectura SCR-J1/J2: {r['agrupada']['filas']:,} coches, latencia simulada {args.latencia} s")
+        for nombre, etiqueta in (('registros', 'get_all_records por hoja'), ('agrupada', 'batchGet tipado')):
+            print(f"{etiqueta:>26}: {r[nombre]['segundos']:.2f} s, {r[nombre]['llamadas']} llamadas, "
+                  f"pico {r[nombre]['pico_mb']:.1f} MB")
+        return
+
+    if args.sqlite:
+        r = benchmark_sqlite(args.sqlite, n_dias=args.dias)
+        print(f"Historico: {r['filas_historico']:,} filas, snapshot: {r['filas_snapshot']:,} coches")
+        print(f"Importacion inicial: {r['importacion']:.2f} s")
+        print(f"Snapshot (transaccion): {r['snapshot']:.2f} s - {r['nuevos']} nuevos, "
+              f"{r['vendidos']} vendidos")
+        print(f"Exportacion vista ({r['columnas_vista']} columnas): {r['exportacion']:.2f} s")
+        return
+
+    if args.eventos:
+        r = benchmark_eventos(args.eventos, n_dias=args.dias)
+        print(f"Historico: {r['filas_historico']:,} filas, {r['celdas_precio']:,} celdas Precio_")
+        print(f"Eventos: {r['eventos']:,} ({r['celdas_precio'] / r['eventos']:.0f}x menos filas que celdas)")
+        print(f"Migracion: {r['segundos_migracion']:.2f} s")
+        print(f"Pivot completo: {r['segundos_pivot']:.2f} s (identico al historico)")
+        print(f"Pivot ultimas {r['ventana']} fechas: {r['segundos_pivot_ventana']:.2f} s")
+        return
+
+    if args.nuevos:
+        r = benchmark_nuevos(args.nuevos, n_nuevos=args.n_nuevos, n_dias=args.dias)
+        print(f"Historico: {r['filas_historico']:,} filas, {r['coches_nuevos']:,} coches nuevos (resultado identico)")
+        print(f"Alta en bloque: {r['segundos_bloque']:.3f} s")
+        print(f"Concat por fila: {r['segundos_por_fila']:.1f} s")
+        print(f"Aceleracion: x{r['aceleracion']:.0f}")
+        return
+
+    if args.join:
+        print("Verificando equivalencia join indexado vs bucle por URL...")
+        verificar_join()
+        r = benchmark_join(args.join, n_dias=args.dias)
+        print(f"Historico: {r['filas_historico']:,} filas, {r['urls']:,} URLs existentes+vendidas")
+        print(f"Join indexado: {r['segundos_join']:.3f} s")
+        print(f"Bucle por URL (estimado): {r['segundos_bucle_estimado']:.1f} s")
+        print(f"Aceleracion: x{r['aceleracion']:.0f}")
+        return
+
+    print("=" * 70)
+    print("BENCHMARK ANALIZADOR HISTORICO (backend en memoria)")
+    print("=" * 70)
+    print(f"{'Historico':>10} {'Snapshot':>10} {'Tiempo (s)':>12} {'Llamadas':>10} {'Estado':>8}")
+    for n in args.tamanos:
+        r = benchmark_analizador(n, n_dias=args.dias, latencia=args.latencia)
+        estado = "OK" if r['exito'] else "ERROR"
+        print(f"{r['filas_historico']:>10,} {r['filas_snapshot']:>10,} {r['segundos']:>12.2f} {r['llamadas_api']:>10} {estado:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+===============================================================================
+              CAMBIOS PRECIO · DETECCIÓN POR COLUMNAS CON UMBRALES
+===============================================================================
+
+Descripción:
+    Detecta los cambios de precio de todos los coches a la vez comparando
+    columnas Precio_dd/mm/yyyy consecutivas (matriz coches x fechas) en
+    lugar de comparar textos fila a fila. Solo se registran los cambios
+    significativos (umbral absoluto en euros o relativo en %), y el
+    resultado es un registro compacto que se escribe una vez por ejecución
+    en la hoja Data_Cambios_Precio.
+
+Funcionalidades principales:
+    • Parseo de cada texto de precio distinto una sola vez (factorize).
+    • Comparación contra el último precio conocido (un coche que vuelve
+      tras días sin anuncio se compara con su último precio).
+    • Umbrales PRECIO_CAMBIO_MINIMO (€) y CAMBIO_PORCENTAJE_SIGNIFICATIVO (%):
+      es significativo si supera cualquiera de los dos.
+    • Registro coche / fecha / precio anterior / precio nuevo / variación %,
+      recalculable sobre el histórico completo.
+
+Uso:
+    df_cambios = detectar_cambios(df_historico, fechas=['19/10/2026'])
+    guardar_registro_cambios(gs_handler, df_cambios, ['19/10/2026'])
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+from datetime import datetime
+
+import gspread
+import numpy as np
+import pandas as pd
+
+from esquema_datos import CAMBIO_PORCENTAJE_SIGNIFICATIVO, PRECIO_CAMBIO_MINIMO, parsear_precio
+
+HOJA_CAMBIOS = "Data_Cambios_Precio"
+COLUMNAS_CAMBIOS = ['ID_Unico_Coche', 'Marca', 'Modelo', 'Vendedor', 'Fecha',
+                    'Precio_Anterior', 'Precio_Nuevo', 'Diferencia', 'Variacion_Pct']
+FORMATO_FECHA = "%d/%m/%Y"
+
+def columnas_precio_ordenadas(df):
+    """Columnas Precio_dd/mm/yyyy del DataFrame en orden cronologico"""
+    columnas = []
+    for col in df.columns:
+        if not col.startswith('Precio_'):
+            continue
+        try:
+            columnas.append((datetime.strptime(col[len('Precio_'):], FORMATO_FECHA), col))
+        except ValueError:
+            continue
+    return [col for _, col in sorted(columnas)]
+
+def matriz_precios(df, columnas_precios):
+    """
+    Matriz float (coches x fechas) con el precio de cada celda
+
+    Cada texto distinto se parsea una sola vez; los vacios y los precios
+    fuera de [PRECIO_MINIMO_VALIDO, PRECIO_MAXIMO_VALIDO] quedan como NaN.
+    """
+    celdas = df[columnas_precios].to_numpy(dtype=object).ravel()
+    codigos, unicos = pd.factorize(celdas, use_na_sentinel=True)
+    valores, en_rango, _ = parsear_precio(pd.Series(unicos, dtype=object))
+    tabla = np.append(valores.where(en_rango).to_numpy(dtype='float64'), np.nan)
+    return tabla[codigos].reshape(len(df), len(columnas_precios))
+
+def cambios_significativos(anteriores, nuevos, minimo=PRECIO_CAMBIO_MINIMO,
+                           porcentaje=CAMBIO_PORCENTAJE_SIGNIFICATIVO):
+    """Mascara de cambios que superan el umbral absoluto o el relativo (NaN = sin cambio)"""
+    anteriores = np.asarray(anteriores, dtype='float64')
+    nuevos = np.asarray(nuevos, dtype='float64')
+    diferencia = np.abs(nuevos - anteriores)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relativo = diferencia / anteriores * 100
+    validos = (anteriores > 0) & (nuevos > 0) & (diferencia > 0)
+    return validos & ((diferencia >= minimo) | (relativo >= porcentaje))
+
+def detectar_cambios(df_historico, fechas=None, minimo=PRECIO_CAMBIO_MINIMO,
+                     porcentaje=CAMBIO_PORCENTAJE_SIGNIFICATIVO):
+    """
+    Registro de cambios de precio significativos del historico ancho
+
+    Args:
+        df_historico: DataFrame con ID_Unico_Coche, Marca, Modelo, Vendedor y columnas Precio_
+        fechas: Fechas (dd/mm/yyyy) cuyos cambios se quieren (None = todo el historico)
+        minimo, porcentaje: Umbrales absoluto (€) y relativo (%)
+
+    Returns:
+        DataFrame con COLUMNAS_CAMBIOS, ordenado por fecha y variacion %
+    """
+    columnas = columnas_precio_ordenadas(df_historico)
+    if len(columnas) < 2 or df_historico.empty:
+        return pd.DataFrame(columns=COLUMNAS_CAMBIOS)
+
+    precios = matriz_precios(df_historico, columnas)
+    # Precio anterior = ultimo precio conocido antes de cada fecha
+    anteriores = pd.DataFrame(precios).ffill(axis=1).to_numpy()[:, :-1]
+    nuevos = precios[:, 1:]
+
+    if fechas is not None:
+        objetivo = {f"Precio_{fecha}" for fecha in fechas}
+        seleccion = np.array([col in objetivo for col in columnas[1:]])
+        anteriores, nuevos = anteriores[:, seleccion], nuevos[:, seleccion]
+        columnas_nuevas = [col for col, elegida in zip(columnas[1:], seleccion) if elegida]
+    else:
+        columnas_nuevas = columnas[1:]
+
+    filas, cols = np.nonzero(cambios_significativos(anteriores, nuevos, minimo, porcentaje))
+    precio_anterior = anteriores[filas, cols]
+    precio_nuevo = nuevos[filas, cols]
+    variacion = np.round((precio_nuevo - precio_anterior) / precio_anterior * 100, 1)
+
+    # Orden cronologico y, dentro de cada fecha, de mayor bajada a mayor subida
+    orden = np.lexsort((variacion, cols))
+    filas, cols = filas[orden], cols[orden]
+    precio_anterior, precio_nuevo, variacion = precio_anterior[orden], precio_nuevo[orden], variacion[orden]
+
+    def texto(columna):
+        if columna not in df_historico.columns:
+            return ''
+        return df_historico[columna].to_numpy(dtype=object)[filas]
+
+    return pd.DataFrame({
+        'ID_Unico_Coche': texto('ID_Unico_Coche'),
+        'Marca': texto('Marca'),
+        'Modelo': texto('Modelo'),
+        'Vendedor': texto('Vendedor'),
+        'Fecha': np.array([col[len('Precio_'):] for col in columnas_nuevas], dtype=object)[cols],
+        'Precio_Anterior': precio_anterior.astype('int64'),
+        'Precio_Nuevo': precio_nuevo.astype('int64'),
+        'Diferencia': (precio_nuevo - precio_anterior).astype('int64'),
+        'Variacion_Pct': variacion,
+    }, columns=COLUMNAS_CAMBIOS)
+
+def guardar_registro_cambios(gs_handler, df_cambios, fechas, hoja=HOJA_CAMBIOS):
+    """
+    Escribe en la hoja los cambios de las fechas procesadas
+
+    Solo se lee la columna Fecha. Si la hoja ya tenia filas de esas fechas
+    (re-ejecucion del mismo dia) y son las ultimas, se borran y se anaden las
+    nuevas; solo si estan intercaladas con otras fechas se reescribe la hoja.
+    Sin fechas repetidas, solo se anaden las filas nuevas.
+
+    Returns:
+        Numero de filas de cambios escritas
+    """
+    filas = df_cambios[COLUMNAS_CAMBIOS].astype(str).values.tolist()
+    try:
+        worksheet = gs_handler.get_worksheet(hoja)
+    except gspread.WorksheetNotFound:
+        worksheet = gs_handler.add_worksheet(title=hoja, rows=len(filas) + 1, cols=len(COLUMNAS_CAMBIOS))
+        worksheet.update([COLUMNAS_CAMBIOS] + filas)
+        return len(filas)
+
+    fechas_hoja = worksheet.col_values(COLUMNAS_CAMBIOS.index('Fecha') + 1)[1:]
+    fechas = set(fechas)
+    repetidas = [i for i, fecha in enumerate(fechas_hoja) if fecha in fechas]
+    if repetidas and len(repetidas) == len(fechas_hoja) - repetidas[0]:
+        # Filas 2.. de la hoja: las de las fechas repetidas estan al final
+        worksheet.delete_rows(repetidas[0] + 2, len(fechas_hoja) + 1)
+    elif repetidas:
+        existentes = worksheet.get_all_values()[1:]
+        conservadas = [fila for fila in existentes if len(fila) > 4 and fila[4] not in fechas]
+        worksheet.clear()
+        gs_handler.ajustar_hoja(worksheet, len(conservadas) + len(filas) + 1, len(COLUMNAS_CAMBIOS))
+        worksheet.update([COLUMNAS_CAMBIOS] + conservadas + filas)
+        return len(filas)
+    if filas:
+        worksheet.append_rows(filas)
+    return len(filas)
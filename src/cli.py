@@ -0,0 +1,223 @@
+"""
+===============================================================================
+                       CLI · WALLAPOP SCRAPER MOTICK
+===============================================================================
+
+Descripción:
+    Punto de entrada único con subcomandos para el scraper, el analizador
+    histórico, la subida a Google Sheets y los benchmarks. Las dependencias
+    pesadas (pandas, Selenium, gspread...) solo se importan dentro del
+    subcomando que las necesita, así que los comandos cortos (planificar
+    vendedores, probar la conexión) arrancan en una fracción de segundo.
+
+Funcionalidades principales:
+    • scrape: vendedores, grupo (shard job1/job2, grupo manual 1/2/3 o todos)
+      y modo por argumentos;
+      --planificar solo lista los vendedores sin abrir Chrome.
+    • analyze: fuente del histórico, modo de escritura y backfill.
+    • upload: prueba de conexión o subida de un Excel archivado.
+    • benchmark: pasa el resto de argumentos a benchmark_analisis.
+    • telemetria: tendencias por vendedor de las ejecuciones registradas.
+    • --perfilar (scrape/analyze): perfiles cProfile por fase (perfilado.py).
+    • --tiempos: informe del coste de importación de cada módulo.
+
+Uso:
+    python cli.py scrape --planificar --grupo job1
+    python cli.py scrape --grupo job2 --headless
+    python cli.py analyze --fuente sqlite --backfill --desde 01/10/2025
+    python cli.py --tiempos upload --probar
+    python cli.py benchmark --cambios 50000
+    python cli.py telemetria --ultimas 10
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import time
+
+INICIO_PROCESO = time.perf_counter()
+
+import argparse
+import importlib
+import os
+import sys
+
+# Coste de importacion de cada modulo cargado a traves de importar()
+TIEMPOS_IMPORTACION = {}
+
+def importar(nombre):
+    """Importa un modulo registrando cuanto tarda (incluye sus dependencias aun no cargadas)"""
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(nombre)
+    TIEMPOS_IMPORTACION.setdefault(nombre, time.perf_counter() - inicio)
+    return modulo
+
+def mostrar_tiempos_arranque(inicio_comando):
+    """Informe de arranque: importaciones por modulo y tiempo hasta empezar el comando"""
+    print(f"\n{'=' * 60}")
+    print("TIEMPOS DE ARRANQUE")
+    print("=" * 60)
+    for nombre, segundos in sorted(TIEMPOS_IMPORTACION.items(), key=lambda item: -item[1]):
+        print(f"  {nombre:<32} {segundos * 1000:>8.0f} ms")
+    print(f"  {'Hasta iniciar el comando':<32} {(inicio_comando - INICIO_PROCESO) * 1000:>8.0f} ms")
+    print(f"  {'Total':<32} {(time.perf_counter() - INICIO_PROCESO) * 1000:>8.0f} ms")
+
+def _fijar_entorno(**valores):
+    """Pasa los argumentos a las variables de entorno que leen los modulos (None = no tocar)"""
+    for clave, valor in valores.items():
+        if valor is None:
+            continue
+        os.environ[clave] = ('true' if valor else 'false') if isinstance(valor, bool) else str(valor)
+
+def _grupo(valor):
+    """Grupo de --grupo: los grupos manuales 1/2/3 como int (config.get_sellers los compara como int)"""
+    return int(valor) if valor.isdigit() else valor
+
+def _vendedores(args):
+    """Vendedores del grupo/modo pedido, filtrados por --vendedores si se indica"""
+    config = importar('config')
+    sellers = config.get_sellers(test_mode=args.modo == 'test', vendor_group=args.grupo)
+    if args.vendedores:
+        nombres = [nombre.strip() for nombre in args.vendedores.split(',') if nombre.strip()]
+        todos = config.get_sellers(vendor_group='todos')
+        desconocidos = [nombre for nombre in nombres if nombre not in todos]
+        if desconocidos:
+            raise SystemExit(f"ERROR: Vendedores no configurados: {', '.join(desconocidos)}")
+        sellers = {nombre: todos[nombre] for nombre in nombres}
+    return sellers
+
+def comando_scrape(args):
+    sellers = _vendedores(args)
+    if args.planificar:
+        print(f"MODO: {'Testing' if args.modo == 'test' else 'Produccion'} - GRUPO: {args.grupo or 'todos'}")
+        print(f"VENDEDORES: {len(sellers)} configurados")
+        for nombre, url in sellers.items():
+            print(f"  {nombre:<28} {url}")
+        return True
+
+    _fijar_entorno(VENDOR_GROUP=args.grupo, HEADLESS_MODE=args.headless or None,
+                   TEST_MODE=args.modo == 'test', CHROME_PERFIL_PERSISTENTE=args.perfil_persistente or None,
+                   EXTRACCION_JS=None if args.extraccion is None else args.extraccion == 'js',
+                   PERFILADO=args.perfilar or None, DUPLICADOS_OMITIR=args.omitir_duplicados or None)
+    return importar('COCHES_SCR').main(sellers=sellers)
+
+def comando_analyze(args):
+    _fijar_entorno(FUENTE_HISTORICO=args.fuente, ESCRITURA_HISTORICO=args.escritura,
+                   HISTORICO_SQLITE_RUTA=args.sqlite, BACKFILL_HISTORICO=args.backfill or None,
+                   BACKFILL_DESDE=args.desde, BACKFILL_HASTA=args.hasta, PERFILADO=args.perfilar or None)
+    return importar('analisis_coches').main()
+
+def _crear_uploader():
+    """Uploader con las credenciales del entorno (GitHub Actions) o el archivo local"""
+    GoogleSheetsUploader = importar('google_sheets_uploader').GoogleSheetsUploader
+    importar('dotenv').load_dotenv("../.env")
+    sheet_id = os.getenv('GOOGLE_SHEET_ID')
+    credentials_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
+    if credentials_json:
+        return GoogleSheetsUploader(credentials_json_string=credentials_json, sheet_id=sheet_id)
+    return GoogleSheetsUploader(credentials_file="../credentials/service-account.json", sheet_id=sheet_id)
+
+def comando_upload(args):
+    if args.probar:
+        return _crear_uploader().test_connection()
+
+    if not args.archivo:
+        raise SystemExit("ERROR: Indica un Excel archivado o --probar")
+    _fijar_entorno(VENDOR_GROUP=args.grupo)
+    pd = importar('pandas')
+    df = pd.read_excel(args.archivo, sheet_name="Todos_los_Coches", dtype=str, keep_default_na=False)
+    return _crear_uploader().upload_by_seller(df)
+
+def comando_benchmark(args):
+    benchmark = importar('benchmark_analisis')
+    sys.argv = ['benchmark_analisis.py'] + args.argumentos
+    benchmark.main()
+    return True
+
+def comando_telemetria(args):
+    TelemetriaScraper = importar('telemetria').TelemetriaScraper
+    ruta = args.ruta or os.getenv('TELEMETRIA_RUTA', '../data/telemetria_scraper.db')
+    if not os.path.exists(ruta):
+        print(f"Sin telemetria en {ruta}")
+        return True
+    telemetria = TelemetriaScraper(ruta)
+    try:
+        telemetria.mostrar_informe(ultimas=args.ultimas, vendedor=args.vendedor)
+    finally:
+        telemetria.cerrar()
+    return True
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Scraper y analizador de coches de Wallapop (Motick)")
+    parser.add_argument('--tiempos', action='store_true', help="Mostrar el coste de importacion de cada modulo")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    scrape = subparsers.add_parser('scrape', help="Extraer coches de los vendedores")
+    scrape.add_argument('--vendedores', help="Nombres separados por comas (por defecto los del grupo)")
+    scrape.add_argument('--grupo', type=_grupo, choices=['job1', 'job2', 'todos', 1, 2, 3],
+                        help="Shard de vendedores: job1, job2 (SCR-J1/J2), grupo manual 1/2/3 o todos")
+    scrape.add_argument('--modo', choices=['produccion', 'test'], default='produccion')
+    scrape.add_argument('--headless', action='store_true', help="Chrome sin ventana")
+    scrape.add_argument('--extraccion', choices=['js', 'selenium'],
+                        help="Ficha en un solo script JS (por defecto) o con comandos Selenium")
+    scrape.add_argument('--perfil-persistente', action='store_true',
+                        help="Reutilizar el perfil de Chrome (consentimiento, cache HTTP y driver)")
+    scrape.add_argument('--perfilar', action='store_true',
+                        help="Perfiles cProfile por fase en logs/perfilado (PERFILADO)")
+    scrape.add_argument('--omitir-duplicados', action='store_true',
+                        help="No abrir la ficha de duplicados conocidos entre vendedores (DUPLICADOS_OMITIR)")
+    scrape.add_argument('--planificar', action='store_true', help="Solo listar los vendedores que se procesarian")
+    scrape.set_defaults(funcion=comando_scrape)
+
+    analyze = subparsers.add_parser('analyze', help="Actualizar el historico con los snapshots del scraper")
+    analyze.add_argument('--fuente', choices=['sheets', 'sqlite'], help="Fuente de verdad del historico")
+    analyze.add_argument('--escritura', choices=['incremental', 'completa'], help="Escritura de Data_Historico (incremental no se aplica con HISTORICO_VENTANA_FECHAS)")
+    analyze.add_argument('--sqlite', metavar='RUTA', help="Base de datos SQLite del historico")
+    analyze.add_argument('--backfill', action='store_true', help="Aplicar todos los snapshots pendientes")
+    analyze.add_argument('--desde', metavar='DD/MM/YYYY', help="Inicio del backfill")
+    analyze.add_argument('--hasta', metavar='DD/MM/YYYY', help="Fin del backfill")
+    analyze.add_argument('--perfilar', action='store_true',
+                        help="Perfiles cProfile por fase en logs/perfilado (PERFILADO)")
+    analyze.set_defaults(funcion=comando_analyze)
+
+    upload = subparsers.add_parser('upload', help="Probar la conexion o subir un Excel archivado a Sheets")
+    upload.add_argument('archivo', nargs='?', help="Excel coches_vendedores_AUTO_*.xlsx")
+    upload.add_argument('--grupo', help="job1 / job2: hoja SCR-J1 / SCR-J2 de destino")
+    upload.add_argument('--probar', action='store_true', help="Solo probar la conexion con Google Sheets")
+    upload.set_defaults(funcion=comando_upload)
+
+    telemetria = subparsers.add_parser('telemetria', help="Tendencias de rendimiento por vendedor")
+    telemetria.add_argument('--ultimas', type=int, default=10, help="Ejecuciones a mostrar")
+    telemetria.add_argument('--vendedor', help="Solo este vendedor")
+    telemetria.add_argument('--ruta', help="Base de datos de telemetria")
+    telemetria.set_defaults(funcion=comando_telemetria)
+
+    # Sin opciones propias: todo lo que sigue a 'benchmark' (incluido -h) va a benchmark_analisis.py
+    benchmark = subparsers.add_parser('benchmark', add_help=False,
+                                      help="Benchmarks del analizador (argumentos de benchmark_analisis.py)")
+    benchmark.set_defaults(funcion=comando_benchmark)
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    argumentos_benchmark = []
+    if 'benchmark' in argv:
+        corte = argv.index('benchmark') + 1
+        argv, argumentos_benchmark = argv[:corte], argv[corte:]
+    args = crear_parser().parse_args(argv)
+    args.argumentos = argumentos_benchmark
+    inicio_comando = time.perf_counter()
+    try:
+        exito = args.funcion(args)
+    except Exception as e:
+        print(f"ERROR: {args.comando}: {e}")
+        exito = False
+    finally:
+        if args.tiempos:
+            mostrar_tiempos_arranque(inicio_comando)
+    return bool(exito)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,248 @@
+"""
+===============================================================================
+            DATOS SINTETICOS · SNAPSHOTS E HISTORICOS REALISTAS
+===============================================================================
+
+Descripción:
+    Generador de datos sintéticos con la forma de los reales para medir el
+    scraper y el analizador sin Wallapop ni Google Sheets: vendedores de
+    config con tamaños muy desiguales, marcas por popularidad, precios según
+    antigüedad, paseos de precio con bajadas y alguna subida, altas y ventas
+    diarias (churn) y títulos/precios en bruto tal y como los ve el scraper.
+
+Funcionalidades principales:
+    • generar_escenario: histórico Data_Historico de varios meses y el
+      snapshot del día siguiente en formato SCR (vendidos, bajadas, altas).
+    • Un solo generador para todos los benchmarks (benchmark_analisis).
+    • generar_titulos / generar_textos_precio: textos en bruto de las
+      fichas (alias de marca, mayúsculas, ID final, €/mes, vacíos...).
+    • Construcción por columnas con NumPy y textos de precio compartidos:
+      500k coches x 60 fechas caben en memoria.
+
+Uso:
+    df_historico, df_snapshot, fecha = generar_escenario(50000, n_dias=90)
+    titulos = generar_titulos(50000)
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import get_sellers
+
+# marca: (peso, modelos, como aparece en los titulos, precio medio de nuevo)
+MARCAS = {
+    "Seat": (12, ["Ibiza", "Leon", "Arona", "Ateca"], ["SEAT", "Seat"], 22000),
+    "Volkswagen": (12, ["Golf", "Polo", "T-Roc", "Tiguan", "Passat"], ["Volkswagen", "VW", "VOLKSWAGEN"], 28000),
+    "Peugeot": (9, ["208", "308", "2008", "3008"], ["Peugeot", "PEUGEOT"], 24000),
+    "Renault": (8, ["Clio", "Megane", "Captur", "Kadjar"], ["Renault", "RENAULT"], 21000),
+    "Toyota": (8, ["Corolla", "C-HR", "Yaris", "RAV4"], ["Toyota", "TOYOTA"], 27000),
+    "BMW": (7, ["Serie 1", "Serie 3", "X1", "X3"], ["BMW"], 40000),
+    "Mercedes-Benz": (7, ["Clase A", "Clase C", "GLA", "GLC"], ["Mercedes-Benz", "Mercedes", "MERCEDES-BENZ"], 45000),
+    "Audi": (7, ["A3", "A4", "Q3", "Q5"], ["Audi", "AUDI"], 40000),
+    "Citroën": (6, ["C3", "C4", "C5 Aircross"], ["Citroën", "Citroen"], 21000),
+    "Kia": (5, ["Sportage", "Ceed", "Niro"], ["Kia", "KIA"], 26000),
+    "Hyundai": (5, ["Tucson", "i30", "Kona"], ["Hyundai"], 26000),
+    "Ford": (5, ["Focus", "Fiesta", "Kuga"], ["Ford"], 23000),
+    "Opel": (4, ["Corsa", "Astra", "Mokka"], ["Opel"], 20000),
+    "Nissan": (4, ["Qashqai", "Juke", "Micra"], ["Nissan"], 24000),
+    "Dacia": (4, ["Sandero", "Duster"], ["Dacia"], 15000),
+    "Land Rover": (1, ["Range Rover Evoque", "Discovery Sport"], ["Land Rover", "Land"], 50000),
+}
+VERSIONES = ["1.0 TSI", "1.5 TSI FR", "2.0 TDI", "1.2 PureTech", "1.6 HDi", "Hybrid", "1.5 dCi",
+             "2.0 d Sport", "e-Hybrid", "1.3 TCe", "1.6 CRDi", "1.8 Hybrid Active"]
+COMBUSTIBLES = (["Gasolina", "Diésel", "Híbrido", "Eléctrico", "GLP"], [0.42, 0.38, 0.14, 0.04, 0.02])
+TIPOS = ["Compacto", "SUV", "Berlina", "Familiar", "Utilitario", "Monovolumen"]
+COLUMNAS_HISTORICO = ['ID_Unico_Coche', 'Marca', 'Modelo', 'Vendedor', 'Ano', 'KM', 'Tipo', 'Plazas',
+                      'Puertas', 'Combustible', 'Potencia', 'Conduccion', 'URL', 'Primera_Deteccion',
+                      'Estado', 'Fecha_Venta']
+COLUMNAS_SNAPSHOT = ['Marca', 'Modelo', 'Vendedor', 'Año', 'KM', 'Precio al Contado', 'Precio Financiado',
+                     'Tipo', 'Nº Plazas', 'Nº Puertas', 'Combustible', 'Potencia', 'Conducción', 'URL',
+                     'Fecha Extracción']
+
+VIDA_MEDIA_DIAS = 45        # Dias medios que un anuncio sigue publicado
+PROB_BAJADA_DIA = 0.02      # Probabilidad diaria de bajada de precio (2-8 %)
+PROB_SUBIDA_DIA = 0.003     # Probabilidad diaria de subida (3 %)
+PROB_FINANCIADO = 0.7       # Anuncios con precio financiado
+PRIMER_ITEM_ID = 3000000000
+
+def formatear_euros(valor):
+    return f"{valor:,}".replace(',', '.') + " €"
+
+def formatear_km(valor):
+    return f"{valor:,} km".replace(',', '.')
+
+def _textos_compartidos(valores, formato, cache):
+    """Array de textos con un unico objeto str por valor distinto (ahorra memoria en columnas repetidas)"""
+    unicos, codigos = np.unique(valores, return_inverse=True)
+    tabla = np.array([cache.setdefault(int(v), formato(int(v))) for v in unicos], dtype=object)
+    return tabla[codigos]
+
+def _elegir(rng, opciones, n, pesos=None):
+    opciones = np.array(opciones, dtype=object)
+    if pesos is not None:
+        pesos = _pesos_normalizados(pesos)
+    return opciones[rng.choice(len(opciones), size=n, p=pesos)]
+
+def _pesos_normalizados(pesos):
+    pesos = np.asarray(pesos, dtype='float64')
+    return pesos / pesos.sum()
+
+def _pesos_vendedores(n_vendedores):
+    """Tamaños de inventario muy desiguales (ley de Zipf): unos pocos vendedores concentran los coches"""
+    pesos = 1 / np.arange(1, n_vendedores + 1) ** 0.9
+    return pesos / pesos.sum()
+
+def generar_coches(n, rng, primer_id=PRIMER_ITEM_ID):
+    """
+    Atributos fijos de n coches
+
+    Returns:
+        dict de arrays alineados: id, marca, modelo, version, vendedor, ano, km,
+        precio (base), tipo, puertas, combustible, potencia, conduccion, url
+    """
+    nombres = list(MARCAS)
+    marca_idx = rng.choice(len(nombres), size=n, p=_pesos_normalizados([MARCAS[m][0] for m in nombres]))
+    marca = np.array(nombres, dtype=object)[marca_idx]
+    modelo = np.empty(n, dtype=object)
+    precio_nuevo = np.empty(n)
+    for i, nombre in enumerate(nombres):
+        mascara = marca_idx == i
+        modelo[mascara] = _elegir(rng, MARCAS[nombre][1], int(mascara.sum()))
+        precio_nuevo[mascara] = MARCAS[nombre][3]
+    version = _elegir(rng, VERSIONES, n)
+
+    vendedores = list(get_sellers(vendor_group='todos'))
+    vendedor = np.array(vendedores, dtype=object)[rng.choice(len(vendedores), size=n,
+                                                             p=_pesos_vendedores(len(vendedores)))]
+    edad = np.minimum(rng.gamma(2.0, 2.5, n), 16).astype(int)
+    ano = 2025 - edad
+    km = (np.maximum(edad, 0.3) * rng.uniform(8000, 22000, n) / 100).astype(int) * 100
+    precio = np.clip(np.round(precio_nuevo * 0.86 ** edad * rng.uniform(0.8, 1.2, n), -2), 1500, 150000).astype(int)
+
+    ids = primer_id + np.arange(n)
+    slugs = [f"{ma}-{mo}-{ve}".lower().replace(' ', '-').replace('.', '-') for ma, mo, ve in zip(marca, modelo, version)]
+    urls = np.array([f"https://es.wallapop.com/item/{slug}-{item}" for slug, item in zip(slugs, ids)], dtype=object)
+
+    return {
+        'id': ids.astype(str).astype(object), 'marca': marca, 'modelo': modelo, 'version': version,
+        'vendedor': vendedor, 'ano': ano, 'km': km, 'precio': precio,
+        'tipo': _elegir(rng, TIPOS, n), 'puertas': _elegir(rng, ["3 puertas", "5 puertas"], n, [0.15, 0.85]),
+        'combustible': _elegir(rng, COMBUSTIBLES[0], n, COMBUSTIBLES[1]), 'potencia': rng.integers(65, 300, n),
+        'conduccion': _elegir(rng, ["Manual", "Automático"], n, [0.6, 0.4]), 'url': urls,
+    }
+
+def _paso_precio(rng, precio):
+    """Un dia del paseo de precio: bajadas del 2-8 % y alguna subida, redondeado a 100 €"""
+    u = rng.random(len(precio))
+    baja = u < PROB_BAJADA_DIA
+    sube = u > 1 - PROB_SUBIDA_DIA
+    factor = np.where(baja, 1 - rng.uniform(0.02, 0.08, len(precio)), np.where(sube, 1.03, 1.0))
+    return np.maximum(np.round(precio * factor, -2), 500).astype(int)
+
+def generar_escenario(n_historico, n_dias=60, semilla=42, fecha_snapshot=None, primer_id=PRIMER_ITEM_ID):
+    """
+    Historico Data_Historico de n_dias fechas y el snapshot SCR del dia siguiente
+
+    Los coches se dan de alta a lo largo del periodo (y antes de el), siguen
+    publicados una media de VIDA_MEDIA_DIAS y se marcan vendidos al desaparecer.
+    El snapshot contiene los activos menos ~3 % vendidos hoy, con su precio
+    tras un paso mas del paseo, y ~2 % de coches nuevos. Los numeros de anuncio
+    empiezan en primer_id (otro valor da coches que no coinciden con otro escenario).
+
+    Returns:
+        (df_historico, df_snapshot, fecha_snapshot)
+    """
+    rng = np.random.default_rng(semilla)
+    fecha_snapshot = fecha_snapshot or datetime.now()
+    fechas = [(fecha_snapshot - timedelta(days=n_dias - i)).strftime("%d/%m/%Y") for i in range(n_dias)]
+    coches = generar_coches(n_historico, rng, primer_id=primer_id)
+
+    alta = rng.integers(-VIDA_MEDIA_DIAS, n_dias, n_historico)
+    fin = alta + 1 + rng.geometric(1 / VIDA_MEDIA_DIAS, n_historico)
+    # Todo coche del historico ha estado publicado al menos un dia del periodo
+    alta = np.minimum(np.maximum(alta, 0), n_dias - 1)
+    fin = np.maximum(fin, alta + 1)
+    activo = fin >= n_dias
+
+    textos_euros = {}
+    columnas = {
+        'ID_Unico_Coche': coches['id'], 'Marca': coches['marca'], 'Modelo': coches['modelo'],
+        'Vendedor': coches['vendedor'], 'Ano': coches['ano'].astype(str).astype(object),
+        'KM': _textos_compartidos(coches['km'], formatear_km, {}),
+        'Tipo': coches['tipo'], 'Plazas': np.full(n_historico, "5 plazas", dtype=object),
+        'Puertas': coches['puertas'], 'Combustible': coches['combustible'],
+        'Potencia': _textos_compartidos(coches['potencia'], lambda v: f"{v} CV", {}),
+        'Conduccion': coches['conduccion'], 'URL': coches['url'],
+        'Primera_Deteccion': np.array(fechas, dtype=object)[alta],
+        'Estado': np.where(activo, 'activo', 'vendido').astype(object),
+        'Fecha_Venta': np.where(activo, '', np.array(fechas + [''], dtype=object)[np.minimum(fin, n_dias)]).astype(object),
+    }
+    precio = coches['precio']
+    for d, fecha in enumerate(fechas):
+        if d:
+            precio = _paso_precio(rng, precio)
+        textos = _textos_compartidos(precio, formatear_euros, textos_euros)
+        columnas[f"Precio_{fecha}"] = np.where((alta <= d) & (d < fin), textos, '').astype(object)
+    df_historico = pd.DataFrame(columnas)
+
+    # Snapshot de hoy: activos que siguen (~97 %) + ~2 % de altas
+    sigue = activo & (rng.random(n_historico) >= 0.03)
+    precio_hoy = _paso_precio(rng, precio)[sigue]
+    nuevos = generar_coches(max(1, int(activo.sum() * 0.02)), rng, primer_id=primer_id + n_historico)
+    filas = {clave: np.concatenate([valores[sigue], nuevos[clave]]) for clave, valores in coches.items()}
+    precio_hoy = np.concatenate([precio_hoy, nuevos['precio']])
+    n_snapshot = len(precio_hoy)
+    financiado = rng.random(n_snapshot) < PROB_FINANCIADO
+    df_snapshot = pd.DataFrame({
+        'Marca': filas['marca'], 'Modelo': [f"{mo} {ve}" for mo, ve in zip(filas['modelo'], filas['version'])],
+        'Vendedor': filas['vendedor'], 'Año': filas['ano'].astype(str).astype(object),
+        'KM': _textos_compartidos(filas['km'], formatear_km, {}),
+        'Precio al Contado': _textos_compartidos(precio_hoy, formatear_euros, textos_euros),
+        'Precio Financiado': np.where(financiado, _textos_compartidos(np.round(precio_hoy * 0.93, -2).astype(int),
+                                                                      formatear_euros, textos_euros),
+                                      "No especificado").astype(object),
+        'Tipo': filas['tipo'], 'Nº Plazas': "5 plazas", 'Nº Puertas': filas['puertas'],
+        'Combustible': filas['combustible'],
+        'Potencia': [f"{v} caballos" for v in filas['potencia']],
+        'Conducción': filas['conduccion'], 'URL': filas['url'],
+        'Fecha Extracción': fecha_snapshot.strftime("%d/%m/%Y"),
+    }, columns=COLUMNAS_SNAPSHOT)
+    return df_historico, df_snapshot, fecha_snapshot
+
+def generar_titulos(n, semilla=42):
+    """Titulos de ficha en bruto: alias y mayusculas de marca, versiones, ~10 % con el ID al final"""
+    rng = np.random.default_rng(semilla)
+    coches = generar_coches(n, rng)
+    alias = {marca: MARCAS[marca][2] for marca in MARCAS}
+    titulos = []
+    con_id = rng.random(n) < 0.1
+    eleccion = rng.integers(0, 3, n)
+    for i in range(n):
+        variantes = alias[coches['marca'][i]]
+        titulo = f"{variantes[eleccion[i] % len(variantes)]} {coches['modelo'][i]} {coches['version'][i]}"
+        if con_id[i]:
+            titulo += f" {coches['id'][i]}"
+        titulos.append(titulo)
+    return titulos
+
+def generar_textos_precio(n, semilla=42):
+    """Precios en bruto como en las fichas: '12.500 €', sin separador, €/mes, nbsp, vacios y 'No especificado'"""
+    rng = np.random.default_rng(semilla)
+    precios = generar_coches(n, rng)['precio']
+    formatos = [
+        lambda v: formatear_euros(v),
+        lambda v: f"{v}€",
+        lambda v: formatear_euros(v).replace(' ', '\xa0'),
+        lambda v: f"{max(v // 80, 99)} €",  # cuota mensual mostrada como precio
+        lambda v: "No especificado",
+        lambda v: "",
+    ]
+    eleccion = rng.choice(len(formatos), size=n, p=[0.7, 0.08, 0.1, 0.05, 0.05, 0.02])
+    return [formatos[e](int(v)) for e, v in zip(eleccion, precios)]
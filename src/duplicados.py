@@ -0,0 +1,267 @@
+"""
+===============================================================================
+          DUPLICADOS · MISMO COCHE ANUNCIADO POR VARIOS VENDEDORES
+===============================================================================
+
+Descripción:
+    Detecta anuncios probablemente duplicados entre vendedores (las sedes
+    de CRESTANEVADA o las cuentas de Mundicars suelen publicar el mismo
+    coche). Los anuncios se agrupan en bloques por marca, modelo base, año,
+    banda de KM y banda de precio, y solo dentro de cada bloque (y sus
+    vecinos) se comparan KM, precio, potencia/combustible/cambio y la
+    similitud del título: el coste es casi lineal en el número de
+    anuncios. Cada grupo de duplicados recibe un identificador en la
+    columna "Grupo Duplicado" del export.
+
+Funcionalidades principales:
+    • marcar_duplicados: rellena "Grupo Duplicado" (D<nº de anuncio más
+      bajo del grupo, estable entre ejecuciones) y devuelve el resumen.
+    • anuncio_comparable / son_duplicados: el criterio de comparación de
+      dos anuncios, sin bloques (referencia para benchmarks).
+    • Bandas: KM de BANDA_KM en BANDA_KM, precio en bandas logarítmicas de
+      TOLERANCIA_PRECIO; se comparan las bandas vecinas para no perder
+      pares en el borde.
+    • IndiceDuplicados: guarda los anuncios secundarios de cada grupo para
+      no volver a abrir su ficha (opcional, DUPLICADOS_OMITIR). El principal
+      es el anuncio del grupo cuyo vendedor se procesa antes; los grupos
+      solo se forman entre los vendedores de la misma ejecución (un shard
+      job1/job2 no ve los coches del otro). Solo se reutilizan si el
+      principal ya se ha extraído en la ejecución con el mismo precio que
+      cuando se guardaron, y como mucho durante MAX_DIAS_REUTILIZAR días;
+      si no, se abre la ficha.
+
+Configuración (variables de entorno):
+    DUPLICADOS=true                        Columna "Grupo Duplicado"
+    DUPLICADOS_OMITIR=false                Reutilizar el registro de duplicados conocidos
+    DUPLICADOS_SOLO_RELACIONADOS=false     Solo entre vendedores de la misma familia
+    DUPLICADOS_RUTA=../data/duplicados.json
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import json
+import math
+import os
+import re
+import unicodedata
+from datetime import datetime
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+from esquema_datos import parsear_ano, parsear_km, parsear_precio
+from identificador_coches import crear_ids_unicos
+from json_atomico import guardar_json
+
+COLUMNA_GRUPO = "Grupo Duplicado"
+BANDA_KM = 5000             # Ancho de banda de KM del bloque
+TOLERANCIA_KM = 2000        # Diferencia maxima de KM entre duplicados (<= BANDA_KM)
+TOLERANCIA_PRECIO = 0.05    # Diferencia relativa maxima de precio (= ancho de la banda de precio)
+UMBRAL_SIMILITUD = 0.8      # SequenceMatcher.ratio minimo entre titulos normalizados (palabras ordenadas)
+MAX_DIAS_REUTILIZAR = 7
+# Caracteristicas fijas del coche: si las dos fichas las tienen, deben coincidir
+CAMPOS_IDENTICOS = ['Potencia', 'Combustible', 'Conducción']
+
+def normalizar_texto(texto):
+    """Minusculas, sin acentos ni signos, espacios simples"""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode()
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', texto.lower()).split())
+
+def familia_vendedor(vendedor):
+    """Primera palabra del nombre ('CRESTANEVADA VIC C.' -> 'crestanevada', 'MundiCars B.' -> 'mundicars')"""
+    palabras = normalizar_texto(vendedor).split()
+    return palabras[0] if palabras else ''
+
+def _atributo(valor):
+    """Valor normalizado de una caracteristica ('' si no hay dato)"""
+    texto = normalizar_texto(valor) if valor is not None else ''
+    return '' if texto in ('', 'no especificado', 'nan') else texto
+
+def _banda_precio(precio):
+    return math.floor(math.log(precio) / math.log1p(TOLERANCIA_PRECIO))
+
+def anuncio_comparable(coche, km, precio):
+    """Datos de un registro del scraper que usa son_duplicados (km y precio ya parseados)"""
+    marca = normalizar_texto(coche.get('Marca', '')).split()
+    modelo = normalizar_texto(coche.get('Modelo', '')).split()
+    return {'vendedor': coche.get('Vendedor', ''), 'familia': familia_vendedor(coche.get('Vendedor', '')),
+            'km': km, 'precio': precio, 'titulo': ' '.join(sorted(set(marca + modelo))),
+            'numeros': {palabra for palabra in modelo if palabra.isdigit()},
+            'atributos': [_atributo(coche.get(campo)) for campo in CAMPOS_IDENTICOS]}
+
+def son_duplicados(a, b, solo_relacionados=False):
+    """Si dos anuncios (anuncio_comparable) son el mismo coche de vendedores distintos"""
+    if a['vendedor'] == b['vendedor']:
+        return False
+    if solo_relacionados and a['familia'] != b['familia']:
+        return False
+    if abs(a['km'] - b['km']) > TOLERANCIA_KM:
+        return False
+    if abs(a['precio'] - b['precio']) > TOLERANCIA_PRECIO * max(a['precio'], b['precio']):
+        return False
+    if any(x and y and x != y for x, y in zip(a['atributos'], b['atributos'])):
+        return False
+    # Cilindrada/potencia distintas ('1 0 tsi' frente a '2 0 tdi') no son el mismo coche
+    if a['numeros'] and b['numeros'] and not (a['numeros'] <= b['numeros'] or b['numeros'] <= a['numeros']):
+        return False
+    return SequenceMatcher(None, a['titulo'], b['titulo']).ratio() >= UMBRAL_SIMILITUD
+
+def _raiz(padres, i):
+    while padres[i] != i:
+        padres[i] = padres[padres[i]]
+        i = padres[i]
+    return i
+
+def agrupar_duplicados(coches, solo_relacionados=False):
+    """
+    Grupos de anuncios duplicados entre vendedores
+
+    Args:
+        coches: Registros del scraper (dicts con Marca, Modelo, Vendedor, Año, KM, Precio al Contado, URL)
+
+    Returns:
+        (grupos, ids) con grupos = listas de indices (2 o mas anuncios) e ids = ID_Unico_Coche de cada registro
+    """
+    if not coches:
+        return [], []
+    df = pd.DataFrame(coches, columns=['Marca', 'Modelo', 'Vendedor', 'Año', 'KM', 'Precio al Contado', 'URL'])
+    anos = parsear_ano(df['Año'])[0].tolist()
+    kms = parsear_km(df['KM'])[0].tolist()
+    precios = parsear_precio(df['Precio al Contado'])[0].tolist()
+    ids = crear_ids_unicos(df).tolist()
+
+    bloques = {}  # (marca, modelo base, año, banda km, banda precio) -> indices
+    anuncios = []
+    padres = list(range(len(coches)))
+    for i, coche in enumerate(coches):
+        precio = precios[i]
+        anuncio = anuncio_comparable(coche, kms[i], precio)
+        anuncios.append(anuncio)
+        marca = normalizar_texto(coche.get('Marca', '')).split()
+        modelo = normalizar_texto(coche.get('Modelo', '')).split()
+        # Sin marca/modelo, año, KM o precio no hay bloque fiable
+        if not (marca and modelo and anos[i] and kms[i]) or pd.isna(precio) or precio <= 0:
+            continue
+        banda_km, banda_precio = kms[i] // BANDA_KM, _banda_precio(precio)
+        base = (marca[0], modelo[0], anos[i])
+        for dk in (-1, 0, 1):
+            for dp in (-1, 0, 1):
+                for j in bloques.get(base + (banda_km + dk, banda_precio + dp), ()):
+                    if son_duplicados(anuncio, anuncios[j], solo_relacionados):
+                        padres[_raiz(padres, i)] = _raiz(padres, j)
+        bloques.setdefault(base + (banda_km, banda_precio), []).append(i)
+
+    miembros = {}
+    for i in range(len(coches)):
+        miembros.setdefault(_raiz(padres, i), []).append(i)
+    return [grupo for grupo in miembros.values() if len(grupo) > 1], ids
+
+def _clave_id(id_coche):
+    """Orden por numero de anuncio (los IDs MD5 de respaldo van al final)"""
+    return (0, int(id_coche)) if id_coche.isdigit() else (1, id_coche)
+
+def marcar_duplicados(coches, solo_relacionados=False):
+    """
+    Rellena COLUMNA_GRUPO en cada registro ('' si no tiene duplicados)
+
+    El principal de cada grupo es su primer anuncio en coches (orden de
+    procesamiento de los vendedores): es el que ya esta extraido cuando el
+    scraper llega a los demas, asi que IndiceDuplicados puede reutilizarlos.
+    La etiqueta sigue siendo la del numero de anuncio mas bajo.
+
+    Returns:
+        dict con grupos, anuncios duplicados, secundarios ({indice de cada anuncio
+        que no es el principal de su grupo: indice del principal}) y coches unicos
+    """
+    grupos, ids = agrupar_duplicados(coches, solo_relacionados)
+    for coche in coches:
+        coche[COLUMNA_GRUPO] = ''
+    secundarios = {}
+    for grupo in grupos:
+        etiqueta = f"D{ids[min(grupo, key=lambda i: _clave_id(ids[i]))]}"
+        principal = min(grupo)
+        for i in grupo:
+            coches[i][COLUMNA_GRUPO] = etiqueta
+        secundarios.update({i: principal for i in grupo if i != principal})
+    return {'grupos': len(grupos), 'duplicados': sum(len(grupo) for grupo in grupos),
+            'secundarios': secundarios, 'unicos': len(coches) - len(secundarios)}
+
+class IndiceDuplicados:
+    """Duplicados conocidos de ejecuciones anteriores (registro completo de cada anuncio secundario y su principal)"""
+
+    def __init__(self, ruta, omitir=False, solo_relacionados=False):
+        self.ruta = ruta
+        self.omitir = omitir
+        self.solo_relacionados = solo_relacionados
+        # {url: {'registro': dict, 'fecha': 'dd/mm/YYYY', 'principal': url, 'precio_principal': str}}
+        self.secundarios = self._cargar()
+        self.reutilizados = set()  # URLs cuyo registro se ha reutilizado en esta ejecucion
+        self.precios = {}          # {url: 'Precio al Contado'} de las fichas extraidas en esta ejecucion
+
+    @classmethod
+    def desde_entorno(cls):
+        """Indice desde el JSON configurado, o None si la deteccion esta desactivada"""
+        if os.getenv('DUPLICADOS', 'true').lower() != 'true':
+            return None
+        return cls(os.getenv('DUPLICADOS_RUTA', '../data/duplicados.json'),
+                   omitir=os.getenv('DUPLICADOS_OMITIR', 'false').lower() == 'true',
+                   solo_relacionados=os.getenv('DUPLICADOS_SOLO_RELACIONADOS', 'false').lower() == 'true')
+
+    def _cargar(self):
+        try:
+            with open(self.ruta, encoding='utf-8') as f:
+                return json.load(f).get('secundarios', {})
+        except (OSError, ValueError):
+            return {}
+
+    def registro_conocido(self, url, vendedor):
+        """
+        Registro guardado de un duplicado conocido del vendedor, con la fecha de hoy
+
+        None si no se omiten duplicados, si la URL no es un secundario conocido
+        de ese vendedor, si el registro tiene mas de MAX_DIAS_REUTILIZAR dias o
+        si su anuncio principal no se ha extraido ya en esta ejecucion con el
+        mismo precio (un cambio de precio obliga a abrir la ficha).
+        """
+        if not self.omitir or url not in self.secundarios:
+            return None
+        entrada = self.secundarios[url]
+        registro = entrada['registro']
+        dias = (datetime.now() - datetime.strptime(entrada['fecha'], "%d/%m/%Y")).days
+        if registro.get('Vendedor') != vendedor or dias > MAX_DIAS_REUTILIZAR:
+            return None
+        principal = entrada.get('principal')
+        if principal not in self.precios or self.precios[principal] != entrada.get('precio_principal'):
+            return None
+        self.reutilizados.add(url)
+        return dict(registro, **{"Fecha Extracción": datetime.now().strftime("%d/%m/%Y")})
+
+    def observar(self, registro):
+        """Anota el precio de una ficha extraida en esta ejecucion (posible principal de un grupo)"""
+        self.precios[registro.get('URL')] = registro.get('Precio al Contado')
+
+    def actualizar(self, coches):
+        """Marca los duplicados de la ejecucion y recuerda sus anuncios secundarios"""
+        resumen = marcar_duplicados(coches, self.solo_relacionados)
+        hoy = datetime.now().strftime("%d/%m/%Y")
+        anteriores = self.secundarios
+        self.secundarios = {}
+        for i, principal in resumen['secundarios'].items():
+            url = coches[i]['URL']
+            # Un registro reutilizado conserva la fecha de su ultima extraccion real
+            fecha = anteriores[url]['fecha'] if url in self.reutilizados and url in anteriores else hoy
+            self.secundarios[url] = {'registro': coches[i], 'fecha': fecha, 'principal': coches[principal]['URL'],
+                                     'precio_principal': coches[principal].get('Precio al Contado')}
+        return resumen
+
+    def guardar(self):
+        """Escribe los secundarios"""
+        guardar_json(self.ruta, {'secundarios': self.secundarios})
+
+    def mostrar_resumen(self, resumen, total):
+        print(f"DUPLICADOS ENTRE VENDEDORES: {resumen['grupos']} grupos, {resumen['duplicados']} anuncios "
+              f"- {resumen['unicos']}/{total} coches unicos"
+              + (f" ({len(self.reutilizados)} fichas no abiertas por ser duplicados conocidos)" if self.omitir else ""))
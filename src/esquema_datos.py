@@ -0,0 +1,278 @@
+"""
+===============================================================================
+                 ESQUEMA DATOS · LIMPIEZA TIPADA AL INGERIR
+===============================================================================
+
+Descripción:
+    Esquema único de las columnas del scraper y de Data_Historico con
+    funciones de parseo/validación vectorizadas (una operación por columna,
+    sin apply por fila). La limpieza se hace una sola vez al ingerir los
+    datos y devuelve un informe por columna con los valores vacíos,
+    corregidos o rechazados.
+
+Funcionalidades principales:
+    • parsear_km / parsear_ano / parsear_precio sobre Series completas, y
+      km_texto / ano_texto / precio_texto para un solo valor con las mismas
+      regex y límites (sin crear una Serie por llamada).
+    • ESQUEMA_COLUMNAS: tipo de cada columna y su nombre en el scraper
+      (NOMBRES_SCRAPER, el renombrado al formato del histórico).
+    • Límites de validez (PRECIO_MINIMO_VALIDO, PRECIO_MAXIMO_VALIDO,
+      KM_MAXIMO_VALIDO, ANO_MINIMO_VALIDO) declarados en un único sitio.
+    • aplicar_esquema: normaliza textos, genera KM_Numerico_Internal y
+      Ano_Numerico_Internal y valida precios en una pasada.
+    • Lectura de hojas como texto (sin numericise por celda): los tipos
+      salen del esquema.
+
+Uso:
+    df, informe = aplicar_esquema(df_scraper)
+    mostrar_informe(informe)
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+PRECIO_MINIMO_VALIDO = 500     # Euros
+PRECIO_MAXIMO_VALIDO = 500000  # Euros
+KM_MAXIMO_VALIDO = 999999
+ANO_MINIMO_VALIDO = 1990
+PRECIO_CAMBIO_MINIMO = 100  # Euros - cambio mínimo para considerar significativo
+CAMBIO_PORCENTAJE_SIGNIFICATIVO = 5  # Porcentaje mínimo para considerar cambio significativo
+
+# Valores que se consideran "sin dato" en cualquier columna
+VALORES_VACIOS = ['', 'nan', 'NaN', 'None', 'null', 'No especificado']
+
+# Esquema unico: columna de Data_Historico -> (tipo, nombre en las hojas SCR-J1/J2 del
+# scraper; None si solo existe en el historico). Las columnas Precio_dd/mm/yyyy del
+# historico son 'precio_texto' aunque no aparecen aqui: se detectan por prefijo
+ESQUEMA_COLUMNAS = {
+    'ID_Unico_Coche': ('texto', None),
+    'Marca': ('texto', 'Marca'),
+    'Modelo': ('texto', 'Modelo'),
+    'Vendedor': ('texto', 'Vendedor'),
+    'Ano': ('ano', 'Año'),
+    'KM': ('km', 'KM'),
+    'Tipo': ('texto', 'Tipo'),
+    'Plazas': ('texto', 'Nº Plazas'),
+    'Puertas': ('texto', 'Nº Puertas'),
+    'Combustible': ('texto', 'Combustible'),
+    'Potencia': ('texto', 'Potencia'),
+    'Conduccion': ('texto', 'Conducción'),
+    'URL': ('texto', 'URL'),
+    'Precio_Contado': ('precio_texto', 'Precio al Contado'),
+    'Precio Financiado': ('texto', 'Precio Financiado'),
+    'Grupo Duplicado': ('texto', 'Grupo Duplicado'),
+    'Primera_Deteccion': ('texto', None),
+    'Estado': ('texto', None),
+    'Fecha_Venta': ('texto', None),
+    'Fecha_Extraccion': ('texto', 'Fecha Extracción'),
+}
+
+# Nombre en el scraper -> nombre en el historico. Las hojas SCR se leen como str sin
+# numericise (el scraper escribe todo como texto y numericise convertia '007' en 7)
+NOMBRES_SCRAPER = {scraper: columna for columna, (_, scraper) in ESQUEMA_COLUMNAS.items() if scraper}
+
+# Columna interna generada a partir de cada columna parseada
+COLUMNAS_INTERNAS = {'KM': 'KM_Numerico_Internal', 'Ano': 'Ano_Numerico_Internal'}
+
+_PATRON_PRECIO = re.compile(r'(\d+(?:[.,]\d{3})*)\s*(?:€|euros?)', re.IGNORECASE)
+# Primer numero seguido de km/kilometros (los PATRONES_KM_LIMPIEZA de siempre en una sola regex)
+_PATRON_KM = re.compile(r'(\d+(?:[.,]\d{3})*)\s*(?:km|kil[oó]metros?)', re.IGNORECASE)
+_PATRON_ANO = re.compile(r'(\d{4})')
+_NO_DIGITOS = re.compile(r'\D')
+
+def dataframe_desde_valores(valores):
+    """
+    DataFrame de texto a partir de la matriz de una hoja (primera fila = cabecera)
+
+    Las filas que la API devuelve recortadas se rellenan con ''. Devuelve
+    None si la hoja no tiene filas de datos.
+    """
+    if len(valores) < 2:
+        return None
+    cabecera = valores[0]
+    ancho = len(cabecera)
+    filas = [fila if len(fila) == ancho else (fila + [''] * (ancho - len(fila)))[:ancho]
+             for fila in valores[1:]]
+    return pd.DataFrame(filas, columns=cabecera, dtype=object)
+
+def _vacio(valor):
+    """Version escalar de _vacios"""
+    return valor is None or valor != valor or str(valor).strip() in VALORES_VACIOS
+
+def km_texto(valor):
+    """KM de un solo valor (misma regla que parsear_km; 0 si no hay dato)"""
+    if _vacio(valor):
+        return 0
+    texto = str(valor)
+    encontrado = _PATRON_KM.search(texto)
+    digitos = _NO_DIGITOS.sub('', encontrado.group(1) if encontrado else texto)
+    return min(int(digitos), KM_MAXIMO_VALIDO) if digitos else 0
+
+def ano_texto(valor):
+    """Año de un solo valor (misma regla que parsear_ano; 0 si no es valido)"""
+    if _vacio(valor):
+        return 0
+    encontrado = _PATRON_ANO.search(str(valor))
+    ano = int(encontrado.group(1)) if encontrado else 0
+    return ano if ANO_MINIMO_VALIDO <= ano <= datetime.now().year + 1 else 0
+
+def precio_texto(valor):
+    """Precio de un solo valor (misma regla que parsear_precio; None si no hay precio)"""
+    if _vacio(valor):
+        return None
+    encontrado = _PATRON_PRECIO.search(str(valor))
+    return int(re.sub(r'[.,]', '', encontrado.group(1))) if encontrado else None
+
+def precio_en_rango(precio):
+    return PRECIO_MINIMO_VALIDO <= precio <= PRECIO_MAXIMO_VALIDO
+
+def cambio_significativo(anterior, nuevo, minimo=PRECIO_CAMBIO_MINIMO, porcentaje=CAMBIO_PORCENTAJE_SIGNIFICATIVO):
+    """Version escalar de cambios_precio.cambios_significativos (precios numericos, 0 = sin precio)"""
+    if anterior <= 0 or nuevo <= 0 or anterior == nuevo:
+        return False
+    diferencia = abs(nuevo - anterior)
+    return diferencia >= minimo or diferencia / anterior * 100 >= porcentaje
+
+def _vacios(serie):
+    """Mascara de valores sin dato (NaN, '', 'nan', 'No especificado'...)"""
+    return serie.isna() | serie.astype(str).str.strip().isin(VALORES_VACIOS)
+
+def parsear_km(serie):
+    """
+    Kilometraje numerico del primer numero con unidad ('1.5 TSI 85.000 km' -> 85000)
+
+    Sin 'km' en el texto se juntan todos sus digitos ('123.456' -> 123456).
+
+    Returns:
+        (Serie int64, informe) con 0 para vacios o textos sin numero y el
+        valor limitado a [0, KM_MAXIMO_VALIDO]
+    """
+    vacios = _vacios(serie)
+    texto = serie.astype(str)
+    numeros = texto.str.extract(_PATRON_KM, expand=False).fillna(texto)
+    digitos = numeros.str.replace(_NO_DIGITOS, '', regex=True).where(~vacios, '')
+    valores = pd.to_numeric(digitos.where(digitos != ''), errors='coerce')
+    sin_numero = ~vacios & valores.isna()
+    fuera_rango = valores > KM_MAXIMO_VALIDO
+    km = valores.clip(0, KM_MAXIMO_VALIDO).fillna(0).astype('int64')
+    return km, {'vacios': int(vacios.sum()), 'coercionados': int(fuera_rango.sum()),
+                'rechazados': int(sin_numero.sum())}
+
+def parsear_ano(serie):
+    """
+    Año numerico: primer grupo de 4 digitos dentro de [ANO_MINIMO_VALIDO, año actual + 1]
+
+    Returns:
+        (Serie int64, informe) con 0 para vacios o años no validos
+    """
+    vacios = _vacios(serie)
+    valores = pd.to_numeric(serie.astype(str).str.extract(_PATRON_ANO, expand=False), errors='coerce')
+    validos = ~vacios & valores.between(ANO_MINIMO_VALIDO, datetime.now().year + 1)
+    ano = valores.where(validos, 0).fillna(0).astype('int64')
+    return ano, {'vacios': int(vacios.sum()), 'coercionados': 0,
+                 'rechazados': int((~vacios & ~validos).sum())}
+
+def parsear_precio(serie):
+    """
+    Precio numerico de textos tipo '12.500 €' / '12,500 euros'
+
+    Returns:
+        (Serie float con NaN si no hay precio, mascara de precios dentro de
+        [PRECIO_MINIMO_VALIDO, PRECIO_MAXIMO_VALIDO], informe)
+    """
+    vacios = _vacios(serie)
+    numeros = serie.astype(str).str.extract(_PATRON_PRECIO, expand=False)
+    valores = pd.to_numeric(numeros.str.replace(r'[.,]', '', regex=True), errors='coerce').where(~vacios)
+    en_rango = valores.between(PRECIO_MINIMO_VALIDO, PRECIO_MAXIMO_VALIDO)
+    sin_precio = ~vacios & valores.isna()
+    return valores, en_rango, {'vacios': int(vacios.sum()), 'coercionados': 0,
+                               'rechazados': int(sin_precio.sum() + (valores.notna() & ~en_rango).sum())}
+
+def limpiar_texto(serie):
+    """Texto sin NaN/'nan'/'None'/'null' (pasan a ''); devuelve (Serie, informe)"""
+    texto = serie.astype(str)
+    nulos = serie.isna() | texto.isin(['nan', 'NaN', 'None', 'null'])
+    return texto.where(~nulos, ''), {'vacios': int((nulos | (texto == '')).sum()),
+                                     'coercionados': int(nulos.sum()), 'rechazados': 0}
+
+def limpiar_numero(serie):
+    """Columna numerica sin inf/NaN (pasan a 0) y limitada a +-1e10; devuelve (Serie, informe)"""
+    invalidos = ~np.isfinite(serie.astype('float64'))
+    return serie.where(~invalidos, 0).clip(-1e10, 1e10), {'vacios': int(serie.isna().sum()),
+                                                          'coercionados': int(invalidos.sum()), 'rechazados': 0}
+
+def _es_numerica(serie):
+    return pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)
+
+def limpiar_valores_vacios(df):
+    """
+    Normaliza todo el DataFrame: numericas sin inf/NaN (0) y textos sin NaN ('')
+
+    Se usa tras combinar historico y coches nuevos, donde pueden aparecer
+    NaN en columnas que solo existian en una de las dos partes.
+    """
+    for columna in df.columns:
+        if _es_numerica(df[columna]):
+            df[columna] = limpiar_numero(df[columna])[0]
+        elif df[columna].dtype == object:
+            df[columna] = limpiar_texto(df[columna])[0]
+    return df
+
+def aplicar_esquema(df, esquema=ESQUEMA_COLUMNAS):
+    """
+    Limpia y valida un DataFrame (scraper o historico) segun el esquema
+
+    Los textos se normalizan, KM y Ano generan sus columnas internas y los
+    precios se validan contra los limites sin modificar el texto guardado.
+
+    Returns:
+        (df, informe) con informe = {columna: {'vacios', 'coercionados', 'rechazados'}}
+    """
+    informe = {}
+    for columna in list(df.columns):
+        tipo = esquema[columna][0] if columna in esquema else ('precio_texto' if columna.startswith('Precio_') else None)
+        if tipo is None:
+            continue
+        if _es_numerica(df[columna]):
+            # p.ej. Ano leido como numero desde Sheets
+            df[columna], informe[columna] = limpiar_numero(df[columna])
+        elif df[columna].dtype == object:
+            df[columna], informe[columna] = limpiar_texto(df[columna])
+        else:
+            continue
+
+        if tipo == 'km':
+            df[COLUMNAS_INTERNAS[columna]], informe[columna] = parsear_km(df[columna])
+        elif tipo == 'ano':
+            df[COLUMNAS_INTERNAS[columna]], informe[columna] = parsear_ano(df[columna])
+        elif tipo == 'precio_texto' and columna == 'Precio_Contado':
+            informe[columna] = parsear_precio(df[columna])[2]
+
+    # Columnas internas aunque falte la columna de origen (p.ej. historico sin KM)
+    for origen, interna in COLUMNAS_INTERNAS.items():
+        if interna not in df.columns:
+            if origen in df.columns:
+                parser = parsear_km if origen == 'KM' else parsear_ano
+                df[interna], informe[origen] = parser(df[origen])
+            else:
+                df[interna] = 0
+    return df, informe
+
+def mostrar_informe(informe, titulo="ESQUEMA"):
+    """Imprime solo las columnas con valores corregidos o rechazados"""
+    filas = {col: datos for col, datos in informe.items() if datos['coercionados'] or datos['rechazados']}
+    if not filas:
+        print(f"{titulo}: {len(informe)} columnas validadas sin correcciones")
+        return
+    print(f"{titulo}: {len(informe)} columnas validadas")
+    for columna, datos in filas.items():
+        print(f"    - {columna}: {datos['coercionados']} corregidos, {datos['rechazados']} rechazados, "
+              f"{datos['vacios']} vacios")
@@ -0,0 +1,317 @@
+"""
+===============================================================================
+               EXTRACCION JS · FICHA DE COCHE EN UN SOLO ROUND-TRIP
+===============================================================================
+
+Descripción:
+    Recoge todos los datos en bruto de la ficha de un coche con un único
+    execute_async_script en lugar de decenas de comandos WebDriver
+    (find_elements, .text, esperas...). El script usa en la página los
+    mismos selectores XPath/CSS que la extracción con Selenium, espera a que
+    el título y los precios estén renderizados y devuelve un objeto JSON
+    que COCHES_SCR procesa con el mismo post-procesado en Python.
+
+Funcionalidades principales:
+    • Título, precios contado/financiado por etiqueta y por CSS, primeros
+      textos con '€', spans de atributos y pares Kilómetros/Año/Marca.
+    • HTML de la página solo si faltan los kilómetros o el año (fallback
+      por expresiones regulares).
+    • Espera dentro del navegador (sin sondeo desde Python).
+    • RecolectorEnlaces: enlaces /item/ de la página del vendedor en orden
+      de aparición, sin duplicados e incrementales (un MutationObserver
+      acumula los anuncios anadidos, así cada llamada no recorre el DOM).
+    • paginar_ver_mas: pulsa "Ver más productos" en cuanto llegan tarjetas
+      nuevas (observer en la página, sin esperas fijas) y para al alcanzar
+      el inventario anunciado por el vendedor o si no llega nada a tiempo.
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+from identificador_coches import canonicalizar_url
+
+ESPERA_RENDER_MS = 2500  # Debe quedar por debajo del script timeout del driver
+
+SCRIPT_EXTRACCION = r"""
+var cfg = arguments[0], terminar = arguments[arguments.length - 1];
+
+function texto(el) { return el ? (el.innerText || el.textContent || '').trim() : ''; }
+function nodos(expr) {
+    return document.evaluate(expr, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+}
+function primerXpath(expr) {
+    var r = nodos(expr);
+    return r.snapshotLength ? texto(r.snapshotItem(0)) : null;
+}
+function textosCss(selectores) {
+    var out = [];
+    selectores.forEach(function (sel) {
+        document.querySelectorAll(sel).forEach(function (el) { out.push(texto(el)); });
+    });
+    return out;
+}
+
+function recoger() {
+    var titulo = '';
+    for (var i = 0; i < cfg.titulo.length; i++) {
+        var el = document.querySelector(cfg.titulo[i]);
+        if (el && texto(el)) { titulo = texto(el); break; }
+    }
+    var euros = nodos(cfg.xpath_euros), textosEuro = [];
+    for (var j = 0; j < Math.min(cfg.max_textos_euro, euros.snapshotLength); j++) {
+        textosEuro.push(texto(euros.snapshotItem(j)));
+    }
+    var km = primerXpath(cfg.xpath_km), anio = primerXpath(cfg.xpath_anio);
+    return {
+        titulo: titulo,
+        contado: primerXpath(cfg.xpath_contado),
+        financiado: primerXpath(cfg.xpath_financiado),
+        contado_css: textosCss(cfg.css_contado),
+        financiado_css: textosCss(cfg.css_financiado),
+        textos_euro: textosEuro,
+        atributos: textosCss([cfg.css_atributos]),
+        km: km,
+        anio: anio,
+        marca: primerXpath(cfg.xpath_marca),
+        html: (km === null || anio === null) ? document.documentElement.outerHTML : null,
+        espera_ms: Date.now() - inicio
+    };
+}
+
+var inicio = Date.now();
+(function intentar() {
+    var listo = document.querySelector('h1') && nodos(cfg.xpath_euros).snapshotLength > 0;
+    if (listo || Date.now() - inicio >= cfg.espera_ms) {
+        try {
+            var datos = recoger();
+            datos.agotado = !listo;  // Sin titulo/precios en espera_ms: timeout de render
+            terminar(datos);
+        } catch (e) { terminar({error: String(e)}); }
+    } else {
+        setTimeout(intentar, 100);
+    }
+})();
+"""
+
+def recoger_datos_js(driver, selectores, espera_ms=ESPERA_RENDER_MS):
+    """
+    Datos en bruto de la ficha abierta en el driver (un solo comando WebDriver)
+
+    Args:
+        driver: WebDriver con la pagina del coche ya cargada
+        selectores: dict con los selectores de COCHES_SCR (titulo, xpath_contado, ...)
+        espera_ms: Espera maxima en la pagina a que aparezcan titulo y precios
+
+    Returns:
+        dict con titulo, contado, financiado, contado_css, financiado_css,
+        textos_euro, atributos, km, anio, marca, html, espera_ms (espera
+        real) y agotado (se agoto espera_ms); None si el script falla
+    """
+    try:
+        datos = driver.execute_async_script(SCRIPT_EXTRACCION, dict(selectores, espera_ms=espera_ms))
+    except Exception as e:
+        print(f"AVISO: Extraccion JS fallida ({str(e)[:80]}), usando Selenium")
+        return None
+    if not isinstance(datos, dict) or 'error' in datos:
+        motivo = datos.get('error') if isinstance(datos, dict) else 'respuesta vacia'
+        print(f"AVISO: Extraccion JS sin datos ({motivo}), usando Selenium")
+        return None
+    return datos
+
+# Primera llamada: recorre la pagina e instala un observer que acumula los enlaces que se anadan.
+# Siguientes: solo procesa los acumulados. Devuelve los href nuevos en orden de aparicion.
+SCRIPT_ENLACES = r"""
+var SELECTOR = "a[href*='/item/']";
+var estado = window.__motickEnlaces, candidatos;
+if (!estado) {
+    estado = window.__motickEnlaces = {vistos: new Set(), pendientes: []};
+    candidatos = Array.prototype.slice.call(document.querySelectorAll(SELECTOR));
+    new MutationObserver(function (mutaciones) {
+        mutaciones.forEach(function (m) {
+            if (m.type === 'attributes') {
+                if (m.target.matches(SELECTOR)) { estado.pendientes.push(m.target); }
+                return;
+            }
+            m.addedNodes.forEach(function (n) {
+                if (n.nodeType !== 1) { return; }
+                if (n.matches(SELECTOR)) { estado.pendientes.push(n); }
+                n.querySelectorAll(SELECTOR).forEach(function (a) { estado.pendientes.push(a); });
+            });
+        });
+    }).observe(document.body, {childList: true, subtree: true, attributes: true, attributeFilter: ['href']});
+} else {
+    candidatos = estado.pendientes;
+    estado.pendientes = [];
+}
+var nuevos = [];
+candidatos.forEach(function (a) {
+    var href = a.href;
+    if (!href || href.indexOf('/item/') < 0) { return; }
+    var clave = href.split('#')[0].split('?')[0].replace(/\/+$/, '');
+    if (!estado.vistos.has(clave)) {
+        estado.vistos.add(clave);
+        nuevos.push(href);
+    }
+});
+return nuevos;
+"""
+
+class RecolectorEnlaces:
+    """Enlaces /item/ unicos de la pagina del vendedor, en orden de aparicion"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.enlaces = []  # URLs canonicas
+        self._vistos = set()
+
+    def __len__(self):
+        return len(self.enlaces)
+
+    def _hrefs_pagina(self):
+        try:
+            return self.driver.execute_script(SCRIPT_ENLACES) or []
+        except Exception as e:
+            # Fallback: un comando por enlace (pagina sin document.body, script bloqueado...)
+            print(f"AVISO: Recoleccion JS de enlaces fallida ({str(e)[:80]}), usando Selenium")
+            from selenium.webdriver.common.by import By
+            return [link.get_attribute('href') for link in self.driver.find_elements(By.XPATH, "//a[contains(@href, '/item/')]")]
+
+    def nuevos(self):
+        """Enlaces aparecidos desde la llamada anterior (una sola llamada execute_script)"""
+        nuevos = []
+        for href in self._hrefs_pagina():
+            if not href or '/item/' not in href:
+                continue
+            url = canonicalizar_url(href)
+            if url and url not in self._vistos:
+                self._vistos.add(url)
+                nuevos.append(url)
+        self.enlaces.extend(nuevos)
+        return nuevos
+
+# "Ver mas productos": pulsa el boton (esperando a que aparezca) y termina en cuanto el observer ve
+# tarjetas nuevas o se agota el tiempo. Una llamada execute_async_script por pulsacion.
+SCRIPT_VER_MAS = r"""
+var cfg = arguments[0], terminar = arguments[arguments.length - 1];
+var SELECTOR = "a[href*='/item/']";
+var pulsado = false, terminado = false, temporizador = null, momentoPulsado = 0;
+
+function textoBoton(el) {
+    return ((el.getAttribute('text') || el.innerText || el.textContent || el.getAttribute('aria-label') || '')
+            .toLowerCase());
+}
+function buscarBoton() {
+    var candidatos = document.querySelectorAll('walla-button, button');
+    for (var i = 0; i < candidatos.length; i++) {
+        var el = candidatos[i], caja = el.getBoundingClientRect();
+        if (el.disabled || caja.width === 0 || caja.height === 0) { continue; }
+        var texto = textoBoton(el);
+        if (cfg.frases.some(function (f) { return texto.indexOf(f) >= 0; })) { return el; }
+    }
+    return null;
+}
+function pulsar() {
+    var boton = buscarBoton();
+    if (!boton) { return false; }
+    boton.scrollIntoView({block: 'center'});
+    // walla-button es un web component: el listener esta en el <button> interno
+    var interno = boton.shadowRoot && boton.shadowRoot.querySelector('button');
+    (interno || boton).click();
+    pulsado = true;
+    momentoPulsado = Date.now();
+    clearTimeout(temporizador);
+    temporizador = setTimeout(function () { fin(false); }, cfg.espera_tarjetas_ms);
+    return true;
+}
+function inventario() {
+    if (!cfg.leer_inventario) { return null; }
+    var m = (document.body.innerText || '').match(new RegExp(cfg.patron_inventario, 'i'));
+    return m ? parseInt(m[1].replace(/\./g, ''), 10) : null;
+}
+function fin(nuevas) {
+    if (terminado) { return; }
+    terminado = true;
+    observer.disconnect();
+    clearTimeout(temporizador);
+    terminar({boton: pulsado, nuevas: nuevas, inventario: inventario(),
+              ms: pulsado ? Date.now() - momentoPulsado : null});
+}
+function traeTarjetas(n) {
+    return n.nodeType === 1 && (n.matches(SELECTOR) || n.querySelector(SELECTOR) !== null);
+}
+
+var observer = new MutationObserver(function (mutaciones) {
+    if (!pulsado) { pulsar(); return; }
+    for (var i = 0; i < mutaciones.length; i++) {
+        var anadidos = mutaciones[i].addedNodes;
+        for (var j = 0; j < anadidos.length; j++) {
+            if (traeTarjetas(anadidos[j])) { fin(true); return; }
+        }
+    }
+});
+observer.observe(document.body, {childList: true, subtree: true});
+window.scrollTo(0, document.body.scrollHeight);
+if (!pulsar()) {
+    temporizador = setTimeout(function () { fin(false); }, cfg.espera_boton_ms);
+}
+"""
+
+FRASES_VER_MAS = ['ver más productos', 'ver más', 'más productos']
+PATRON_INVENTARIO = r'(\d[\d.]*)\s+productos?\b'  # "123 productos" en el perfil del vendedor
+ESPERA_BOTON_MS = 3000     # Tiempo maximo para que aparezca el boton tras el scroll
+ESPERA_TARJETAS_MS = 8000  # Sin tarjetas nuevas en este tiempo se da la carga por terminada
+MAX_PULSACIONES = 50
+
+def paginar_ver_mas(driver, recolector, max_pulsaciones=MAX_PULSACIONES, espera_tarjetas_ms=ESPERA_TARJETAS_MS,
+                    registrar_espera=None):
+    """
+    Carga todos los anuncios del vendedor pulsando "Ver mas productos"
+
+    Cada pulsacion es una llamada que vuelve en cuanto llegan tarjetas nuevas;
+    despues el recolector anade solo los enlaces nuevos. Se para cuando no
+    hay boton, cuando no llegan tarjetas en espera_tarjetas_ms o cuando ya
+    se tienen tantos anuncios como el inventario anunciado en el perfil.
+    registrar_espera(segundos, agotado) recibe lo que tardo cada pulsacion
+    (agotado=True si no llegaron tarjetas antes de espera_tarjetas_ms).
+
+    Returns:
+        Numero de pulsaciones realizadas
+    """
+    config = {'frases': FRASES_VER_MAS, 'patron_inventario': PATRON_INVENTARIO,
+              'espera_boton_ms': ESPERA_BOTON_MS, 'espera_tarjetas_ms': espera_tarjetas_ms}
+    timeout_original = driver.timeouts.script
+    driver.set_script_timeout((ESPERA_BOTON_MS + espera_tarjetas_ms) / 1000 + 2)
+
+    pulsaciones, inventario = 0, None
+    try:
+        while pulsaciones < max_pulsaciones:
+            if inventario and len(recolector) >= inventario:
+                print(f"Inventario anunciado completo ({inventario} anuncios)")
+                break
+            try:
+                estado = driver.execute_async_script(SCRIPT_VER_MAS, dict(config, leer_inventario=pulsaciones == 0))
+            except Exception as e:
+                # Se conservan los enlaces ya recogidos
+                print(f"AVISO: Paginacion interrumpida ({str(e)[:80]})")
+                break
+            # Un numero menor que la primera pagina no puede ser el inventario (otro texto de la pagina)
+            if pulsaciones == 0 and estado.get('inventario') and estado['inventario'] > len(recolector):
+                inventario = estado['inventario']
+                print(f"Inventario anunciado por el vendedor: {inventario}")
+            if not estado.get('boton'):
+                print("No se encontro boton 'Ver mas'")
+                break
+
+            pulsaciones += 1
+            if registrar_espera and estado.get('ms') is not None:
+                registrar_espera(estado['ms'] / 1000, not estado.get('nuevas'))
+            nuevos = recolector.nuevos()
+            print(f"Boton 'Ver mas' #{pulsaciones}: +{len(nuevos)} anuncios (total {len(recolector)})")
+            if not estado.get('nuevas') and not nuevos:
+                print(f"Sin tarjetas nuevas en {espera_tarjetas_ms / 1000:.1f}s, carga terminada")
+                break
+    finally:
+        driver.set_script_timeout(timeout_original)
+    return pulsaciones
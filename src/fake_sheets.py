@@ -0,0 +1,299 @@
+"""
+===============================================================================
+                 FAKE SHEETS · BACKEND EN MEMORIA PARA BENCHMARKS
+===============================================================================
+
+Descripción:
+    Sustituto local del cliente de gspread que implementa solo la parte
+    de la API que usan GoogleSheetsUploader y AnalizadorHistoricoCoches.
+    Permite medir y probar las rutas de subida/lectura sin credenciales
+    ni conexión a Google Sheets.
+
+Funcionalidades principales:
+    • Cliente, spreadsheet y worksheets en memoria (compatibles con gspread).
+    • Latencia simulada por llamada a la API.
+    • Errores de cuota (HTTP 429) simulados con probabilidad configurable.
+    • update/batch_update fuera de la rejilla (row_count x col_count) fallan
+      con HTTP 400 como en Sheets; solo append_rows añade filas.
+    • Contador de llamadas por método para comparar rutas de código.
+
+Uso:
+    client = FakeSheetsClient(latencia=0.05)
+    uploader = GoogleSheetsUploader(sheet_id="fake", client=client)
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import random
+import time
+from collections import Counter
+
+import gspread
+from gspread.utils import a1_range_to_grid_range, numericise_all, to_records
+
+class _RespuestaCuota:
+    """Respuesta HTTP minima para construir un gspread.exceptions.APIError"""
+    status_code = 429
+    text = "Quota exceeded (simulado)"
+
+    def json(self):
+        return {
+            'error': {
+                'code': 429,
+                'message': "Quota exceeded for quota metric 'Read requests' (simulado)",
+                'status': 'RESOURCE_EXHAUSTED'
+            }
+        }
+
+class _RespuestaLimites:
+    """Respuesta HTTP 400 de Sheets al escribir fuera de la rejilla de la hoja"""
+    status_code = 400
+
+    def __init__(self, mensaje):
+        self.text = mensaje
+
+    def json(self):
+        return {'error': {'code': 400, 'message': self.text, 'status': 'INVALID_ARGUMENT'}}
+
+def _valor_formateado(valor):
+    """Simula FORMATTED_VALUE: lo que devuelve Sheets al leer una celda como texto"""
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        return 'TRUE' if valor else 'FALSE'
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+def _separar_rango(rango):
+    """Separa "'Hoja'!A1:B2" en (titulo, 'A1:B2'); el titulo puede ser None"""
+    if '!' in rango:
+        titulo, celdas = rango.rsplit('!', 1)
+        return titulo.strip("'"), celdas
+    if rango and rango[0] == "'":
+        return rango.strip("'"), None
+    return None, rango
+
+class FakeSheetsClient:
+    def __init__(self, latencia=0.0, prob_error_cuota=0.0, semilla=None):
+        """
+        Cliente en memoria compatible con gspread.Client
+
+        Args:
+            latencia: Segundos de espera simulados por cada llamada a la API
+            prob_error_cuota: Probabilidad (0-1) de que una llamada falle con 429
+            semilla: Semilla para que los errores simulados sean reproducibles
+        """
+        self.latencia = latencia
+        self.prob_error_cuota = prob_error_cuota
+        self._random = random.Random(semilla)
+        self.llamadas = Counter()
+        self._spreadsheets = {}
+
+    def _llamada_api(self, metodo):
+        """Registra una llamada, aplica la latencia y, si toca, lanza un error de cuota"""
+        self.llamadas[metodo] += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+        if self.prob_error_cuota and self._random.random() < self.prob_error_cuota:
+            raise gspread.exceptions.APIError(_RespuestaCuota())
+
+    def open_by_key(self, key):
+        self._llamada_api('open_by_key')
+        if key not in self._spreadsheets:
+            self._spreadsheets[key] = FakeSpreadsheet(self, key)
+        return self._spreadsheets[key]
+
+    def total_llamadas(self):
+        """Numero total de llamadas a la API simuladas"""
+        return sum(self.llamadas.values())
+
+class FakeSpreadsheet:
+    def __init__(self, client, key, title="Fake Spreadsheet"):
+        self.client = client
+        self.id = key
+        self.title = title
+        self._worksheets = []
+        self._siguiente_id = 0
+
+    def fetch_sheet_metadata(self, params=None):
+        self.client._llamada_api('fetch_sheet_metadata')
+        return {
+            'properties': {'title': self.title},
+            'sheets': [{'properties': ws._properties()} for ws in self._worksheets]
+        }
+
+    def worksheets(self, exclude_hidden=False):
+        self.client._llamada_api('worksheets')
+        return list(self._worksheets)
+
+    def worksheet(self, title):
+        self.client._llamada_api('worksheet')
+        return self._buscar(title)
+
+    def _buscar(self, title):
+        for ws in self._worksheets:
+            if ws.title == title:
+                return ws
+        raise gspread.WorksheetNotFound(title)
+
+    def add_worksheet(self, title, rows, cols, index=None):
+        self.client._llamada_api('add_worksheet')
+        if any(ws.title == title for ws in self._worksheets):
+            raise gspread.exceptions.GSpreadException(f"Ya existe una hoja llamada {title}")
+        worksheet = FakeWorksheet(self, self._siguiente_id, title, rows, cols)
+        self._siguiente_id += 1
+        if index is None:
+            self._worksheets.append(worksheet)
+        else:
+            self._worksheets.insert(index, worksheet)
+        return worksheet
+
+    def del_worksheet(self, worksheet):
+        self.client._llamada_api('del_worksheet')
+        self._worksheets = [ws for ws in self._worksheets if ws.id != worksheet.id]
+
+    def values_batch_get(self, ranges, params=None):
+        self.client._llamada_api('values_batch_get')
+        value_ranges = []
+        for rango in ranges:
+            titulo, celdas = _separar_rango(rango)
+            worksheet = self._buscar(titulo)
+            valores = worksheet._leer(celdas, formateado=(params or {}).get('valueRenderOption') != 'UNFORMATTED_VALUE')
+            value_ranges.append({'range': rango, 'majorDimension': 'ROWS', 'values': valores})
+        return {'spreadsheetId': self.id, 'valueRanges': value_ranges}
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, sheet_id, title, rows, cols):
+        self.spreadsheet = spreadsheet
+        self.client = spreadsheet.client
+        self.id = sheet_id
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self._celdas = []
+
+    def _properties(self):
+        return {
+            'sheetId': self.id,
+            'title': self.title,
+            'gridProperties': {'rowCount': self.row_count, 'columnCount': self.col_count}
+        }
+
+    def _escribir(self, fila_inicio, col_inicio, valores, ampliar=False):
+        """
+        Escribe un bloque (indices base 0)
+
+        Fuera de la rejilla lanza APIError (400) salvo con ampliar=True (append_rows).
+        """
+        filas_fin = fila_inicio + len(valores)
+        cols_fin = col_inicio + max((len(fila) for fila in valores), default=0)
+        if not ampliar and (filas_fin > self.row_count or cols_fin > self.col_count):
+            raise gspread.exceptions.APIError(_RespuestaLimites(
+                f"Range ('{self.title}'!R{fila_inicio + 1}C{col_inicio + 1}:R{filas_fin}C{cols_fin}) "
+                f"exceeds grid limits. Max rows: {self.row_count}, max columns: {self.col_count}"))
+        for i, fila in enumerate(valores):
+            r = fila_inicio + i
+            while len(self._celdas) <= r:
+                self._celdas.append([])
+            destino = self._celdas[r]
+            fin = col_inicio + len(fila)
+            if len(destino) < fin:
+                destino.extend([''] * (fin - len(destino)))
+            destino[col_inicio:fin] = list(fila)
+            self.col_count = max(self.col_count, fin)
+        self.row_count = max(self.row_count, len(self._celdas))
+
+    def _leer(self, celdas=None, formateado=True):
+        """Devuelve los valores de un rango (o de toda la hoja) recortados y rellenados como la API"""
+        filas = self._celdas
+        if celdas:
+            rango = a1_range_to_grid_range(celdas)
+            filas = [
+                fila[rango.get('startColumnIndex', 0):rango.get('endColumnIndex')]
+                for fila in filas[rango.get('startRowIndex', 0):rango.get('endRowIndex')]
+            ]
+
+        # Recortar filas/columnas vacias del final
+        filas = [list(fila) for fila in filas]
+        for fila in filas:
+            while fila and fila[-1] in ('', None):
+                fila.pop()
+        while filas and not filas[-1]:
+            filas.pop()
+
+        ancho = max((len(fila) for fila in filas), default=0)
+        resultado = []
+        for fila in filas:
+            fila = fila + [''] * (ancho - len(fila))
+            resultado.append([_valor_formateado(v) for v in fila] if formateado else fila)
+        return resultado
+
+    def clear(self):
+        self.client._llamada_api('clear')
+        self._celdas = []
+
+    def resize(self, rows=None, cols=None):
+        self.client._llamada_api('resize')
+        if rows is not None:
+            self.row_count = rows
+            del self._celdas[rows:]
+        if cols is not None:
+            self.col_count = cols
+            for fila in self._celdas:
+                del fila[cols:]
+
+    def update(self, values, range_name=None, **kwargs):
+        self.client._llamada_api('update')
+        # Compatibilidad con la firma antigua update(range_name, values)
+        if isinstance(values, str):
+            values, range_name = range_name, values
+        rango = a1_range_to_grid_range(range_name) if range_name else {}
+        self._escribir(rango.get('startRowIndex', 0), rango.get('startColumnIndex', 0), values)
+        return {'updatedCells': sum(len(fila) for fila in values)}
+
+    def batch_update(self, data, **kwargs):
+        self.client._llamada_api('batch_update')
+        celdas = 0
+        for bloque in data:
+            _, celdas_rango = _separar_rango(bloque['range'])
+            rango = a1_range_to_grid_range(celdas_rango)
+            self._escribir(rango.get('startRowIndex', 0), rango.get('startColumnIndex', 0), bloque['values'])
+            celdas += sum(len(fila) for fila in bloque['values'])
+        return {'totalUpdatedCells': celdas}
+
+    def append_rows(self, values, **kwargs):
+        self.client._llamada_api('append_rows')
+        self._escribir(len(self._leer(formateado=False)), 0, values, ampliar=True)
+        return {'updates': {'updatedRows': len(values)}}
+
+    def delete_rows(self, start_index, end_index=None):
+        self.client._llamada_api('delete_rows')
+        fin = end_index if end_index is not None else start_index
+        borradas = len(self._celdas[start_index - 1:fin])
+        del self._celdas[start_index - 1:fin]
+        self.row_count -= max(fin - start_index + 1, borradas)
+
+    def col_values(self, col, value_render_option=None, **kwargs):
+        self.client._llamada_api('col_values')
+        valores = [fila[col - 1] if len(fila) >= col else ''
+                   for fila in self._leer(formateado=str(value_render_option) != 'UNFORMATTED_VALUE')]
+        while valores and valores[-1] == '':
+            valores.pop()
+        return valores
+
+    def get_all_values(self, value_render_option=None, **kwargs):
+        self.client._llamada_api('get_all_values')
+        return self._leer(formateado=str(value_render_option) != 'UNFORMATTED_VALUE')
+
+    def get_all_records(self, head=1, default_blank='', empty2zero=False, **kwargs):
+        self.client._llamada_api('get_all_records')
+        valores = self._leer()
+        if len(valores) < head:
+            return []
+        cabecera = valores[head - 1]
+        filas = [numericise_all(fila, empty2zero, default_blank) for fila in valores[head:]]
+        return to_records(cabecera, filas)
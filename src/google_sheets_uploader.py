@@ -12,6 +12,9 @@ Funcionalidades principales:
     • Autenticación con credenciales JSON (archivo o string).
     • Prueba de conexión con Google Sheets.
     • Subida de DataFrames a hojas específicas o por grupo de vendedores.
+    • Modo diff: solo se envían las celdas que cambian respecto a la hoja.
+    • Cache de sesión del spreadsheet y de los metadatos de sus hojas.
+    • Lectura de varias hojas en una sola petición batchGet (o en paralelo).
     • Generación de estadísticas y metadata del dataset.
 
 Autor: Carlos Peraza
@@ -24,14 +27,36 @@ Uso: Motick
 """
 
 import gspread
+from gspread.utils import rowcol_to_a1, absolute_range_name, ValueRenderOption
 from google.oauth2.service_account import Credentials
-import pandas as pd
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+def normalizar_celda(valor):
+    """Normaliza un valor para comparar lo que hay en la hoja con lo que se va a subir"""
+    if valor is None:
+        return ''
+    if isinstance(valor, float):
+        if valor != valor or valor in (float('inf'), float('-inf')):
+            return ''
+        if valor.is_integer():
+            return str(int(valor))
+    return str(valor)
+
+def _agrupar_columnas_contiguas(columnas):
+    """Agrupa indices de columna ordenados en tramos contiguos [(inicio, fin), ...]"""
+    tramos = []
+    for col in columnas:
+        if tramos and col == tramos[-1][1] + 1:
+            tramos[-1][1] = col
+        else:
+            tramos.append([col, col])
+    return tramos
+
 class GoogleSheetsUploader:
-    def __init__(self, credentials_json_string=None, sheet_id=None, credentials_file=None):
+    def __init__(self, credentials_json_string=None, sheet_id=None, credentials_file=None, client=None):
         """
         Inicializar uploader con credenciales
         
@@ -39,8 +64,12 @@ class GoogleSheetsUploader:
             credentials_json_string: String JSON de credenciales (para GitHub Actions)
             sheet_id: ID del Google Sheet
             credentials_file: Ruta al archivo de credenciales (para testing local)
+            client: Cliente ya construido (p.ej. FakeSheetsClient para benchmarks)
         """
-        if credentials_json_string:
+        if client is not None:
+            # Cliente inyectado - no se necesitan credenciales
+            self.credentials = None
+        elif credentials_json_string:
             # Para GitHub Actions - desde string JSON
             credentials_dict = json.loads(credentials_json_string)
             self.credentials = Credentials.from_service_account_info(
@@ -62,15 +91,120 @@ class GoogleSheetsUploader:
         else:
             raise Exception("Se necesitan credenciales validas (JSON string o archivo)")
         
-        self.client = gspread.authorize(self.credentials)
+        self.client = client if client is not None else gspread.authorize(self.credentials)
         self.sheet_id = sheet_id
         
+        # Estadisticas de la ultima subida (celdas enviadas, filas cambiadas...)
+        self.last_upload_stats = {}
+        
+        # Cache de sesion: spreadsheet abierto y hojas por titulo
+        self._spreadsheet = None
+        self._worksheets = None
+        self.cache_stats = {'llamadas_api': 0, 'llamadas_ahorradas': 0}
+        
         print("CONEXION: Google Sheets establecida correctamente")
+    
+    def get_spreadsheet(self):
+        """Devuelve el spreadsheet abierto, reutilizando el de la sesion"""
+        if self._spreadsheet is None:
+            self._spreadsheet = self.client.open_by_key(self.sheet_id)
+            self.cache_stats['llamadas_api'] += 1
+        else:
+            self.cache_stats['llamadas_ahorradas'] += 1
+        return self._spreadsheet
+    
+    def _cargar_worksheets(self):
+        """Carga (una vez por sesion) el mapa titulo -> worksheet"""
+        if self._worksheets is None:
+            spreadsheet = self.get_spreadsheet()
+            self._worksheets = {ws.title: ws for ws in spreadsheet.worksheets()}
+            self.cache_stats['llamadas_api'] += 1
+        return self._worksheets
+    
+    def get_worksheet(self, title):
+        """Devuelve la hoja por titulo desde la cache (lanza gspread.WorksheetNotFound)"""
+        worksheets = self._cargar_worksheets()
+        if title not in worksheets:
+            raise gspread.WorksheetNotFound(title)
+        self.cache_stats['llamadas_ahorradas'] += 1
+        return worksheets[title]
+    
+    def list_worksheet_titles(self):
+        """Titulos de todas las hojas del spreadsheet"""
+        return list(self._cargar_worksheets())
+    
+    def worksheet_metadata(self):
+        """Mapa titulo -> {id, filas, columnas} de las hojas cacheadas"""
+        return {
+            title: {'id': ws.id, 'filas': ws.row_count, 'columnas': ws.col_count}
+            for title, ws in self._cargar_worksheets().items()
+        }
+    
+    def add_worksheet(self, title, rows, cols):
+        """Crea una hoja y la registra en la cache"""
+        worksheets = self._cargar_worksheets()
+        worksheet = self.get_spreadsheet().add_worksheet(title=title, rows=rows, cols=cols)
+        self.cache_stats['llamadas_api'] += 1
+        worksheets[title] = worksheet
+        return worksheet
+    
+    def ajustar_hoja(self, worksheet, rows, cols):
+        """Amplia la hoja (una llamada resize) solo si rows x cols no caben en su rejilla"""
+        if rows > worksheet.row_count or cols > worksheet.col_count:
+            worksheet.resize(rows=max(rows, worksheet.row_count), cols=max(cols, worksheet.col_count))
+            self.cache_stats['llamadas_api'] += 1
+    
+    def delete_worksheet(self, title):
+        """Elimina una hoja y la quita de la cache"""
+        worksheet = self.get_worksheet(title)
+        self.get_spreadsheet().del_worksheet(worksheet)
+        self.cache_stats['llamadas_api'] += 1
+        self._worksheets.pop(title, None)
+    
+    def read_worksheets_values(self, titles, value_render_option=ValueRenderOption.formatted):
+        """
+        Lee varias hojas completas en una sola peticion values:batchGet
+        
+        Las hojas que no existen (segun la cache de metadatos) se omiten. Si la
+        peticion agrupada falla, las hojas se leen en paralelo con get_all_values.
+        
+        Returns:
+            dict titulo -> lista de filas (list-of-lists, tal y como las devuelve la API)
+        """
+        existentes = [title for title in titles if title in self._cargar_worksheets()]
+        if not existentes:
+            return {}
+        
+        try:
+            respuesta = self.get_spreadsheet().values_batch_get(
+                [absolute_range_name(title) for title in existentes],
+                params={'valueRenderOption': value_render_option}
+            )
+            rangos = respuesta.get('valueRanges', [])
+            return {title: rango.get('values', []) for title, rango in zip(existentes, rangos)}
+        except gspread.exceptions.APIError as e:
+            print(f"ADVERTENCIA: Lectura agrupada fallida ({e}), leyendo {len(existentes)} hojas en paralelo")
+        
+        def leer(title):
+            return self.get_worksheet(title).get_all_values(value_render_option=value_render_option)
+        
+        with ThreadPoolExecutor(max_workers=len(existentes)) as pool:
+            return dict(zip(existentes, pool.map(leer, existentes)))
+    
+    def invalidate_cache(self):
+        """Descarta el spreadsheet y los metadatos cacheados (p.ej. tras cambios externos)"""
+        self._spreadsheet = None
+        self._worksheets = None
+    
+    def print_cache_report(self):
+        """Muestra las llamadas a la API realizadas y ahorradas por la cache"""
+        print(f"CACHE SHEETS: {self.cache_stats['llamadas_api']} llamadas de metadatos, "
+              f"{self.cache_stats['llamadas_ahorradas']} ahorradas")
         
     def test_connection(self):
         """Probar conexion a Google Sheets"""
         try:
-            spreadsheet = self.client.open_by_key(self.sheet_id)
+            spreadsheet = self.get_spreadsheet()
             print(f"CONEXION: Exitosa al Sheet: {spreadsheet.title}")
             print(f"URL: https://docs.google.com/spreadsheets/d/{self.sheet_id}")
             return True
@@ -78,20 +212,31 @@ class GoogleSheetsUploader:
             print(f"ERROR CONEXION: {str(e)}")
             return False
     
-    def upload_dataframe(self, df, worksheet_name="Datos_Actualizados"):
-        """Subir DataFrame a una hoja especifica"""
+    def upload_dataframe(self, df, worksheet_name="Datos_Actualizados", mode="full", key_column=None):
+        """
+        Subir DataFrame a una hoja especifica
+        
+        Args:
+            df: DataFrame a subir
+            worksheet_name: Nombre de la hoja destino
+            mode: "full" (limpiar y reescribir) o "diff" (solo celdas cambiadas)
+            key_column: Columna clave para el modo diff (por defecto ID_Unico_Coche o URL)
+        """
+        if mode == "diff":
+            return self.upload_dataframe_diff(df, worksheet_name, key_column=key_column)
+        
         try:
             # Abrir Google Sheet
-            spreadsheet = self.client.open_by_key(self.sheet_id)
+            spreadsheet = self.get_spreadsheet()
             print(f"ACCEDIENDO: Sheet {spreadsheet.title}")
             
             # Crear o limpiar worksheet
             try:
-                worksheet = spreadsheet.worksheet(worksheet_name)
+                worksheet = self.get_worksheet(worksheet_name)
                 worksheet.clear()
                 print(f"LIMPIANDO: Hoja {worksheet_name}")
             except gspread.WorksheetNotFound:
-                worksheet = spreadsheet.add_worksheet(
+                worksheet = self.add_worksheet(
                     title=worksheet_name, 
                     rows=len(df) + 10, 
                     cols=len(df.columns) + 2
@@ -103,9 +248,20 @@ class GoogleSheetsUploader:
             data_rows = df.values.tolist()
             all_data = [headers] + data_rows
             
-            # Subir datos
+            # Subir datos (la hoja limpiada conserva su tamano: ampliarla si no caben)
+            self.ajustar_hoja(worksheet, len(all_data), len(headers))
             worksheet.update(all_data)
             
+            celdas_totales = len(all_data) * len(headers)
+            self.last_upload_stats = {
+                'modo': 'full',
+                'celdas_enviadas': celdas_totales,
+                'celdas_totales': celdas_totales,
+                'filas_modificadas': len(df),
+                'filas_nuevas': 0,
+                'rangos': 1
+            }
+            
             print(f"SUBIDA EXITOSA: {worksheet_name}")
             print(f"DATOS: {len(df)} filas x {len(df.columns)} columnas")
             
@@ -115,6 +271,166 @@ class GoogleSheetsUploader:
             print(f"ERROR SUBIDA: {str(e)}")
             return False
     
+    def upload_dataframe_diff(self, df, worksheet_name="Datos_Actualizados", key_column=None, grid_actual=None):
+        """
+        Subir DataFrame enviando solo las celdas que han cambiado
+        
+        Lee la hoja actual, compara fila a fila por la columna clave y envia en
+        un unico batch_update los tramos modificados, las columnas nuevas y las
+        filas nuevas (añadidas al final). El orden de las filas ya existentes en
+        la hoja se conserva. Si el esquema no es compatible (cabecera distinta,
+        claves duplicadas o filas que desaparecen) se hace una subida completa.
+        
+        Args:
+            df: DataFrame a subir
+            worksheet_name: Nombre de la hoja destino
+            key_column: Columna clave (por defecto ID_Unico_Coche o URL)
+            grid_actual: Contenido actual de la hoja si ya se ha leido (evita la lectura)
+        """
+        if key_column is None:
+            key_column = 'ID_Unico_Coche' if 'ID_Unico_Coche' in df.columns else 'URL'
+        
+        try:
+            try:
+                worksheet = self.get_worksheet(worksheet_name)
+            except gspread.WorksheetNotFound:
+                print(f"DIFF: Hoja {worksheet_name} no existe - subida completa")
+                return self.upload_dataframe(df, worksheet_name)
+            
+            if grid_actual is None:
+                grid_actual = worksheet.get_all_values(value_render_option=ValueRenderOption.unformatted)
+            
+            plan = self._calcular_diff(grid_actual, df, key_column)
+            if plan is None:
+                print(f"DIFF: Esquema no compatible con {worksheet_name} - subida completa")
+                return self.upload_dataframe(df, worksheet_name)
+            
+            # Ampliar la hoja solo si las filas/columnas nuevas no caben
+            self.ajustar_hoja(worksheet, plan['filas_necesarias'], plan['columnas_necesarias'])
+            
+            if plan['rangos']:
+                worksheet.batch_update(plan['rangos'])
+            
+            self.last_upload_stats = {
+                'modo': 'diff',
+                'celdas_enviadas': plan['celdas_enviadas'],
+                'celdas_totales': plan['celdas_totales'],
+                'filas_modificadas': plan['filas_modificadas'],
+                'filas_nuevas': plan['filas_nuevas'],
+                'rangos': len(plan['rangos'])
+            }
+            
+            porcentaje = plan['celdas_enviadas'] / plan['celdas_totales'] * 100 if plan['celdas_totales'] else 0
+            print(f"SUBIDA DIFF: {worksheet_name}")
+            print(f"CELDAS: {plan['celdas_enviadas']:,}/{plan['celdas_totales']:,} enviadas ({porcentaje:.1f}%)")
+            print(f"FILAS: {plan['filas_modificadas']} modificadas, {plan['filas_nuevas']} nuevas")
+            
+            return True
+            
+        except Exception as e:
+            print(f"ERROR SUBIDA DIFF: {str(e)}")
+            return False
+    
+    def _calcular_diff(self, grid_actual, df, key_column):
+        """Calcula los rangos a enviar para llevar la hoja al contenido de df (None = subida completa)"""
+        if not grid_actual or not grid_actual[0]:
+            return None
+        
+        header_actual = [str(h) for h in grid_actual[0]]
+        while header_actual and header_actual[-1] == '':
+            header_actual.pop()
+        header_nuevo = [str(h) for h in df.columns]
+        n_actual = len(header_actual)
+        n_nuevo = len(header_nuevo)
+        
+        # Solo se admiten columnas nuevas al final de la cabecera existente
+        if key_column not in header_actual or header_nuevo[:n_actual] != header_actual:
+            return None
+        if df[key_column].duplicated().any():
+            return None
+        
+        idx_clave = header_actual.index(key_column)
+        filas_hoja = {}
+        for numero_fila, fila in enumerate(grid_actual[1:], start=2):
+            clave = normalizar_celda(fila[idx_clave]) if idx_clave < len(fila) else ''
+            if clave == '':
+                continue
+            if clave in filas_hoja:
+                return None
+            filas_hoja[clave] = (numero_fila, fila)
+        
+        claves_df = [normalizar_celda(c) for c in df[key_column].tolist()]
+        if set(filas_hoja) - set(claves_df):
+            return None
+        
+        valores = df.values.tolist()
+        rangos = []
+        celdas_enviadas = 0
+        filas_modificadas = 0
+        # Ultima fila con datos de la hoja (tambien las filas sin clave: las nuevas van debajo)
+        ultima_fila = len(grid_actual)
+        columnas_nuevas = {}
+        filas_nuevas = []
+        
+        for clave, fila_df in zip(claves_df, valores):
+            if clave not in filas_hoja:
+                filas_nuevas.append(fila_df)
+                continue
+            
+            numero_fila, fila_hoja = filas_hoja[clave]
+            fila_hoja = fila_hoja[:n_actual] + [''] * (n_actual - len(fila_hoja))
+            fila_previa = fila_df[:n_actual]
+            # Fila completa primero: la mayoria no cambia y no se recorren sus celdas
+            if fila_hoja == fila_previa:
+                cambiadas = []
+            else:
+                normalizada_hoja = list(map(normalizar_celda, fila_hoja))
+                normalizada_df = list(map(normalizar_celda, fila_previa))
+                cambiadas = [] if normalizada_hoja == normalizada_df else [
+                    j for j, (a, b) in enumerate(zip(normalizada_hoja, normalizada_df)) if a != b]
+            
+            if cambiadas:
+                filas_modificadas += 1
+                for inicio, fin in _agrupar_columnas_contiguas(cambiadas):
+                    rangos.append({
+                        'range': f"{rowcol_to_a1(numero_fila, inicio + 1)}:{rowcol_to_a1(numero_fila, fin + 1)}",
+                        'values': [fila_df[inicio:fin + 1]]
+                    })
+                    celdas_enviadas += fin - inicio + 1
+            
+            if n_nuevo > n_actual:
+                columnas_nuevas[numero_fila] = fila_df[n_actual:]
+        
+        # Columnas nuevas: un unico bloque desde la cabecera hasta la ultima fila existente
+        if n_nuevo > n_actual:
+            bloque = [header_nuevo[n_actual:]]
+            for numero_fila in range(2, ultima_fila + 1):
+                bloque.append(columnas_nuevas.get(numero_fila, [''] * (n_nuevo - n_actual)))
+            rangos.append({
+                'range': f"{rowcol_to_a1(1, n_actual + 1)}:{rowcol_to_a1(ultima_fila, n_nuevo)}",
+                'values': bloque
+            })
+            celdas_enviadas += len(bloque) * (n_nuevo - n_actual)
+        
+        # Filas nuevas: un unico bloque a continuacion de la ultima fila
+        if filas_nuevas:
+            primera = ultima_fila + 1
+            rangos.append({
+                'range': f"{rowcol_to_a1(primera, 1)}:{rowcol_to_a1(primera + len(filas_nuevas) - 1, n_nuevo)}",
+                'values': filas_nuevas
+            })
+            celdas_enviadas += len(filas_nuevas) * n_nuevo
+        
+        return {
+            'rangos': rangos,
+            'celdas_enviadas': celdas_enviadas,
+            'celdas_totales': (len(valores) + 1) * n_nuevo,
+            'filas_modificadas': filas_modificadas,
+            'filas_nuevas': len(filas_nuevas),
+            'filas_necesarias': ultima_fila + len(filas_nuevas),
+            'columnas_necesarias': n_nuevo
+        }
+    
     def upload_by_seller(self, df):
         """Crear hoja por fecha y job para ejecución paralela"""
         try:
@@ -132,17 +448,15 @@ class GoogleSheetsUploader:
             
             print(f"\nSUBIENDO: Hoja {sheet_name}")
             
-            spreadsheet = self.client.open_by_key(self.sheet_id)
-            
             # Verificar si ya existe una hoja con este nombre
             try:
-                existing_sheet = spreadsheet.worksheet(sheet_name)
+                existing_sheet = self.get_worksheet(sheet_name)
                 print(f"AVISO: Ya existe hoja {sheet_name} - sobrescribiendo")
                 existing_sheet.clear()
                 worksheet = existing_sheet
             except gspread.WorksheetNotFound:
                 # Crear nueva hoja
-                worksheet = spreadsheet.add_worksheet(
+                worksheet = self.add_worksheet(
                     title=sheet_name,
                     rows=len(df) + 10,
                     cols=len(df.columns) + 2
@@ -154,6 +468,7 @@ class GoogleSheetsUploader:
             data_rows = df.values.tolist()
             all_data = [headers] + data_rows
             
+            self.ajustar_hoja(worksheet, len(all_data), len(headers))
             worksheet.update(all_data)
             
             print(f"EXITO: {len(df)} coches subidos a {sheet_name}")
@@ -170,10 +485,10 @@ class GoogleSheetsUploader:
         try:
             # Crear hoja de estadisticas
             try:
-                meta_sheet = spreadsheet.worksheet("Estadisticas")
+                meta_sheet = self.get_worksheet("Estadisticas")
                 meta_sheet.clear()
             except gspread.WorksheetNotFound:
-                meta_sheet = spreadsheet.add_worksheet("Estadisticas", rows=20, cols=4)
+                meta_sheet = self.add_worksheet("Estadisticas", rows=20, cols=4)
             
             # Calcular estadisticas
             total_coches = len(df)
@@ -213,7 +528,8 @@ class GoogleSheetsUploader:
             # Agregar estadisticas por vendedor
             metadata.extend(stats_por_vendedor)
             
-            # Subir metadata
+            # Subir metadata (una fila por vendedor: puede no caber en la hoja de 20 filas)
+            self.ajustar_hoja(meta_sheet, len(metadata), 4)
             meta_sheet.update(metadata)
             
             print("ESTADISTICAS: Hoja creada exitosamente")
@@ -229,6 +545,7 @@ def test_google_sheets_connection(sheet_id=None):
     print("=" * 50)
     
     # Cargar variables de entorno
+    import pandas as pd
     from dotenv import load_dotenv
     load_dotenv("../.env")  # Cargar desde raiz del proyecto
     
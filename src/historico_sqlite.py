@@ -0,0 +1,303 @@
+"""
+===============================================================================
+               HISTORICO SQLITE · BASE DE DATOS LOCAL DEL ANALIZADOR
+===============================================================================
+
+Descripción:
+    Base de datos SQLite local con el histórico de coches, pensada para
+    sustituir a la hoja Data_Historico como fuente de verdad del analizador.
+    Cada snapshot diario se aplica como upserts dentro de una transacción y
+    la hoja de Google Sheets pasa a ser solo una vista exportada.
+
+Funcionalidades principales:
+    • Tabla coches (una fila por anuncio) con índices por URL, ID_Unico_Coche,
+      Vendedor y Estado. El snapshot se cruza por ID_Unico_Coche.
+    • Tabla precios con eventos de cambio (ver almacen_precios) y tabla
+      ejecuciones con las fechas procesadas.
+    • Aplicación transaccional del snapshot del scraper: nuevos, existentes,
+      vendidos y precios con la misma lógica que el analizador.
+    • Importación inicial desde Data_Historico y exportación de la vista
+      ancha (Precio_dd/mm/yyyy) para cualquier ventana de fechas.
+    • Migración de IDs antiguos al número de anuncio de la URL canónica.
+
+Uso:
+    historico = HistoricoSQLite("../data/historico_coches.db")
+    resultado = historico.aplicar_snapshot(df_nuevo, "19/10/2026")
+    df_vista = historico.exportar_vista(ultimas_fechas=30)
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from almacen_precios import AlmacenEventosPrecio, ID_EJECUCION
+from identificador_coches import canonicalizar_urls, crear_ids_unicos
+
+COLUMNAS_COCHE = [
+    'ID_Unico_Coche', 'Marca', 'Modelo', 'Vendedor', 'Ano', 'KM',
+    'Tipo', 'Plazas', 'Puertas', 'Combustible', 'Potencia', 'Conduccion',
+    'URL', 'Primera_Deteccion', 'Estado', 'Fecha_Venta'
+]
+CARACTERISTICAS = ['Marca', 'Modelo', 'Vendedor', 'Ano', 'KM',
+                   'Tipo', 'Plazas', 'Puertas', 'Combustible', 'Potencia', 'Conduccion']
+
+# Las columnas de datos van sin tipo declarado: SQLite conserva el tipo de
+# Python (p.ej. Ano como int) igual que lo haria la hoja
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS coches (
+    URL TEXT PRIMARY KEY,
+    ID_Unico_Coche TEXT NOT NULL,
+    Marca, Modelo, Vendedor, Ano, KM,
+    Tipo, Plazas, Puertas, Combustible, Potencia, Conduccion,
+    Primera_Deteccion TEXT,
+    Estado TEXT NOT NULL,
+    Fecha_Venta TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_coches_id ON coches(ID_Unico_Coche);
+CREATE INDEX IF NOT EXISTS idx_coches_vendedor ON coches(Vendedor);
+CREATE INDEX IF NOT EXISTS idx_coches_estado ON coches(Estado);
+
+CREATE TABLE IF NOT EXISTS precios (
+    ID_Unico_Coche TEXT NOT NULL,
+    Fecha TEXT NOT NULL,
+    Precio TEXT NOT NULL,
+    PRIMARY KEY (ID_Unico_Coche, Fecha)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    Fecha TEXT PRIMARY KEY
+);
+"""
+
+def _fecha_iso(fecha_display):
+    """'dd/mm/yyyy' -> 'yyyy-mm-dd' (orden lexicografico = orden cronologico)"""
+    return datetime.strptime(fecha_display, "%d/%m/%Y").strftime("%Y-%m-%d")
+
+class HistoricoSQLite:
+    def __init__(self, ruta):
+        """
+        Args:
+            ruta: Fichero de la base de datos (se crea con su carpeta si no existe)
+        """
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.executescript(ESQUEMA)
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def vacio(self):
+        return self.conexion.execute("SELECT 1 FROM coches LIMIT 1").fetchone() is None
+
+    def contar_coches(self):
+        return self.conexion.execute("SELECT COUNT(*) FROM coches").fetchone()[0]
+
+    def fechas_ejecucion(self):
+        return [fila[0] for fila in self.conexion.execute("SELECT Fecha FROM ejecuciones ORDER BY Fecha")]
+
+    def importar_historico_ancho(self, df_historico):
+        """Carga inicial desde un DataFrame con el formato de Data_Historico"""
+        df = df_historico.drop_duplicates('ID_Unico_Coche', keep='first')
+        coches = pd.DataFrame({
+            col: (df[col] if col in df.columns else 'No especificado') for col in COLUMNAS_COCHE
+        })
+        coches['ID_Unico_Coche'] = coches['ID_Unico_Coche'].astype(str)
+        coches['Fecha_Venta'] = coches['Fecha_Venta'].fillna('').astype(str)
+
+        eventos = AlmacenEventosPrecio.desde_historico_ancho(df).eventos
+        marcadores = eventos['ID_Unico_Coche'] == ID_EJECUCION
+        fechas_iso = eventos['Fecha'].dt.strftime("%Y-%m-%d")
+
+        columnas = ', '.join(COLUMNAS_COCHE)
+        huecos = ', '.join('?' * len(COLUMNAS_COCHE))
+        with self.conexion:
+            self.conexion.execute("DELETE FROM coches")
+            self.conexion.execute("DELETE FROM precios")
+            self.conexion.execute("DELETE FROM ejecuciones")
+            self.conexion.executemany(f"INSERT INTO coches ({columnas}) VALUES ({huecos})",
+                                      coches.astype(object).itertuples(index=False, name=None))
+            self.conexion.executemany(
+                "INSERT OR REPLACE INTO precios VALUES (?, ?, ?)",
+                zip(eventos.loc[~marcadores, 'ID_Unico_Coche'].astype(str),
+                    fechas_iso[~marcadores], eventos.loc[~marcadores, 'Precio'])
+            )
+            self.conexion.executemany("INSERT OR IGNORE INTO ejecuciones VALUES (?)",
+                                      ((fecha,) for fecha in fechas_iso[marcadores]))
+        return len(coches)
+
+    def migrar_ids(self):
+        """
+        Regenera URL canonica e ID_Unico_Coche de la tabla coches y renombra sus precios
+
+        Varias URLs antiguas del mismo anuncio quedan en una sola fila (la primera).
+
+        Returns:
+            Numero de coches cuya URL o ID ha cambiado
+        """
+        coches = pd.read_sql_query("SELECT rowid, URL, ID_Unico_Coche, Vendedor, Marca, Modelo, KM "
+                                   "FROM coches ORDER BY rowid", self.conexion)
+        urls = canonicalizar_urls(coches['URL'])
+        ids = crear_ids_unicos(coches.assign(URL=urls))
+        cambiados = (ids != coches['ID_Unico_Coche']) | (urls != coches['URL'])
+        if not cambiados.any():
+            return 0
+
+        duplicados = ids.duplicated(keep='first')
+        actualizar = cambiados & ~duplicados
+        mapeo = dict(zip(coches.loc[cambiados, 'ID_Unico_Coche'], ids[cambiados]))
+
+        precios = pd.read_sql_query("SELECT ID_Unico_Coche, Fecha, Precio FROM precios", self.conexion)
+        precios['ID_Unico_Coche'] = precios['ID_Unico_Coche'].map(mapeo).fillna(precios['ID_Unico_Coche'])
+        precios = precios.drop_duplicates(['ID_Unico_Coche', 'Fecha'], keep='first')
+
+        with self.conexion:
+            self.conexion.executemany("DELETE FROM coches WHERE rowid = ?",
+                                      ((int(rowid),) for rowid in coches.loc[duplicados, 'rowid']))
+            self.conexion.executemany(
+                "UPDATE coches SET URL = ?, ID_Unico_Coche = ? WHERE rowid = ?",
+                zip(urls[actualizar], ids[actualizar], coches.loc[actualizar, 'rowid'].astype(int).tolist())
+            )
+            self.conexion.execute("DELETE FROM precios")
+            self.conexion.executemany("INSERT INTO precios VALUES (?, ?, ?)",
+                                      precios.itertuples(index=False, name=None))
+        return int(cambiados.sum())
+
+    def aplicar_snapshot(self, df_nuevo, fecha_display):
+        """
+        Aplica el snapshot del scraper en una unica transaccion
+
+        Misma logica que procesar_coches_nuevos_y_existentes: los existentes se
+        reactivan, los activos que no aparecen pasan a vendidos, los nuevos se
+        insertan y se registra el precio de hoy. Los cambios de precio los detecta
+        despues cambios_precio sobre la vista exportada.
+
+        Returns:
+            dict con coches_nuevos, coches_actualizados, coches_vendidos (listas de
+            Marca/Modelo/Vendedor salvo actualizados, que es un contador)
+        """
+        hoy = _fecha_iso(fecha_display)
+        snapshot = df_nuevo.drop_duplicates('ID_Unico_Coche', keep='first')
+        filas = pd.DataFrame({'ID_Unico_Coche': snapshot['ID_Unico_Coche'].astype(str),
+                              'URL': snapshot['URL'].astype(str)})
+        for col in CARACTERISTICAS:
+            if col in snapshot.columns:
+                filas[col] = snapshot[col].astype(str).where(snapshot[col].notna(), 'No especificado')
+            else:
+                filas[col] = None
+        filas['Precio'] = snapshot['Precio_Contado'].astype(str)
+
+        columnas = list(filas.columns)
+        sql = self.conexion
+        with sql:
+            sql.execute("DROP TABLE IF EXISTS temp.snapshot")
+            sql.execute(f"CREATE TEMP TABLE snapshot ({columnas[0]} TEXT PRIMARY KEY, {', '.join(columnas[1:])})")
+            sql.executemany(f"INSERT INTO temp.snapshot VALUES ({', '.join('?' * len(columnas))})",
+                            filas.itertuples(index=False, name=None))
+
+            coches_actualizados = sql.execute(
+                "SELECT COUNT(*) FROM temp.snapshot s JOIN coches c ON c.ID_Unico_Coche = s.ID_Unico_Coche"
+            ).fetchone()[0]
+
+            # Nuevos (en el orden del scraper)
+            coches_nuevos = [
+                dict(zip(['Marca', 'Modelo', 'Vendedor'], fila)) for fila in sql.execute("""
+                    SELECT s.Marca, s.Modelo, s.Vendedor FROM temp.snapshot s
+                    WHERE NOT EXISTS (SELECT 1 FROM coches c WHERE c.ID_Unico_Coche = s.ID_Unico_Coche)
+                    ORDER BY s.rowid
+                """)
+            ]
+            sql.execute(f"""
+                INSERT INTO coches (URL, ID_Unico_Coche, {', '.join(CARACTERISTICAS)}, Primera_Deteccion, Estado, Fecha_Venta)
+                SELECT s.URL, s.ID_Unico_Coche, {', '.join('s.' + col for col in CARACTERISTICAS)}, ?, 'activo', ''
+                FROM temp.snapshot s
+                WHERE NOT EXISTS (SELECT 1 FROM coches c WHERE c.ID_Unico_Coche = s.ID_Unico_Coche)
+                ON CONFLICT(URL) DO NOTHING
+            """, (fecha_display,))
+
+            # Eventos de precio: coches vistos hoy + los que no estan ('' si aun tenian precio)
+            sql.execute("""
+                INSERT OR REPLACE INTO precios (ID_Unico_Coche, Fecha, Precio)
+                SELECT h.ID_Unico_Coche, ?, h.Precio FROM (
+                    SELECT s.ID_Unico_Coche, s.Precio FROM temp.snapshot s
+                    UNION ALL
+                    SELECT c.ID_Unico_Coche, '' FROM coches c
+                    WHERE c.ID_Unico_Coche NOT IN (SELECT ID_Unico_Coche FROM temp.snapshot)
+                ) h
+                WHERE h.Precio != COALESCE((SELECT p.Precio FROM precios p
+                                            WHERE p.ID_Unico_Coche = h.ID_Unico_Coche AND p.Fecha <= ?
+                                            ORDER BY p.Fecha DESC LIMIT 1), '')
+            """, (hoy, hoy))
+
+            # Existentes y vendidos
+            # La URL vigente es la del scraper (el slug cambia si se edita el titulo)
+            sql.execute("""
+                UPDATE coches SET Estado = 'activo',
+                    URL = (SELECT s.URL FROM temp.snapshot s WHERE s.ID_Unico_Coche = coches.ID_Unico_Coche)
+                WHERE ID_Unico_Coche IN (SELECT ID_Unico_Coche FROM temp.snapshot)
+            """)
+            coches_vendidos = [
+                dict(zip(['Marca', 'Modelo', 'Vendedor'], fila)) for fila in sql.execute("""
+                    SELECT Marca, Modelo, Vendedor FROM coches
+                    WHERE Estado = 'activo' AND ID_Unico_Coche NOT IN (SELECT ID_Unico_Coche FROM temp.snapshot)
+                """)
+            ]
+            sql.execute("""
+                UPDATE coches SET Estado = 'vendido', Fecha_Venta = ?
+                WHERE Estado = 'activo' AND ID_Unico_Coche NOT IN (SELECT ID_Unico_Coche FROM temp.snapshot)
+            """, (fecha_display,))
+
+            sql.execute("INSERT OR IGNORE INTO ejecuciones VALUES (?)", (hoy,))
+            sql.execute("DROP TABLE temp.snapshot")
+
+        return {
+            'coches_nuevos': coches_nuevos,
+            'coches_actualizados': coches_actualizados,
+            'coches_vendidos': coches_vendidos
+        }
+
+    def exportar_vista(self, ultimas_fechas=None, vendedor=None, estado=None):
+        """
+        Devuelve la vista en formato Data_Historico (columnas basicas + Precio_dd/mm/yyyy)
+
+        Args:
+            ultimas_fechas: Numero de fechas de precio a incluir (None = todas)
+            vendedor, estado: Filtros opcionales (usan los indices de la tabla coches)
+        """
+        condiciones, parametros = [], []
+        if vendedor is not None:
+            condiciones.append("Vendedor = ?")
+            parametros.append(vendedor)
+        if estado is not None:
+            condiciones.append("Estado = ?")
+            parametros.append(estado)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        coches = pd.read_sql_query(f"SELECT {', '.join(COLUMNAS_COCHE)} FROM coches {where} ORDER BY rowid",
+                                   self.conexion, params=parametros)
+
+        fechas = self.fechas_ejecucion()
+        if ultimas_fechas:
+            fechas = fechas[-ultimas_fechas:]
+        if not fechas:
+            return coches
+
+        eventos = pd.read_sql_query("SELECT ID_Unico_Coche, Fecha, Precio FROM precios WHERE Fecha <= ?",
+                                    self.conexion, params=[fechas[-1]])
+        marcadores = pd.DataFrame({'ID_Unico_Coche': ID_EJECUCION, 'Fecha': fechas, 'Precio': ''})
+        eventos = pd.concat([marcadores, eventos], ignore_index=True)
+        eventos['Fecha'] = pd.to_datetime(eventos['Fecha'], format="%Y-%m-%d")
+
+        ancho = AlmacenEventosPrecio(eventos).pivotar(
+            fecha_inicio=pd.Timestamp(fechas[0]), ids=coches['ID_Unico_Coche'].unique()
+        )
+        precios = ancho.reindex(coches['ID_Unico_Coche']).reset_index(drop=True)
+        return pd.concat([coches, precios], axis=1)
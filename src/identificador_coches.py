@@ -0,0 +1,111 @@
+"""
+===============================================================================
+              IDENTIFICADOR COCHES · URL CANÓNICA E ID DE ANUNCIO
+===============================================================================
+
+Descripción:
+    Genera ID_Unico_Coche de forma estable y por columna. El ID es el número
+    de anuncio que Wallapop pone al final de la URL (/item/<slug>-<id>), que
+    no cambia aunque el vendedor edite el título (y con él el slug), ni por
+    parámetros de seguimiento, subdominios o redirecciones.
+
+Funcionalidades principales:
+    • URL canónica: sin query string ni fragmento, sin barra final y con el
+      dominio normalizado a https://es.wallapop.com.
+    • ID de anuncio extraído de la URL para toda la columna en una pasada
+      (métodos de str, sin df.apply por fila ni regex salvo dominios raros).
+    • Fallback determinista: MD5 (12 caracteres) de la URL canónica o, sin
+      URL, de Vendedor_Marca_Modelo_KM. Solo se calcula para los valores
+      distintos que lo necesitan.
+    • crear_id_unico: misma regla para una sola fila, sin DataFrame.
+
+Uso:
+    df['URL'] = canonicalizar_urls(df['URL'])
+    df['ID_Unico_Coche'] = crear_ids_unicos(df)
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import hashlib
+import re
+
+import pandas as pd
+
+DOMINIO_CANONICO = "https://es.wallapop.com"
+VALORES_SIN_URL = {'', 'nan', 'None', 'No especificado'}
+MIN_DIGITOS_ITEM_ID = 7
+# Sin URL, el MD5 de respaldo se calcula sobre estas columnas unidas con '_'
+COLUMNAS_RESPALDO = ['Vendedor', 'Marca', 'Modelo', 'KM']
+
+# Dominio de Wallapop con cualquier esquema/subdominio (http://, www., it., ...)
+_PATRON_DOMINIO = re.compile(r'^(?:https?://)?(?:[a-z]{2}\.|www\.)?wallapop\.com(?=/|$)', re.IGNORECASE)
+
+def _md5_corto(texto):
+    return hashlib.md5(texto.encode()).hexdigest()[:12]
+
+def canonicalizar_url(url):
+    """URL canonica de un anuncio ('' si no hay URL)"""
+    url = str(url).strip().split('#', 1)[0].split('?', 1)[0].rstrip('/')
+    if not url.startswith(DOMINIO_CANONICO + '/'):
+        url = _PATRON_DOMINIO.sub(DOMINIO_CANONICO, url, count=1)
+    return '' if url in VALORES_SIN_URL else url
+
+def extraer_item_id(url_canonica):
+    """Numero de anuncio al final de /item/<slug>-<id> o /item/<id> (None si no lo hay)"""
+    _, separador, cola = url_canonica.rpartition('/item/')
+    if not separador or '/' in cola:
+        return None
+    numero = cola.rpartition('-')[2]
+    return numero if len(numero) >= MIN_DIGITOS_ITEM_ID and numero.isdigit() else None
+
+def crear_id_unico(fila):
+    """
+    ID_Unico_Coche de una sola fila (dict o Serie), igual que crear_ids_unicos
+
+    Para columnas enteras usar crear_ids_unicos (cachea los MD5 de respaldo).
+    """
+    url = canonicalizar_url(fila.get('URL', ''))
+    item_id = extraer_item_id(url)
+    if item_id:
+        return item_id
+    return _md5_corto(url or '_'.join(str(fila.get(columna, '')).strip() for columna in COLUMNAS_RESPALDO))
+
+def canonicalizar_urls(urls):
+    """Version por columna de canonicalizar_url (una sola pasada, sin construir filas)"""
+    return pd.Series([canonicalizar_url(url) for url in urls.tolist()], index=urls.index, dtype=object)
+
+def crear_ids_unicos(df):
+    """
+    Calcula ID_Unico_Coche para todas las filas de un DataFrame
+
+    Args:
+        df: DataFrame con columna URL (y opcionalmente Vendedor, Marca, Modelo, KM)
+
+    Returns:
+        Serie de texto alineada con df: numero de anuncio, o MD5 corto de la
+        URL canonica / de Vendedor_Marca_Modelo_KM si no se puede extraer
+    """
+    if 'URL' in df.columns:
+        urls = canonicalizar_urls(df['URL'])
+    else:
+        urls = pd.Series('', index=df.index, dtype=object)
+
+    ids = pd.Series([extraer_item_id(url) for url in urls.tolist()], index=df.index, dtype=object)
+    sin_id = ids.isna()
+    if sin_id.any():
+        def texto(columna):
+            if columna not in df.columns:
+                return pd.Series('', index=sin_id.index[sin_id], dtype=object)
+            return df.loc[sin_id, columna].astype(str).str.strip()
+
+        respaldo = texto(COLUMNAS_RESPALDO[0])
+        for columna in COLUMNAS_RESPALDO[1:]:
+            respaldo = respaldo + '_' + texto(columna)
+        claves = urls[sin_id].where(urls[sin_id] != '', respaldo)
+        hashes = {clave: _md5_corto(clave) for clave in claves.unique()}
+        ids[sin_id] = claves.map(hashes)
+
+    return ids
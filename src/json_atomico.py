@@ -0,0 +1,32 @@
+"""
+===============================================================================
+                JSON ATÓMICO · ESTADO LOCAL ENTRE EJECUCIONES
+===============================================================================
+
+Descripción:
+    Escritura de los JSON de estado que se conservan entre ejecuciones
+    (perfiles de timeout, índice de duplicados). Se escribe un archivo
+    temporal y se renombra sobre el definitivo: una ejecución cortada a
+    mitad de la escritura deja el JSON anterior intacto, nunca uno a medias.
+
+Uso:
+    guardar_json('../data/perfiles_timeout.json', {'muestras': muestras})
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import json
+import os
+
+def guardar_json(ruta, datos):
+    """Escribe datos en ruta (archivo temporal + rename), creando la carpeta si falta"""
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
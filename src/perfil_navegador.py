@@ -0,0 +1,120 @@
+"""
+===============================================================================
+              PERFIL NAVEGADOR · CHROME PERSISTENTE CON CACHÉ HTTP
+===============================================================================
+
+Descripción:
+    Perfil de Chrome reutilizable entre ejecuciones (opcional). Guarda el
+    consentimiento de cookies de Wallapop, una caché HTTP en disco con
+    tamaño máximo para los bundles JS/CSS y la ruta del chromedriver ya
+    resuelta, de forma que una ejecución con el perfil "caliente" no repite
+    el banner de cookies, la descarga de estáticos ni la resolución del
+    driver. El directorio se puede conservar en la máquina o restaurar
+    desde la caché de GitHub Actions.
+
+Funcionalidades principales:
+    • --user-data-dir / --disk-cache-dir / --disk-cache-size para Chrome.
+    • Limpieza de bloqueos Singleton* de ejecuciones interrumpidas o de
+      perfiles restaurados desde CI.
+    • Marca de consentimiento y ruta del chromedriver en perfil.json.
+    • Medición del arranque en frío y de la primera página.
+
+Configuración (variables de entorno):
+    CHROME_PERFIL_PERSISTENTE=true      Activar el perfil persistente
+    CHROME_PERFIL_DIR=../.chrome_perfil Directorio del perfil
+    CHROME_CACHE_MB=200                 Tamaño máximo de la caché HTTP
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import json
+import os
+import time
+
+ARCHIVO_ESTADO = "perfil.json"
+PREFIJOS_BLOQUEO = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+
+class PerfilNavegador:
+    """Directorio de perfil de Chrome reutilizable con su estado (consentimiento, driver)"""
+
+    def __init__(self, directorio, cache_mb=200):
+        self.directorio = os.path.abspath(directorio)
+        self.cache_mb = cache_mb
+        self.ruta_estado = os.path.join(self.directorio, ARCHIVO_ESTADO)
+        self.reutilizado = os.path.isfile(self.ruta_estado)
+        self.estado = self._leer_estado()
+
+    @classmethod
+    def desde_entorno(cls):
+        """Perfil configurado por variables de entorno, o None si no esta activado"""
+        if os.getenv('CHROME_PERFIL_PERSISTENTE', 'false').lower() != 'true':
+            return None
+        return cls(os.getenv('CHROME_PERFIL_DIR', '../.chrome_perfil'),
+                   int(os.getenv('CHROME_CACHE_MB', '200') or 200))
+
+    def _leer_estado(self):
+        try:
+            with open(self.ruta_estado, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _guardar_estado(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        with open(self.ruta_estado, 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f, indent=2)
+
+    def configurar(self, options):
+        """Anade a las opciones de Chrome el directorio de perfil y la cache en disco"""
+        os.makedirs(self.directorio, exist_ok=True)
+        # Un Chrome cortado (o un perfil restaurado de CI) deja bloqueos que impiden arrancar
+        for nombre in os.listdir(self.directorio):
+            if nombre.startswith(PREFIJOS_BLOQUEO):
+                try:
+                    os.remove(os.path.join(self.directorio, nombre))
+                except OSError:
+                    pass
+        options.add_argument(f"--user-data-dir={self.directorio}")
+        options.add_argument(f"--disk-cache-dir={os.path.join(self.directorio, 'cache')}")
+        options.add_argument(f"--disk-cache-size={self.cache_mb * 1024 * 1024}")
+
+    @property
+    def ruta_driver(self):
+        """Ruta del chromedriver resuelto en una ejecucion anterior (None si ya no existe)"""
+        ruta = self.estado.get('ruta_driver')
+        return ruta if ruta and os.path.isfile(ruta) else None
+
+    def guardar_ruta_driver(self, ruta):
+        if ruta and ruta != self.estado.get('ruta_driver'):
+            self.estado['ruta_driver'] = ruta
+            self._guardar_estado()
+
+    @property
+    def consentimiento_aceptado(self):
+        return bool(self.estado.get('consentimiento'))
+
+    def guardar_consentimiento(self):
+        self.estado['consentimiento'] = time.strftime("%d/%m/%Y %H:%M")
+        self._guardar_estado()
+
+    def tamano_mb(self):
+        total = 0
+        for raiz, _, archivos in os.walk(self.directorio):
+            for nombre in archivos:
+                try:
+                    total += os.path.getsize(os.path.join(raiz, nombre))
+                except OSError:
+                    pass
+        return total / 1024 / 1024
+
+def mostrar_tiempos_arranque(perfil, segundos_chrome, segundos_primera_pagina):
+    """Arranque en frio de Chrome y latencia de la primera pagina, con el tipo de perfil"""
+    if perfil is None:
+        tipo = "perfil temporal"
+    else:
+        tipo = (f"perfil {'reutilizado' if perfil.reutilizado else 'nuevo'} "
+                f"({perfil.tamano_mb():.0f} MB en {perfil.directorio})")
+    print(f"ARRANQUE: Chrome {segundos_chrome:.2f}s - primera pagina {segundos_primera_pagina:.2f}s - {tipo}")
@@ -0,0 +1,123 @@
+"""
+===============================================================================
+               PERFILADO · PERFILES cProfile POR FASE DE EJECUCIÓN
+===============================================================================
+
+Descripción:
+    Modo de perfilado opcional para el scraper y el analizador. Cada fase
+    (arranque del navegador, vendedores, extracción de fichas, exportación,
+    subida, lectura, diff del histórico, serialización...) tiene su propio
+    cProfile, que se activa solo mientras la fase está en curso. Al terminar
+    se escriben los perfiles en una carpeta por ejecución que se conserva
+    como artefacto de GitHub Actions.
+
+Funcionalidades principales:
+    • fase(perfilador, nombre): context manager; sin perfilador es un
+      nullcontext compartido (coste prácticamente nulo).
+    • Fases anidadas: la fase externa se pausa mientras corre la interna,
+      así cada función cuenta en una sola fase (el tiempo real de la
+      externa sí incluye el de la interna).
+    • Por fase: <fase>.prof (pstats / snakeviz), <fase>.txt con las
+      funciones de más tiempo acumulado y resumen.json con los tiempos.
+
+Configuración (variables de entorno):
+    PERFILADO=true                  Activar el perfilado
+    PERFILADO_DIR=logs/perfilado    Carpeta de los perfiles (artefacto en CI)
+
+Uso:
+    PERFILADO=true python COCHES_SCR.py
+    python cli.py analyze --perfilar
+    python -m pstats logs/perfilado/analisis_<fecha>/diff_historico.prof
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import time
+from datetime import datetime
+
+LINEAS_INFORME = 40  # Funciones por fase en el informe de texto
+_SIN_PERFILADO = contextlib.nullcontext()
+
+class Perfilador:
+    """Un cProfile por fase, con el tiempo real y las veces que se ha entrado en cada una"""
+
+    def __init__(self, directorio, prefijo):
+        self.directorio = directorio
+        self.prefijo = prefijo
+        self.perfiles = {}   # {fase: cProfile.Profile}
+        self.tiempos = {}    # {fase: [segundos, entradas]}
+        self.pila = []       # Perfiles de las fases en curso (la ultima es la activa)
+        self.inicio = time.perf_counter()
+
+    @classmethod
+    def desde_entorno(cls, prefijo):
+        """Perfilador configurado por variables de entorno, o None si no esta activado"""
+        if os.getenv('PERFILADO', 'false').lower() != 'true':
+            return None
+        return cls(os.getenv('PERFILADO_DIR', 'logs/perfilado'), prefijo)
+
+    @contextlib.contextmanager
+    def fase(self, nombre):
+        perfil = self.perfiles.setdefault(nombre, cProfile.Profile())
+        if self.pila and self.pila[-1]:
+            self.pila[-1].disable()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Otro profiler ya activo (p.ej. python -m cProfile): se mide solo el tiempo
+            perfil = None
+        self.pila.append(perfil)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            tiempo = self.tiempos.setdefault(nombre, [0.0, 0])
+            tiempo[0] += time.perf_counter() - inicio
+            tiempo[1] += 1
+            if perfil:
+                perfil.disable()
+            self.pila.pop()
+            if self.pila and self.pila[-1]:
+                self.pila[-1].enable()
+
+    def guardar(self):
+        """Escribe los perfiles y el resumen de la ejecucion; devuelve la carpeta"""
+        total = time.perf_counter() - self.inicio
+        carpeta = os.path.join(self.directorio, f"{self.prefijo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        os.makedirs(carpeta, exist_ok=True)
+        for nombre, perfil in self.perfiles.items():
+            perfil.dump_stats(os.path.join(carpeta, f"{nombre}.prof"))
+            with open(os.path.join(carpeta, f"{nombre}.txt"), 'w', encoding='utf-8') as f:
+                try:
+                    pstats.Stats(perfil, stream=f).sort_stats('cumulative').print_stats(LINEAS_INFORME)
+                except TypeError:
+                    f.write("Sin llamadas registradas\n")
+        with open(os.path.join(carpeta, "resumen.json"), 'w', encoding='utf-8') as f:
+            json.dump({'total_segundos': round(total, 3),
+                       'fases': {nombre: {'segundos': round(segundos, 3), 'entradas': entradas}
+                                 for nombre, (segundos, entradas) in self.tiempos.items()}}, f, indent=2)
+        self.mostrar_resumen(total, carpeta)
+        return carpeta
+
+    def mostrar_resumen(self, total, carpeta):
+        print(f"\n{'=' * 70}")
+        print(f"PERFILADO ({self.prefijo}): {total:.1f} s en total")
+        print(f"{'=' * 70}")
+        for nombre, (segundos, entradas) in sorted(self.tiempos.items(), key=lambda item: -item[1][0]):
+            porcentaje = segundos / total * 100 if total else 0
+            print(f"{nombre:<24} {segundos:>9.2f} s {porcentaje:>6.1f}%  ({entradas} veces)")
+        print(f"Perfiles en {carpeta}")
+
+def fase(perfilador, nombre):
+    """Context manager de la fase (no hace nada si el perfilado esta desactivado)"""
+    if perfilador is None:
+        return _SIN_PERFILADO
+    return perfilador.fase(nombre)
@@ -0,0 +1,147 @@
+"""
+===============================================================================
+            PERFILES TIMEOUT · ESPERAS POR VENDEDOR Y TIPO DE PÁGINA
+===============================================================================
+
+Descripción:
+    Aprende de las ejecuciones anteriores cuánto tarda cada vendedor en cada
+    tipo de página y ajusta los timeouts del scraper: p99 de las latencias
+    observadas más un margen, dentro de unos límites por tipo. Los
+    vendedores lentos reciben tiempo suficiente y los rápidos no pierden
+    segundos en esperas fijas. Las muestras se guardan en un JSON local.
+
+Funcionalidades principales:
+    • Tipos de página: 'vendedor' (carga del perfil), 'ficha' (carga de un
+      anuncio), 'render' (título y precios visibles) y 'tarjetas' (anuncios
+      nuevos tras "Ver más productos").
+    • Timeout aprendido = p99 * MARGEN_RELATIVO + MARGEN_SEGUNDOS de las
+      cargas completadas, con MIN_MUESTRAS como mínimo; si no, el valor
+      fijo de siempre.
+    • Últimas MAX_MUESTRAS por vendedor y tipo. Un timeout se guarda
+      marcado (en negativo) y no entra en el percentil: unas pocas páginas
+      colgadas no empujan el timeout hacia arriba ejecución tras ejecución.
+      Si los timeouts son frecuentes (FRACCION_AGOTADOS_CRECER) el valor no
+      baja del timeout que se agotó, y crece como mucho PASO_CRECIMIENTO
+      segundos por encima si las cargas completadas rozan el límite.
+    • Tabla de perfiles para el resumen de la ejecución.
+
+Configuración (variables de entorno):
+    PERFILES_TIMEOUT=true                            Activar los perfiles
+    PERFILES_TIMEOUT_RUTA=../data/perfiles_timeout.json
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import json
+import os
+from statistics import median, quantiles
+
+from json_atomico import guardar_json
+
+# Valores fijos anteriores (sin historial suficiente) y limites del valor aprendido, en segundos
+TIMEOUTS_POR_DEFECTO = {'vendedor': 6.0, 'ficha': 6.0, 'render': 2.5, 'tarjetas': 8.0}
+LIMITES_TIMEOUT = {'vendedor': (2.0, 30.0), 'ficha': (2.0, 30.0), 'render': (0.5, 10.0), 'tarjetas': (1.0, 20.0)}
+MARGEN_RELATIVO = 1.2
+MARGEN_SEGUNDOS = 0.5
+MIN_MUESTRAS = 20
+MAX_MUESTRAS = 300
+FRACCION_AGOTADOS_CRECER = 0.05  # Timeouts por encima de esta fraccion de las muestras = limite demasiado corto
+CERCA_DEL_LIMITE = 0.8           # ... si ademas el p99 de las cargas completadas llega a 0.8x el limite
+PASO_CRECIMIENTO = 2.0           # Crecimiento maximo por encima del timeout agotado, en segundos
+VERSION_FORMATO = 2              # Version 1 guardaba los timeouts como latencias normales
+
+def completadas(muestras):
+    """Latencias de las cargas que terminaron (sin los timeouts marcados)"""
+    return [m for m in muestras if m >= 0]
+
+def timeout_aprendido(muestras, tipo):
+    """
+    p99 de las cargas completadas con margen, acotado a LIMITES_TIMEOUT (None si hay pocas muestras)
+
+    Los timeouts (muestras negativas) no entran en el percentil. Si son
+    frecuentes (FRACCION_AGOTADOS_CRECER) el valor nunca baja del limite que se
+    agoto, y crece PASO_CRECIMIENTO por encima si las cargas completadas ya
+    rozan ese limite o casi ninguna carga termina.
+    """
+    if len(muestras) < MIN_MUESTRAS:
+        return None
+    validas = completadas(muestras)
+    agotados = [-m for m in muestras if m < 0]
+    if len(validas) < MIN_MUESTRAS:
+        valor = max(agotados) + PASO_CRECIMIENTO
+    else:
+        p99 = quantiles(validas, n=100, method='inclusive')[98]
+        valor = p99 * MARGEN_RELATIVO + MARGEN_SEGUNDOS
+        if agotados and len(agotados) / len(muestras) > FRACCION_AGOTADOS_CRECER:
+            limite = max(agotados)
+            valor = max(valor, limite + PASO_CRECIMIENTO if p99 >= CERCA_DEL_LIMITE * limite else limite)
+    minimo, maximo = LIMITES_TIMEOUT[tipo]
+    return round(min(max(valor, minimo), maximo), 2)
+
+class PerfilesTimeout:
+    """Latencias por vendedor y tipo de pagina, y los timeouts que se derivan de ellas"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.muestras = self._cargar()  # {vendedor: {tipo: [segundos, ...]}} (timeouts en negativo)
+        self.timeouts = {}              # Calculados al empezar la ejecucion (no cambian durante ella)
+
+    @classmethod
+    def desde_entorno(cls):
+        """Perfiles desde el JSON configurado, o None si estan desactivados"""
+        if os.getenv('PERFILES_TIMEOUT', 'true').lower() != 'true':
+            return None
+        return cls(os.getenv('PERFILES_TIMEOUT_RUTA', '../data/perfiles_timeout.json'))
+
+    def _cargar(self):
+        try:
+            with open(self.ruta, encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if datos.get('version') != VERSION_FORMATO:
+            # Los timeouts guardados como latencias inflarian el p99: se empieza de nuevo
+            print("PERFILES TIMEOUT: Formato anterior descartado, se vuelve a aprender")
+            return {}
+        return datos.get('muestras', {})
+
+    def timeout(self, vendedor, tipo):
+        """Timeout en segundos para el vendedor y tipo de pagina"""
+        clave = (vendedor, tipo)
+        if clave not in self.timeouts:
+            aprendido = timeout_aprendido(self.muestras.get(vendedor, {}).get(tipo, []), tipo)
+            self.timeouts[clave] = aprendido if aprendido is not None else TIMEOUTS_POR_DEFECTO[tipo]
+        return self.timeouts[clave]
+
+    def registrar(self, vendedor, tipo, segundos, agotado=False):
+        """Anade una latencia observada (agotado=True: se agoto el timeout de segundos, se guarda marcado)"""
+        lista = self.muestras.setdefault(vendedor, {}).setdefault(tipo, [])
+        lista.append(-round(segundos, 3) if agotado else round(segundos, 3))
+        del lista[:-MAX_MUESTRAS]
+
+    def guardar(self):
+        """Escribe las muestras"""
+        guardar_json(self.ruta, {'version': VERSION_FORMATO, 'muestras': self.muestras})
+
+    def mostrar_resumen(self, vendedores):
+        """Tabla vendedor x tipo: mediana, p99 y timeout aplicado en esta ejecucion"""
+        print(f"\n{'=' * 70}")
+        print("PERFILES DE TIMEOUT (mediana / p99 -> timeout aplicado, segundos)")
+        print(f"{'=' * 70}")
+        tipos = list(TIMEOUTS_POR_DEFECTO)
+        print(f"{'Vendedor':<26}" + "".join(f"{tipo:>22}" for tipo in tipos))
+        for vendedor in vendedores:
+            celdas = []
+            for tipo in tipos:
+                muestras = completadas(self.muestras.get(vendedor, {}).get(tipo, []))
+                aplicado = self.timeouts.get((vendedor, tipo), self.timeout(vendedor, tipo))
+                if len(muestras) >= 2:
+                    p99 = quantiles(muestras, n=100, method='inclusive')[98]
+                    celdas.append(f"{median(muestras):.1f}/{p99:.1f}->{aplicado:.1f}")
+                else:
+                    celdas.append(f"-/- ->{aplicado:.1f}")
+            print(f"{vendedor[:25]:<26}" + "".join(f"{celda:>22}" for celda in celdas))
+        print(f"(timeout aprendido con al menos {MIN_MUESTRAS} muestras; si no, valor por defecto)")
@@ -0,0 +1,89 @@
+"""
+===============================================================================
+              SNAPSHOTS SCRAPER · DESCUBRIMIENTO PARA BACKFILL
+===============================================================================
+
+Descripción:
+    Localiza los snapshots diarios del scraper que el analizador puede
+    aplicar: hojas SCR-J1/J2 dd/mm/yy de Google Sheets y Excel archivados
+    en resultados/ (coches_vendedores_AUTO_YYYYMMDD_HHMM.xlsx). Se usa en el
+    modo backfill del analizador para recuperar días que no se procesaron.
+
+Funcionalidades principales:
+    • Agrupación por fecha de todas las hojas SCR y Excel archivados.
+    • Filtro por rango de fechas y por fechas ya procesadas.
+    • Si un día tiene hojas SCR se usan las hojas; los Excel solo cubren
+      los días cuyas hojas ya no existen.
+    • Lectura de Excel archivados como texto (mismas columnas que SCR).
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import os
+import re
+from datetime import datetime
+
+import pandas as pd
+
+PATRON_HOJA_SCR = re.compile(r'^SCR-J\d+ (\d{2}/\d{2}/\d{2})$')
+PATRON_ARCHIVO = re.compile(r'^coches_vendedores_AUTO_(\d{8})_\d{4}\.xlsx$')
+HOJA_ARCHIVO = "Todos_los_Coches"
+
+def descubrir_snapshots(titulos_hojas, carpeta_archivos=None, fecha_desde=None, fecha_hasta=None,
+                        fechas_procesadas=()):
+    """
+    Lista los snapshots disponibles por dia, en orden cronologico
+
+    Args:
+        titulos_hojas: Titulos de las hojas del spreadsheet
+        carpeta_archivos: Carpeta con los Excel archivados (None = no se buscan)
+        fecha_desde, fecha_hasta: Rango incluido (datetime, None = sin limite)
+        fechas_procesadas: Fechas (datetime) que ya estan en el historico
+
+    Returns:
+        Lista de dicts {'fecha', 'hojas', 'archivos'} ordenada por fecha
+    """
+    por_fecha = {}
+    for titulo in titulos_hojas:
+        coincidencia = PATRON_HOJA_SCR.match(titulo)
+        if coincidencia:
+            fecha = datetime.strptime(coincidencia.group(1), "%d/%m/%y")
+            por_fecha.setdefault(fecha, {'fecha': fecha, 'hojas': [], 'archivos': []})['hojas'].append(titulo)
+
+    if carpeta_archivos and os.path.isdir(carpeta_archivos):
+        for nombre in sorted(os.listdir(carpeta_archivos)):
+            coincidencia = PATRON_ARCHIVO.match(nombre)
+            if coincidencia:
+                fecha = datetime.strptime(coincidencia.group(1), "%Y%m%d")
+                por_fecha.setdefault(fecha, {'fecha': fecha, 'hojas': [], 'archivos': []})['archivos'].append(
+                    os.path.join(carpeta_archivos, nombre))
+
+    procesadas = {datetime(f.year, f.month, f.day) for f in fechas_procesadas}
+    snapshots = []
+    for fecha in sorted(por_fecha):
+        if fecha in procesadas:
+            continue
+        if fecha_desde is not None and fecha < fecha_desde:
+            continue
+        if fecha_hasta is not None and fecha > fecha_hasta:
+            continue
+        snapshot = por_fecha[fecha]
+        snapshot['hojas'].sort()
+        if snapshot['hojas']:
+            snapshot['archivos'] = []
+        snapshots.append(snapshot)
+    return snapshots
+
+def leer_archivos_excel(rutas):
+    """Une los Excel archivados de un dia (hoja Todos_los_Coches) como texto; None si estan vacios"""
+    dfs = []
+    for ruta in rutas:
+        df = pd.read_excel(ruta, sheet_name=HOJA_ARCHIVO, dtype=str, keep_default_na=False)
+        if not df.empty:
+            dfs.append(df.astype(object))
+    if not dfs:
+        return None
+    return pd.concat(dfs, ignore_index=True)
@@ -0,0 +1,230 @@
+"""
+===============================================================================
+              TELEMETRIA · HISTORIAL DE RENDIMIENTO DEL SCRAPER
+===============================================================================
+
+Descripción:
+    Base de datos SQLite local con los números de cada ejecución del
+    scraper y de cada vendedor dentro de ella: anuncios encontrados, coches
+    extraídos, fallos, tiempo real, coches por minuto, pulsaciones de
+    "Ver más" y completitud de los campos. El informe muestra la tendencia
+    por vendedor, marca las ejecuciones más lentas que su mediana y resume
+    el tiempo medio por vendedor para repartir los jobs.
+
+Funcionalidades principales:
+    • Tablas ejecuciones y vendedores (una fila por vendedor y ejecución).
+    • Completitud por campo (% de coches con valor distinto de
+      "No especificado") guardada como JSON más la media.
+    • Aviso de ralentización: coches/min por debajo de UMBRAL_RALENTIZACION
+      veces la mediana de las ejecuciones anteriores del vendedor.
+    • Planificación: tiempo medio por vendedor y acumulado por grupo.
+
+Configuración (variables de entorno):
+    TELEMETRIA_SCRAPER=true                        Registrar las ejecuciones
+    TELEMETRIA_RUTA=../data/telemetria_scraper.db
+
+Uso:
+    python cli.py telemetria --ultimas 10
+    python cli.py telemetria --vendedor "DURSAN D."
+
+Compatibilidad: Python 3.10+
+Uso: Motick
+
+===============================================================================
+"""
+
+import json
+import os
+import socket
+import sqlite3
+from datetime import datetime
+from statistics import median
+
+CAMPOS_COMPLETITUD = ['Precio al Contado', 'Precio Financiado', 'Año', 'KM', 'Tipo',
+                      'Combustible', 'Potencia', 'Conducción']
+UMBRAL_RALENTIZACION = 0.75  # coches/min por debajo de 0.75x la mediana anterior = ralentizacion
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    inicio TEXT NOT NULL,
+    fin TEXT,
+    grupo TEXT,
+    modo TEXT,
+    extraccion TEXT,
+    maquina TEXT,
+    segundos REAL,
+    coches INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS vendedores (
+    ejecucion INTEGER NOT NULL REFERENCES ejecuciones(id),
+    vendedor TEXT NOT NULL,
+    anuncios INTEGER NOT NULL,
+    extraidos INTEGER NOT NULL,
+    fallos INTEGER NOT NULL,
+    segundos REAL NOT NULL,
+    coches_por_minuto REAL NOT NULL,
+    pulsaciones INTEGER NOT NULL,
+    completitud_media REAL NOT NULL,
+    completitud TEXT NOT NULL,
+    PRIMARY KEY (ejecucion, vendedor)
+);
+CREATE INDEX IF NOT EXISTS idx_vendedores_vendedor ON vendedores(vendedor);
+"""
+
+def completitud_campos(coches):
+    """% de coches con valor en cada campo de CAMPOS_COMPLETITUD"""
+    if not coches:
+        return {campo: 0.0 for campo in CAMPOS_COMPLETITUD}
+    return {campo: round(sum(1 for coche in coches
+                             if coche.get(campo, "No especificado") not in ("No especificado", "", None))
+                         / len(coches) * 100, 1)
+            for campo in CAMPOS_COMPLETITUD}
+
+class TelemetriaScraper:
+    def __init__(self, ruta):
+        """
+        Args:
+            ruta: Fichero de la base de datos (se crea con su carpeta si no existe)
+        """
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.executescript(ESQUEMA)
+
+    @classmethod
+    def desde_entorno(cls):
+        """Telemetria en la ruta configurada, o None si esta desactivada"""
+        if os.getenv('TELEMETRIA_SCRAPER', 'true').lower() != 'true':
+            return None
+        return cls(os.getenv('TELEMETRIA_RUTA', '../data/telemetria_scraper.db'))
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def iniciar_ejecucion(self, grupo, modo, extraccion):
+        """Registra el inicio de una ejecucion y devuelve su id"""
+        with self.conexion:
+            cursor = self.conexion.execute(
+                "INSERT INTO ejecuciones (inicio, grupo, modo, extraccion, maquina) VALUES (?, ?, ?, ?, ?)",
+                (datetime.now().isoformat(timespec='seconds'), grupo, modo, extraccion, socket.gethostname()))
+        return cursor.lastrowid
+
+    def registrar_vendedor(self, ejecucion, vendedor, anuncios, coches, fallos, segundos, pulsaciones):
+        """
+        Guarda los numeros de un vendedor en la ejecucion
+
+        Args:
+            anuncios: Enlaces unicos encontrados en su perfil
+            coches: Registros extraidos (dicts con las columnas del Excel)
+            fallos: Anuncios cuya extraccion devolvio None
+            segundos: Tiempo real del vendedor (carga + paginacion + fichas)
+            pulsaciones: Pulsaciones de "Ver mas productos"
+        """
+        completitud = completitud_campos(coches)
+        media = round(sum(completitud.values()) / len(completitud), 1)
+        por_minuto = round(len(coches) / (segundos / 60), 2) if segundos > 0 else 0.0
+        with self.conexion:
+            self.conexion.execute(
+                "INSERT OR REPLACE INTO vendedores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (ejecucion, vendedor, anuncios, len(coches), fallos, round(segundos, 1), por_minuto,
+                 pulsaciones, media, json.dumps(completitud, ensure_ascii=False)))
+
+    def cerrar_ejecucion(self, ejecucion):
+        """Anota fin, duracion y coches totales a partir de las filas de sus vendedores"""
+        fin = datetime.now()
+        inicio = self.conexion.execute("SELECT inicio FROM ejecuciones WHERE id = ?", (ejecucion,)).fetchone()[0]
+        coches = self.conexion.execute("SELECT COALESCE(SUM(extraidos), 0) FROM vendedores WHERE ejecucion = ?",
+                                       (ejecucion,)).fetchone()[0]
+        with self.conexion:
+            self.conexion.execute(
+                "UPDATE ejecuciones SET fin = ?, segundos = ?, coches = ? WHERE id = ?",
+                (fin.isoformat(timespec='seconds'),
+                 round((fin - datetime.fromisoformat(inicio)).total_seconds(), 1), coches, ejecucion))
+
+    def ejecuciones(self, ultimas=10):
+        """Ultimas ejecuciones (mas reciente primero)"""
+        return self.conexion.execute(
+            "SELECT id, inicio, grupo, modo, extraccion, segundos, coches FROM ejecuciones "
+            "ORDER BY id DESC LIMIT ?", (ultimas,)).fetchall()
+
+    def historial_vendedor(self, vendedor=None):
+        """Filas de vendedores en orden cronologico: (vendedor, ejecucion, inicio, anuncios, extraidos,
+        fallos, segundos, coches_por_minuto, pulsaciones, completitud_media)"""
+        consulta = ("SELECT v.vendedor, v.ejecucion, e.inicio, v.anuncios, v.extraidos, v.fallos, v.segundos, "
+                    "v.coches_por_minuto, v.pulsaciones, v.completitud_media "
+                    "FROM vendedores v JOIN ejecuciones e ON e.id = v.ejecucion")
+        parametros = ()
+        if vendedor:
+            consulta += " WHERE v.vendedor = ?"
+            parametros = (vendedor,)
+        return self.conexion.execute(consulta + " ORDER BY v.vendedor, v.ejecucion", parametros).fetchall()
+
+    def ralentizaciones(self, ejecucion):
+        """Vendedores de la ejecucion con coches/min por debajo de UMBRAL_RALENTIZACION x su mediana anterior"""
+        avisos = []
+        for vendedor, por_minuto in self.conexion.execute(
+                "SELECT vendedor, coches_por_minuto FROM vendedores WHERE ejecucion = ?", (ejecucion,)):
+            anteriores = [fila[0] for fila in self.conexion.execute(
+                "SELECT coches_por_minuto FROM vendedores WHERE vendedor = ? AND ejecucion < ? AND extraidos > 0",
+                (vendedor, ejecucion))]
+            if anteriores and por_minuto < UMBRAL_RALENTIZACION * median(anteriores):
+                avisos.append((vendedor, por_minuto, median(anteriores)))
+        return avisos
+
+    def mostrar_informe(self, ultimas=10, vendedor=None):
+        """Ejecuciones recientes, tendencia por vendedor, ralentizaciones y tiempos para planificar jobs"""
+        ejecuciones = self.ejecuciones(ultimas)
+        if not ejecuciones:
+            print(f"Sin ejecuciones registradas en {self.ruta}")
+            return
+        ids_recientes = {fila[0] for fila in ejecuciones}
+
+        print(f"\n{'=' * 70}")
+        print(f"ULTIMAS {len(ejecuciones)} EJECUCIONES")
+        print(f"{'=' * 70}")
+        print(f"{'Id':>5} {'Inicio':<20} {'Grupo':<8} {'Modo':<11} {'Extraccion':<10} {'Duracion':>9} {'Coches':>7}")
+        for id_, inicio, grupo, modo, extraccion, segundos, coches in ejecuciones:
+            duracion = f"{segundos / 60:.0f} min" if segundos is not None else "en curso"
+            print(f"{id_:>5} {inicio:<20} {grupo or '-':<8} {modo or '-':<11} {extraccion or '-':<10} "
+                  f"{duracion:>9} {coches if coches is not None else '-':>7}")
+
+        historial = [fila for fila in self.historial_vendedor(vendedor) if fila[1] in ids_recientes]
+        print(f"\n{'=' * 70}")
+        print("TENDENCIA POR VENDEDOR (coches/min por ejecucion, de la mas antigua a la mas reciente)")
+        print(f"{'=' * 70}")
+        por_vendedor = {}
+        for fila in historial:
+            por_vendedor.setdefault(fila[0], []).append(fila)
+        for nombre, filas in por_vendedor.items():
+            ultima = filas[-1]
+            serie = " ".join(f"{fila[7]:.1f}" for fila in filas)
+            print(f"{nombre[:25]:<26} {serie}")
+            print(f"{'':<26} ultima: {ultima[4]}/{ultima[3]} extraidos, {ultima[5]} fallos, "
+                  f"{ultima[6] / 60:.1f} min, {ultima[8]} 'Ver mas', completitud {ultima[9]:.0f}%")
+
+        avisos = self.ralentizaciones(ejecuciones[0][0])
+        if vendedor:
+            avisos = [aviso for aviso in avisos if aviso[0] == vendedor]
+        print(f"\n{'=' * 70}")
+        print(f"RALENTIZACIONES EN LA EJECUCION {ejecuciones[0][0]}")
+        print(f"{'=' * 70}")
+        if avisos:
+            for nombre, por_minuto, mediana in avisos:
+                print(f"AVISO: {nombre}: {por_minuto:.1f} coches/min (mediana anterior {mediana:.1f})")
+        else:
+            print("Sin ralentizaciones respecto a las ejecuciones anteriores")
+
+        # Planificacion: tiempo medio por vendedor en las ejecuciones mostradas, de mayor a menor
+        print(f"\n{'=' * 70}")
+        print("TIEMPO MEDIO POR VENDEDOR (para repartir los jobs)")
+        print(f"{'=' * 70}")
+        medias = sorted(((sum(fila[6] for fila in filas) / len(filas), sum(fila[4] for fila in filas) / len(filas), nombre)
+                         for nombre, filas in por_vendedor.items()), reverse=True)
+        acumulado = 0.0
+        for segundos, coches, nombre in medias:
+            acumulado += segundos
+            print(f"{nombre[:25]:<26} {segundos / 60:>7.1f} min {coches:>7.0f} coches   acumulado {acumulado / 3600:>5.2f} h")
@@ -25,6 +25,10 @@ Uso: Motick
 import os
 from datetime import datetime
 
+from esquema_datos import (PRECIO_MINIMO_VALIDO, PRECIO_MAXIMO_VALIDO, PRECIO_CAMBIO_MINIMO,
+                           CAMBIO_PORCENTAJE_SIGNIFICATIVO, km_texto, ano_texto, precio_texto,
+                           precio_en_rango, cambio_significativo)
+
 # Configuración de Google Sheets para Análisis Histórico
 SHEET_NAME_HISTORICO = "Data_Historico"
 SHEET_NAME_PATTERN_J1 = "SCR-J1 {fecha}"
@@ -39,9 +43,8 @@ COLUMNAS_DATOS_ADICIONALES = ["Ano", "KM", "Tipo", "Combustible", "Potencia"]
 COLUMNAS_INTERNAS = ["KM_Numerico_Internal", "Ano_Numerico_Internal"]
 
 # Configuración de detección de cambios
-PRECIO_CAMBIO_MINIMO = 100  # Euros - cambio mínimo para considerar significativo
-PRECIO_MAXIMO_VALIDO = 500000  # Euros - precio máximo válido
-PRECIO_MINIMO_VALIDO = 500   # Euros - precio mínimo válido
+# PRECIO_CAMBIO_MINIMO / CAMBIO_PORCENTAJE_SIGNIFICATIVO / PRECIO_MINIMO_VALIDO / PRECIO_MAXIMO_VALIDO:
+# umbrales y límites declarados en esquema_datos
 
 # Configuración de estados
 ESTADOS_VALIDOS = ["activo", "vendido", "retirado"]
@@ -73,7 +76,6 @@ PATRONES_KM_LIMPIEZA = [
 
 # Configuración de análisis de tendencias
 DIAS_PARA_TENDENCIA = 7  # Mínimo de días para calcular tendencias
-CAMBIO_PORCENTAJE_SIGNIFICATIVO = 5  # Porcentaje mínimo para considerar cambio significativo
 
 # Configuración de logging y reportes
 MOSTRAR_DETALLES_CAMBIOS_PRECIO = True
@@ -114,65 +116,21 @@ def get_columna_precio_fecha(fecha_str):
     return f"Precio_{fecha_str}"
 
 def validar_precio(precio_str):
-    """Valida si un precio está dentro de rangos esperados"""
+    """Valida si un precio está dentro de rangos esperados (ver esquema_datos.precio_texto)"""
     if not precio_str or precio_str == "No especificado":
         return True, 0
-    
-    # Limpiar y extraer número del precio
-    for patron in PATRONES_PRECIO_LIMPIEZA:
-        import re
-        match = re.search(patron, str(precio_str), re.IGNORECASE)
-        if match:
-            try:
-                precio_num = int(match.group(1).replace('.', '').replace(',', ''))
-                if PRECIO_MINIMO_VALIDO <= precio_num <= PRECIO_MAXIMO_VALIDO:
-                    return True, precio_num
-                else:
-                    return False, precio_num
-            except:
-                continue
-    
-    return False, 0
+    precio = precio_texto(precio_str)
+    if precio is None:
+        return False, 0
+    return precio_en_rango(precio), precio
 
 def limpiar_kilometraje(km_str):
-    """Limpia y extrae el valor numérico del kilometraje"""
-    if not km_str or km_str == "No especificado":
-        return 0
-    
-    # Limpiar y extraer número del kilometraje
-    for patron in PATRONES_KM_LIMPIEZA:
-        import re
-        match = re.search(patron, str(km_str), re.IGNORECASE)
-        if match:
-            try:
-                km_num = int(match.group(1).replace('.', '').replace(',', ''))
-                return km_num
-            except:
-                continue
-    
-    # Fallback: extraer cualquier número
-    import re
-    numeros = re.findall(r'\d+', str(km_str).replace('.', '').replace(',', ''))
-    if numeros:
-        try:
-            return int(''.join(numeros))
-        except:
-            pass
-    
-    return 0
+    """Limpia y extrae el valor numérico del kilometraje (ver esquema_datos.km_texto)"""
+    return km_texto(km_str)
 
 def limpiar_ano(ano_str):
-    """Limpia y extrae el valor numérico del año"""
-    if not ano_str or ano_str == "No especificado":
-        return 0
-    
-    import re
-    numeros = re.findall(r'\d{4}', str(ano_str))
-    if numeros:
-        ano = int(numeros[0])
-        if 1990 <= ano <= datetime.now().year + 1:
-            return ano
-    return 0
+    """Limpia y extrae el valor numérico del año (ver esquema_datos.ano_texto)"""
+    return ano_texto(ano_str)
 
 def es_cambio_precio_significativo(precio_anterior, precio_nuevo):
     """Determina si un cambio de precio es significativo"""
@@ -192,15 +150,8 @@ def es_cambio_precio_significativo(precio_anterior, precio_nuevo):
         _, valor_anterior = validar_precio(precio_anterior)
         _, valor_nuevo = validar_precio(precio_nuevo)
         
-        if valor_anterior == 0 or valor_nuevo == 0:
-            return False
-        
-        # Calcular diferencia absoluta
-        diferencia = abs(valor_nuevo - valor_anterior)
-        
-        # Es significativo si supera el mínimo O el porcentaje
-        return (diferencia >= PRECIO_CAMBIO_MINIMO or 
-                (diferencia / valor_anterior * 100) >= CAMBIO_PORCENTAJE_SIGNIFICATIVO)
+        # Es significativo si supera el mínimo O el porcentaje (misma regla que cambios_precio)
+        return cambio_significativo(valor_anterior, valor_nuevo)
         
     except:
         return False
@@ -0,0 +1,6 @@
+"""Los modulos de src se importan planos (los scripts se ejecutan desde src)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
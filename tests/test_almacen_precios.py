@@ -0,0 +1,68 @@
+import pandas as pd
+
+from almacen_precios import AlmacenEventosPrecio, ID_EJECUCION
+from fake_sheets import FakeSheetsClient
+from google_sheets_uploader import GoogleSheetsUploader
+
+SNAPSHOTS = [
+    ('01/10/2026', {'A': '10.000 €', 'B': '5.000 €'}),
+    ('02/10/2026', {'A': '10.000 €', 'B': '4.500 €', 'C': '7.000 €'}),
+    ('03/10/2026', {'A': '9.000 €', 'C': '7.000 €'}),
+    ('04/10/2026', {'A': '9.000 €', 'C': '7.000 €'}),
+]
+
+
+def _almacen(snapshots=SNAPSHOTS):
+    almacen = AlmacenEventosPrecio()
+    for fecha, precios in snapshots:
+        almacen.registrar_snapshot(fecha, pd.Series(precios))
+    return almacen
+
+
+def test_solo_guarda_cambios():
+    eventos = _almacen().eventos
+    cambios = eventos[eventos['ID_Unico_Coche'] != ID_EJECUCION]
+    # A: alta y bajada; B: alta, bajada y vendido (''); C: alta
+    assert cambios['ID_Unico_Coche'].value_counts().to_dict() == {'A': 2, 'B': 3, 'C': 1}
+    assert (eventos['ID_Unico_Coche'] == ID_EJECUCION).sum() == len(SNAPSHOTS)
+
+
+def test_pivotar_ventanas():
+    almacen = _almacen()
+    completo = almacen.pivotar()
+    assert completo.columns.tolist() == [f"Precio_{fecha}" for fecha, _ in SNAPSHOTS]
+    assert completo.loc['B'].tolist() == ['5.000 €', '4.500 €', '', '']
+    assert completo.loc['C'].tolist() == ['', '7.000 €', '7.000 €', '7.000 €']
+
+    # La ventana arrastra el ultimo precio anterior a su primera fecha
+    ventana = almacen.pivotar(fecha_inicio='03/10/2026')
+    assert ventana.columns.tolist() == ['Precio_03/10/2026', 'Precio_04/10/2026']
+    assert ventana.loc['A'].tolist() == ['9.000 €', '9.000 €']
+    assert ventana.equals(completo[ventana.columns])
+
+    assert almacen.pivotar(fecha_fin='02/10/2026', ids=['B', 'X']).values.tolist() == [
+        ['5.000 €', '4.500 €'], ['', '']]
+
+
+def test_migracion_desde_historico_ancho():
+    ancho = _almacen().pivotar().reset_index()
+    migrado = AlmacenEventosPrecio.desde_historico_ancho(ancho)
+    assert migrado.pivotar().equals(_almacen().pivotar())
+
+
+def test_guardar_y_cargar():
+    client = FakeSheetsClient()
+    uploader = GoogleSheetsUploader(sheet_id="test", client=client)
+    almacen = _almacen(SNAPSHOTS[:2])
+    assert almacen.guardar(uploader) == len(almacen.eventos)
+
+    cargado = AlmacenEventosPrecio.cargar(uploader)
+    pd.testing.assert_frame_equal(cargado.eventos, almacen.eventos)
+
+    # Solo se anaden los eventos nuevos
+    for fecha, precios in SNAPSHOTS[2:]:
+        cargado.registrar_snapshot(fecha, pd.Series(precios))
+    client.llamadas.clear()
+    assert cargado.guardar(uploader) == len(cargado.eventos) - len(almacen.eventos)
+    assert client.llamadas['append_rows'] == 1 and client.llamadas['update'] == 0
+    assert AlmacenEventosPrecio.cargar(uploader).pivotar().equals(_almacen().pivotar())
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from duplicados import COLUMNA_GRUPO, IndiceDuplicados, agrupar_duplicados, marcar_duplicados
+
+
+def _coche(item_id, vendedor, modelo='Ibiza 1.0 TSI', km='50.000 km', precio='12.000 €', **extra):
+    return {'Marca': 'Seat', 'Modelo': modelo, 'Vendedor': vendedor, 'Año': '2019', 'KM': km,
+            'Precio al Contado': precio, 'URL': f"https://es.wallapop.com/item/seat-ibiza-{item_id}",
+            'Potencia': '95 cv', 'Combustible': 'Gasolina', 'Conducción': 'Manual', **extra}
+
+
+def test_mismo_coche_de_varios_vendedores():
+    coches = [_coche(1000003, 'CRESTANEVADA VIC C.'),
+              _coche(1000001, 'CRESTANEVADA HUESCA C.', modelo='Ibiza TSI 1.0', km='50.800 km', precio='12.300 €'),
+              _coche(1000002, 'Otro vendedor', modelo='Leon 1.5 TSI')]
+    resumen = marcar_duplicados(coches)
+    assert [coche[COLUMNA_GRUPO] for coche in coches] == ['D1000001', 'D1000001', '']
+    # Principal: el primero en orden de procesamiento, no el de numero mas bajo
+    assert resumen['secundarios'] == {1: 0}
+    assert (resumen['grupos'], resumen['duplicados'], resumen['unicos']) == (1, 2, 2)
+
+
+def test_exclusiones():
+    def grupos(*coches, solo_relacionados=False):
+        return agrupar_duplicados(list(coches), solo_relacionados)[0]
+
+    assert grupos(_coche(1000001, 'A'), _coche(1000002, 'A')) == []                               # Mismo vendedor
+    assert grupos(_coche(1000001, 'A'), _coche(1000002, 'B', modelo='Ibiza 1.5 TSI')) == []       # Otra cilindrada
+    assert grupos(_coche(1000001, 'A'), _coche(1000002, 'B', km='53.000 km')) == []               # KM
+    assert grupos(_coche(1000001, 'A'), _coche(1000002, 'B', precio='13.000 €')) == []            # Precio
+    assert grupos(_coche(1000001, 'A'), _coche(1000002, 'B', Combustible='Diésel')) == []         # Caracteristica
+    assert grupos(_coche(1000001, 'A'), _coche(1000002, 'B', Potencia='No especificado')) == [[0, 1]]
+    assert grupos(_coche(1000001, 'Mundicars G.'), _coche(1000002, 'Flexicar L.'), solo_relacionados=True) == []
+    assert grupos(_coche(1000001, 'Mundicars G.'), _coche(1000002, 'MundiCars B.'), solo_relacionados=True) == [[0, 1]]
+
+
+def test_indice_reutiliza_secundarios(tmp_path):
+    ruta = str(tmp_path / "duplicados.json")
+    coches = [_coche(1000002, 'A'), _coche(1000001, 'B')]
+    indice = IndiceDuplicados(ruta, omitir=True)
+    indice.actualizar(coches)
+    indice.guardar()
+
+    siguiente = IndiceDuplicados(ruta, omitir=True)
+    secundario = coches[1]['URL']
+    # Hasta extraer el principal (mismo precio) la ficha se abre
+    assert siguiente.registro_conocido(secundario, 'B') is None
+    siguiente.observar(dict(coches[0], **{'Precio al Contado': '11.000 €'}))
+    assert siguiente.registro_conocido(secundario, 'B') is None
+    siguiente.observar(coches[0])
+    assert siguiente.registro_conocido(secundario, 'A') is None
+    registro = siguiente.registro_conocido(secundario, 'B')
+    assert registro['URL'] == secundario
+    assert registro['Fecha Extracción'] == datetime.now().strftime("%d/%m/%Y")
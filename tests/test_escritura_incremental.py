@@ -0,0 +1,33 @@
+import contextlib
+import io
+
+from analisis_coches import AnalizadorHistoricoCoches
+from benchmark_analisis import SHEET_ID_BENCHMARK, preparar_backend
+from datos_sinteticos import generar_escenario
+from google_sheets_uploader import GoogleSheetsUploader
+
+
+HISTORICO, SNAPSHOT, FECHA = generar_escenario(300, n_dias=5)
+
+
+def _ejecutar(monkeypatch, modo):
+    """Ejecuta el analizador sobre el backend en memoria; devuelve (client, Data_Historico)"""
+    monkeypatch.setenv('ESCRITURA_HISTORICO', modo)
+    client = preparar_backend(HISTORICO, SNAPSHOT, FECHA)
+    uploader = GoogleSheetsUploader(sheet_id=SHEET_ID_BENCHMARK, client=client)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert AnalizadorHistoricoCoches(gs_handler=uploader).ejecutar()
+    return client, client.open_by_key(SHEET_ID_BENCHMARK).worksheet("Data_Historico").get_all_values()
+
+
+def test_incremental_igual_que_reescritura_completa(monkeypatch):
+    client_completa, grid_completa = _ejecutar(monkeypatch, 'completa')
+    client, grid = _ejecutar(monkeypatch, 'incremental')
+
+    assert grid[0] == grid_completa[0]
+    assert sorted(grid[1:]) == sorted(grid_completa[1:])
+    # Sin limpiar Data_Historico: un unico batch_update y las filas existentes en su sitio
+    assert client.llamadas['clear'] == 0 and client_completa.llamadas['clear'] == 1
+    assert client.llamadas['batch_update'] == 1
+    ids = [fila[grid[0].index('ID_Unico_Coche')] for fila in grid[1:]]
+    assert ids[:len(HISTORICO)] == HISTORICO['ID_Unico_Coche'].tolist()
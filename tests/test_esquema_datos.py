@@ -0,0 +1,39 @@
+import pandas as pd
+
+from esquema_datos import KM_MAXIMO_VALIDO, parsear_km
+
+
+def _km(*textos):
+    return parsear_km(pd.Series(list(textos), dtype=object))[0].tolist()
+
+
+def test_parsear_km_toma_el_primer_numero_con_unidad():
+    assert _km('120.000 km (2023)', '1.5 TSI 85.000km', '85,000 km', '12 kilómetros') == [120000, 85000, 85000, 12]
+
+
+def test_parsear_km_sin_unidad_junta_los_digitos():
+    assert _km('120000', '120.000') == [120000, 120000]
+
+
+def test_parsear_km_vacios_y_limite():
+    km, informe = parsear_km(pd.Series(['No especificado', '', None, '2.000.000 km'], dtype=object))
+    assert km.tolist() == [0, 0, 0, KM_MAXIMO_VALIDO]
+    assert informe['vacios'] == 3 and informe['coercionados'] == 1
+
+
+def test_escalares_coinciden_con_las_series():
+    from esquema_datos import ano_texto, km_texto, parsear_ano, parsear_precio, precio_texto
+    textos = ['120.000 km (2023)', '1.5 TSI 85.000km', '12.500 €', '2018', '1985', 'No especificado', '', None, 'abc']
+    serie = pd.Series(textos, dtype=object)
+    assert [km_texto(t) for t in textos] == parsear_km(serie)[0].tolist()
+    assert [ano_texto(t) for t in textos] == parsear_ano(serie)[0].tolist()
+    precios = parsear_precio(serie)[0]
+    assert [precio_texto(t) for t in textos] == [None if pd.isna(p) else int(p) for p in precios]
+
+
+def test_cambio_significativo_umbral_absoluto_o_relativo():
+    from esquema_datos import cambio_significativo
+    assert cambio_significativo(20000, 19900)      # 100 EUR
+    assert cambio_significativo(1000, 950)         # 5 %
+    assert not cambio_significativo(20000, 19950)
+    assert not cambio_significativo(0, 15000)
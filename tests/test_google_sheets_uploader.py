@@ -0,0 +1,85 @@
+import gspread
+import pandas as pd
+import pytest
+
+from fake_sheets import FakeSheetsClient
+from google_sheets_uploader import GoogleSheetsUploader
+
+
+def _uploader():
+    client = FakeSheetsClient()
+    return client, GoogleSheetsUploader(sheet_id="test", client=client)
+
+
+def test_escritura_fuera_de_rejilla_falla():
+    client, _ = _uploader()
+    worksheet = client.open_by_key("test").add_worksheet(title="H", rows=2, cols=2)
+    with pytest.raises(gspread.exceptions.APIError):
+        worksheet.update([['a'], ['b'], ['c']])
+    with pytest.raises(gspread.exceptions.APIError):
+        worksheet.batch_update([{'range': 'C1', 'values': [['x']]}])
+    worksheet.append_rows([['a'], ['b'], ['c']])
+    assert worksheet.get_all_values() == [['a'], ['b'], ['c']]
+
+
+def test_subida_completa_amplia_hoja_existente():
+    client, uploader = _uploader()
+    assert uploader.upload_dataframe(pd.DataFrame({'A': ['1']}), "H")
+    df = pd.DataFrame({'A': [str(i) for i in range(30)], 'B': 'x', 'C': 'y', 'D': 'z'})
+    assert uploader.upload_dataframe(df, "H")
+    assert uploader.get_worksheet("H").get_all_values() == [df.columns.tolist()] + df.values.tolist()
+    assert client.llamadas['resize'] == 1
+
+
+def test_diff_anade_filas_debajo_de_filas_sin_clave():
+    _, uploader = _uploader()
+    uploader.upload_dataframe(pd.DataFrame({'ID': ['1', '', '2', ''], 'V': ['a', 'nota', 'b', 'otra']}), "H")
+    assert uploader.upload_dataframe(pd.DataFrame({'ID': ['1', '2', '3'], 'V': ['a', 'b', 'c']}), "H",
+                                     mode="diff", key_column='ID')
+    assert uploader.get_worksheet("H").get_all_values() == [
+        ['ID', 'V'], ['1', 'a'], ['', 'nota'], ['2', 'b'], ['', 'otra'], ['3', 'c']]
+
+
+def _subir_y_diff(inicial, nuevo, key_column='ID'):
+    client, uploader = _uploader()
+    uploader.upload_dataframe(inicial, "H")
+    client.llamadas.clear()
+    assert uploader.upload_dataframe(nuevo, "H", mode="diff", key_column=key_column)
+    assert uploader.get_worksheet("H").get_all_values() == [nuevo.columns.tolist()] + nuevo.values.tolist()
+    return client, uploader.last_upload_stats
+
+
+INICIAL = pd.DataFrame({'ID': ['1', '2', '3'], 'Precio': ['100', '200', '300'], 'Estado': 'activo'})
+
+
+def test_diff_solo_envia_celdas_cambiadas():
+    nuevo = INICIAL.copy()
+    nuevo.loc[1, 'Precio'] = '250'
+    nuevo = pd.concat([nuevo, pd.DataFrame({'ID': ['4'], 'Precio': ['400'], 'Estado': ['activo']})], ignore_index=True)
+    client, stats = _subir_y_diff(INICIAL, nuevo)
+    assert stats['modo'] == 'diff'
+    assert (stats['filas_modificadas'], stats['filas_nuevas'], stats['celdas_enviadas']) == (1, 1, 4)
+    assert client.llamadas['batch_update'] == 1 and client.llamadas['clear'] == 0
+
+
+def test_diff_columna_nueva_al_final():
+    nuevo = INICIAL.assign(Nota=['a', '', 'c'])
+    _, stats = _subir_y_diff(INICIAL, nuevo)
+    assert stats['modo'] == 'diff' and stats['filas_modificadas'] == 0
+
+
+@pytest.mark.parametrize('nuevo', [
+    INICIAL[['Precio', 'ID', 'Estado']],                       # Cabecera no es prefijo de la actual
+    pd.concat([INICIAL, INICIAL.tail(1)], ignore_index=True),  # Claves repetidas en df
+    INICIAL.head(2),                                           # Filas eliminadas
+], ids=['cabecera', 'claves_repetidas', 'filas_eliminadas'])
+def test_diff_recurre_a_subida_completa(nuevo):
+    client, stats = _subir_y_diff(INICIAL, nuevo)
+    assert stats['modo'] == 'full'
+    assert client.llamadas['clear'] == 1
+
+
+def test_diff_claves_repetidas_en_hoja():
+    inicial = pd.concat([INICIAL, INICIAL.tail(1)], ignore_index=True)
+    _, stats = _subir_y_diff(inicial, INICIAL)
+    assert stats['modo'] == 'full'
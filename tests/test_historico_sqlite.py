@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from historico_sqlite import COLUMNAS_COCHE, HistoricoSQLite
+
+URL = "https://es.wallapop.com/item/seat-ibiza-{}"
+
+
+def _coche(item_id, vendedor='V1', estado='activo', **precios):
+    coche = dict.fromkeys(COLUMNAS_COCHE, 'No especificado')
+    coche.update({'ID_Unico_Coche': item_id, 'URL': URL.format(item_id), 'Marca': 'Seat', 'Modelo': 'Ibiza',
+                  'Vendedor': vendedor, 'Primera_Deteccion': '01/10/2026', 'Estado': estado, 'Fecha_Venta': ''})
+    coche.update({f"Precio_{fecha.replace('_', '/')}": precio for fecha, precio in precios.items()})
+    return coche
+
+
+HISTORICO = pd.DataFrame([
+    _coche('1000001', **{'01_10_2026': '10.000 €', '02_10_2026': '9.500 €'}),
+    _coche('1000002', vendedor='V2', **{'01_10_2026': '5.000 €', '02_10_2026': '5.000 €'}),
+])
+
+
+@pytest.fixture
+def historico(tmp_path):
+    historico = HistoricoSQLite(str(tmp_path / "datos" / "historico.db"))
+    historico.importar_historico_ancho(HISTORICO)
+    yield historico
+    historico.cerrar()
+
+
+def test_importar_y_exportar(historico):
+    assert historico.contar_coches() == 2
+    assert historico.fechas_ejecucion() == ['2026-10-01', '2026-10-02']
+    pd.testing.assert_frame_equal(historico.exportar_vista(), HISTORICO)
+    assert historico.exportar_vista(ultimas_fechas=1, vendedor='V2').values.tolist() == [
+        HISTORICO.drop(columns='Precio_01/10/2026').iloc[1].tolist()]
+
+
+def test_aplicar_snapshot(historico):
+    snapshot = pd.DataFrame([
+        {'ID_Unico_Coche': '1000001', 'URL': URL.format('editado-1000001'), 'Marca': 'Seat', 'Modelo': 'Ibiza',
+         'Vendedor': 'V1', 'Precio_Contado': '9.000 €'},
+        {'ID_Unico_Coche': '1000003', 'URL': URL.format('1000003'), 'Marca': 'Seat', 'Modelo': 'Leon',
+         'Vendedor': 'V1', 'Precio_Contado': '15.000 €'},
+    ])
+    resultado = historico.aplicar_snapshot(snapshot, '03/10/2026')
+    assert resultado['coches_actualizados'] == 1
+    assert [coche['Modelo'] for coche in resultado['coches_nuevos']] == ['Leon']
+    assert [coche['Vendedor'] for coche in resultado['coches_vendidos']] == ['V2']
+
+    vista = historico.exportar_vista().set_index('ID_Unico_Coche')
+    assert vista.loc['1000001', 'URL'] == URL.format('editado-1000001')
+    assert vista['Precio_03/10/2026'].to_dict() == {'1000001': '9.000 €', '1000002': '', '1000003': '15.000 €'}
+    assert vista.loc['1000002', ['Estado', 'Fecha_Venta']].tolist() == ['vendido', '03/10/2026']
+    assert vista.loc['1000003', ['Primera_Deteccion', 'Precio_02/10/2026']].tolist() == ['03/10/2026', '']
+
+    # Repetir el mismo snapshot no cambia nada
+    historico.aplicar_snapshot(snapshot, '03/10/2026')
+    pd.testing.assert_frame_equal(historico.exportar_vista().set_index('ID_Unico_Coche'), vista)
+
+
+def test_migrar_ids(tmp_path):
+    antiguo = _coche('a1b2c3d4e5f6', **{'01_10_2026': '10.000 €'})
+    antiguo['URL'] = "http://www.wallapop.com/item/seat-ibiza-1000009?utm=x"
+    historico = HistoricoSQLite(str(tmp_path / "historico.db"))
+    historico.importar_historico_ancho(pd.DataFrame([antiguo]))
+    assert historico.migrar_ids() == 1
+    vista = historico.exportar_vista()
+    historico.cerrar()
+    assert vista[['ID_Unico_Coche', 'URL', 'Precio_01/10/2026']].values.tolist() == [
+        ['1000009', URL.format('1000009'), '10.000 €']]
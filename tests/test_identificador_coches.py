@@ -0,0 +1,22 @@
+import pandas as pd
+
+from identificador_coches import canonicalizar_url, crear_id_unico, crear_ids_unicos
+
+FILAS = [
+    {'URL': 'https://es.wallapop.com/item/seat-leon-1234567890?utm=x', 'Vendedor': 'V', 'Marca': 'Seat'},
+    {'URL': 'http://www.wallapop.com/item/1234567891/', 'Vendedor': 'V'},
+    {'URL': 'https://es.wallapop.com/item/sin-numero', 'Vendedor': 'V'},
+    {'URL': 'No especificado', 'Vendedor': 'V', 'Marca': 'Seat', 'Modelo': 'Leon', 'KM': '50.000 km'},
+    {'Vendedor': ' V ', 'Marca': 'Seat', 'Modelo': 'Leon', 'KM': float('nan')},
+]
+
+
+def test_url_canonica():
+    assert canonicalizar_url('http://www.wallapop.com/item/x-1234567/?a=1#b') == 'https://es.wallapop.com/item/x-1234567'
+
+
+def test_id_por_fila_igual_que_por_columna():
+    vectorizado = crear_ids_unicos(pd.DataFrame(FILAS)).tolist()
+    assert vectorizado[:2] == ['1234567890', '1234567891']
+    assert [crear_id_unico(fila) for fila in FILAS] == vectorizado
+    assert [crear_id_unico(fila) for _, fila in pd.DataFrame(FILAS).iterrows()] == vectorizado
@@ -0,0 +1,45 @@
+from perfiles_timeout import (MIN_MUESTRAS, PASO_CRECIMIENTO, PerfilesTimeout, TIMEOUTS_POR_DEFECTO,
+                              timeout_aprendido)
+
+
+def _muestras(completadas, agotados, limite):
+    return [float(s) for s in completadas] + [-limite] * agotados
+
+
+def test_pocas_muestras_sin_valor_aprendido():
+    assert timeout_aprendido([1.0] * (MIN_MUESTRAS - 1), 'ficha') is None
+
+
+def test_cargas_rapidas_bajan_el_timeout():
+    assert timeout_aprendido([1.0] * 50, 'ficha') == 2.0
+
+
+def test_timeouts_frecuentes_no_bajan_del_limite_agotado():
+    # 25 cargas de 1 s y 5 timeouts de 6 s (17 %): no puede quedar en 2 s
+    assert timeout_aprendido(_muestras([1.0] * 25, 5, 6.0), 'ficha') == 6.0
+
+
+def test_timeouts_frecuentes_cerca_del_limite_crecen_un_paso():
+    assert timeout_aprendido(_muestras([5.5] * 25, 5, 6.0), 'ficha') == 6.0 + PASO_CRECIMIENTO
+
+
+def test_casi_ninguna_carga_termina_crece_un_paso():
+    assert timeout_aprendido(_muestras([1.0] * 5, 25, 6.0), 'ficha') == 6.0 + PASO_CRECIMIENTO
+
+
+def test_pocas_paginas_colgadas_no_suben_el_timeout():
+    assert timeout_aprendido(_muestras([1.0] * 200, 2, 6.0), 'ficha') == 2.0
+
+
+def test_registro_y_guardado(tmp_path):
+    ruta = tmp_path / 'perfiles.json'
+    perfiles = PerfilesTimeout(str(ruta))
+    limite = perfiles.timeout('V', 'ficha')  # Se calcula al empezar la ejecucion
+    for _ in range(25):
+        perfiles.registrar('V', 'ficha', 1.0)
+    for _ in range(5):
+        perfiles.registrar('V', 'ficha', limite, agotado=True)
+    perfiles.guardar()
+    recargados = PerfilesTimeout(str(ruta))
+    assert recargados.timeout('V', 'ficha') == TIMEOUTS_POR_DEFECTO['ficha']
+    assert recargados.timeout('Otro', 'ficha') == TIMEOUTS_POR_DEFECTO['ficha']